@@ -0,0 +1,130 @@
+# audio_bank.py
+# Banco de sons: cada WAV é aberto uma vez e o WaveFile é reutilizado em
+# todas as reproduções. Os sons são pedidos por nome lógico ("clash",
+# "swing", ...) em vez do índice na lista ordenada de /sounds.
+#
+# Ficheiros abertos: os pré-carregados (hum, clash) ficam sempre abertos;
+# os outros entram numa LRU com no máximo max_open ficheiros, e o menos
+# usado é fechado quando entra um novo (nunca o último tocado em cada voz).
+import random
+
+import audiocore
+
+
+class AudioBank:
+    """
+    sounds: dict nome -> caminho, ou nome -> lista de caminhos (grupo; cada
+    play escolhe um ao acaso). Cada voz do mixer tem um único buffer,
+    partilhado por todos os WaveFile dessa voz (uma voz só toca um de cada vez).
+    """
+    def __init__(self, mixer, sounds=None, buffer_size=1024, max_open=16):
+        self.mixer = mixer
+        self.sounds = dict(sounds) if sounds else {}
+        self.max_open = max_open
+        self._buffers = [bytearray(buffer_size) for _ in range(len(mixer.voice))]
+        self._files = {}  # (caminho, voz) -> ficheiro aberto
+        self._waves = {}  # (caminho, voz) -> WaveFile
+        self._recent = []  # chaves fora do pré-carregamento, a mais antiga primeiro
+        self._pinned = set()  # chaves pré-carregadas: nunca são fechadas pela LRU
+        self._current = [None] * len(mixer.voice)  # última chave tocada em cada voz
+
+    def add(self, name, path_or_paths):
+        self.sounds[name] = path_or_paths
+
+    def paths(self, name):
+        entry = self.sounds[name]
+        if isinstance(entry, str):
+            return (entry,)
+        return entry
+
+    def wave(self, path, voice=0):
+        key = (path, voice)
+        wave = self._waves.get(key)
+        if wave is None:
+            self._evict()
+            # um ficheiro por voz: o WaveFile lê sem seek, duas vozes a
+            # tocar o mesmo WAV não podem partilhar a posição do ficheiro
+            f = open(path, "rb")
+            try:
+                wave = audiocore.WaveFile(f, self._buffers[voice])
+            except Exception:
+                f.close()
+                raise
+            self._files[key] = f
+            self._waves[key] = wave
+        elif key in self._pinned:
+            return wave
+        else:
+            self._recent.remove(key)
+        self._recent.append(key)
+        return wave
+
+    def _evict(self):
+        # Fecha os menos usados até caber mais um ficheiro
+        recent = self._recent
+        i = 0
+        while len(self._files) >= self.max_open and i < len(recent):
+            key = recent[i]
+            if key in self._current:
+                i += 1
+                continue
+            recent.pop(i)
+            self._close_key(key)
+
+    def preload(self, names, voice=1):
+        # Abre já os sons "quentes" (hum/clash) para o primeiro toque não
+        # pagar a abertura do ficheiro; ficam abertos fora da LRU
+        for name in names:
+            for path in self.paths(name):
+                try:
+                    self.wave(path, voice)
+                except Exception as e:
+                    print("Erro ao pré-carregar som:", path, e)
+                    continue
+                key = (path, voice)
+                if key not in self._pinned:
+                    self._recent.remove(key)
+                    self._pinned.add(key)
+
+    def play_file(self, path, voice=0, loop=False, level=None):
+        try:
+            wave = self.wave(path, voice)
+            self._current[voice] = (path, voice)
+            self.mixer.voice[voice].play(wave, loop=loop)
+            if level is not None:
+                self.mixer.voice[voice].level = level
+            return wave
+        except Exception as e:
+            print("Erro ao tocar som:", path, e)
+            return None
+
+    def play(self, name, voice=0, loop=False, level=None):
+        if name not in self.sounds:
+            print("Som desconhecido:", name)
+            return None
+        paths = self.paths(name)
+        path = paths[0] if len(paths) == 1 else paths[random.randint(0, len(paths) - 1)]
+        return self.play_file(path, voice, loop, level)
+
+    def _close_key(self, key):
+        voice = key[1]
+        if self._current[voice] == key:
+            self.mixer.voice[voice].stop()
+            self._current[voice] = None
+        self._waves.pop(key).deinit()
+        try:
+            self._files.pop(key).close()
+        except Exception:
+            pass
+
+    def close(self, prefix=""):
+        """
+        Fecha os ficheiros cujo caminho começa por prefix (todos, por omissão),
+        p.ex. os de um pack que mudou por USB. Voltam a abrir no próximo play.
+        """
+        for key in [key for key in self._files if key[0].startswith(prefix)]:
+            self._close_key(key)
+            if key in self._pinned:
+                self._pinned.remove(key)
+            else:
+                self._recent.remove(key)
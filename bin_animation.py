@@ -1,74 +1,311 @@
+import gc
+import struct
 import time
 
+from color import ALPHA, weight
+
+# Frame skip adaptativo (adaptive=True): o custo de cada frame (decode,
+# show e o resto da volta do loop) é medido entre leituras e alisado por
+# uma média exponencial; quando passa de frame_delay, os frames em atraso
+# saltam-se sem os ler para a animação manter a duração.
+COST_ALPHA = 0.2
+MAX_AUTO_SKIP = 4  # frames saltados de uma vez, no máximo
+MAX_COST = 0.25  # intervalos maiores são pausas (outro modo), não custo
+# frame_time abaixo disto nos packs quer dizer "o mais rápido possível"
+MIN_ADAPTIVE_DELAY = 0.01
+
+# Read-ahead: cada readinto() traz vários frames seguidos em vez de um só,
+# para a ignição não disputar o flash com o áudio a cada frame. O número de
+# frames sai da RAM livre (no máximo READAHEAD_SHARE dela) e do tamanho do
+# frame; ficheiros pequenos (idle curtos) ficam inteiros em RAM.
+READAHEAD_MAX = 16  # frames por leitura, no máximo
+READAHEAD_SHARE = 16  # usa até 1/16 da RAM livre
+
+
+def readahead_frames(frame_size, frames=0):
+    """Frames a ler de cada vez para frames de frame_size bytes (>= 1)."""
+    try:
+        budget = gc.mem_free() // READAHEAD_SHARE  # só no CircuitPython
+        n = min(READAHEAD_MAX, budget // frame_size)
+    except AttributeError:
+        n = READAHEAD_MAX
+    if frames:
+        n = min(n, frames)
+    return max(1, n)
+
+
 class BinAnimation:
-    def __init__(self, filename, num_pixels, tint=(1,1,1), frame_delay=0.02, frame_skip=0, brightness=0.6):
+    def __init__(self, filename, num_pixels, tint=(1,1,1), frame_delay=0.02, frame_skip=0, brightness=0.6, clock=None,
+                 adaptive=False, loop=False):
         self.filename = filename
         self.num_pixels = num_pixels
-        self.tint = tint
         self.frame_delay = frame_delay
         self.frame_skip = frame_skip
         self.frame_size = num_pixels * 3
-        self.buf = bytearray(self.frame_size)
         self.file = open(filename, "rb")
         self.last_time = time.monotonic()
         self.done = False
-        self.brightness = brightness  # brilho percentual (0.0 a 1.0)
+        self.new_frame = False  # True quando a última chamada descodificou um frame
+        # clock: MediaClock (media_clock.py) já iniciado com o áudio do
+        # segmento; com ele o frame vem do tempo de áudio e não de frame_delay
+        self.clock = clock
+        self.frame = -1  # índice do último frame lido
+        self.adaptive = adaptive and not clock and frame_delay >= MIN_ADAPTIVE_DELAY
+        self.cost = frame_delay  # custo medido por frame (s)
+        self._debt = 0.0  # frames em atraso ainda por saltar (fração)
+        self.dropped = 0  # frames saltados (frame_skip, adaptativo ou clock)
+        self.shown = 0  # frames lidos e descodificados
+        # loop=True (idle): no fim do ficheiro volta ao primeiro frame com
+        # seek, sem reabrir o ficheiro nem criar outro BinAnimation
+        self.file.seek(0, 2)
+        self.frames = self.file.tell() // self.frame_size
+        self.file.seek(0)
+        self.loops = 0  # voltas completas
+        self.loop = loop and self.frames > 0
+        self._init_readahead()
+        self._lut_r = bytearray(256)
+        self._lut_g = bytearray(256)
+        self._lut_b = bytearray(256)
+        self._lut_plain = bytearray(256)
+        self._lut_key = None
+        self._tint = tuple(tint)
+        self._brightness = brightness  # brilho percentual (0.0 a 1.0)
+        self._weights = None
+        self._set_weights()
+        self._build_luts()
+
+    # Tint e brilho são propriedades: mudar qualquer um deles só marca as
+    # tabelas de lookup; são refeitas uma vez, no frame seguinte, e só se os
+    # pesos quantizados (1/256) mudaram. Quem muda o tint a cada volta do
+    # loop (blade_bleeding) não paga uma reconstrução por volta.
+    @property
+    def tint(self):
+        return self._tint
+
+    @tint.setter
+    def tint(self, value):
+        self._tint = tuple(value)
+        self._set_weights()
+
+    @property
+    def brightness(self):
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        self._brightness = value
+        self._set_weights()
+
+    def _set_weights(self):
+        t0, t1, t2 = self._tint
+        self._weights = (weight(t0), weight(t1), weight(t2), weight(self._brightness))
+
+    def _build_luts(self):
+        """Preenche as tabelas de 256 entradas (tint por canal + brilho simples)."""
+        key = self._weights
+        if key != self._lut_key:
+            # as contas em float de sempre (pixels iguais ao decode antigo);
+            # só correm quando os pesos quantizados mudam, não por frame
+            t0, t1, t2 = self._tint
+            br = self._brightness
+            lut_r = self._lut_r
+            lut_g = self._lut_g
+            lut_b = self._lut_b
+            lut_plain = self._lut_plain
+            for v in range(256):
+                lut_r[v] = int(min(255, int(v * t0)) * br)
+                lut_g[v] = int(min(255, int(v * t1)) * br)
+                lut_b[v] = int(min(255, int(v * t2)) * br)
+                lut_plain[v] = int(v * br)
+        # mesmo objeto: o teste "is not" dos frames seguintes falha logo
+        self._lut_key = key
+
+    def _init_readahead(self):
+        # Um bytearray para `chunk` frames e uma memoryview por frame, criadas
+        # uma vez: servir um frame do read-ahead não aloca nada
+        chunk = readahead_frames(self.frame_size, self.frames)
+        while True:
+            try:
+                self._ahead = bytearray(chunk * self.frame_size)
+                break
+            except MemoryError:
+                if chunk == 1:
+                    raise
+                chunk //= 2
+        self.chunk = chunk
+        view = memoryview(self._ahead)
+        size = self.frame_size
+        self._slices = [view[i * size:(i + 1) * size] for i in range(chunk)]
+        self.buf = self._slices[0]  # frame atual (só leitura para os decoders)
+        self._ahead_first = 0  # índice do primeiro frame no read-ahead
+        self._ahead_count = 0  # frames válidos no read-ahead
+        self.reads = 0  # chamadas a readinto()
+        self.hits = 0  # frames servidos do read-ahead sem ler o ficheiro
+
+    @property
+    def hit_ratio(self):
+        """Fração dos frames que vieram do read-ahead sem tocar no ficheiro."""
+        total = self.reads + self.hits
+        return self.hits / total if total else 0.0
+
+    def _load(self, frame):
+        # Aponta self.buf para o frame pedido; lê um bloco novo só se não
+        # estiver no read-ahead. False no fim do ficheiro.
+        k = frame - self._ahead_first
+        if 0 <= k < self._ahead_count:
+            self.hits += 1
+        else:
+            if frame != self._ahead_first + self._ahead_count:
+                # não é a continuação do bloco anterior (saltos, loop, reset)
+                self.file.seek(frame * self.frame_size)
+            count = self.file.readinto(self._ahead)
+            self.reads += 1
+            self._ahead_first = frame
+            self._ahead_count = (count or 0) // self.frame_size
+            if not self._ahead_count:
+                return False
+            k = 0
+        self.buf = self._slices[k]
+        return True
 
     def reset(self):
         try:
             if self.file.closed:
                 self.file = open(self.filename, "rb")
-            else:
-                self.file.seek(0)
+                self._ahead_count = 0  # ficheiro novo: a posição já não é a do bloco
         except Exception:
             self.file = open(self.filename, "rb")
+            self._ahead_count = 0
         self.done = False
         self.last_time = 0
-        # Limpa o buffer interno para garantir que não há resíduos
-        for i in range(self.frame_size):
-            self.buf[i] = 0
+        self.frame = -1
 
     def is_done(self):
         return self.done
 
-    def next_frame_to_buffer(self, buffer):
-        # buffer: lista de tuplas RGB, len = num_pixels
+    def _read_frame(self):
+        # Lê o próximo frame para self.buf; True só quando há frame novo
+        self.new_frame = False
         if self.done:
             return False
         now = time.monotonic()
-        if now - self.last_time < self.frame_delay:
-            return True  # ainda não é hora do próximo frame
+        if self.clock:
+            step = self.clock.advance(self.frame, now)
+            if not step:
+                return False  # frame atual ainda é o do áudio
+            if step > 1:
+                # frames em atraso: salta-os sem os descodificar
+                self.dropped += step - 1
+            self.frame += step
+        elif now - self.last_time < self.frame_delay:
+            return False  # ainda não é hora do próximo frame
+        else:
+            if self.adaptive and self.frame >= 0:
+                interval = now - self.last_time
+                if interval < MAX_COST:
+                    self.cost += (interval - self.cost) * COST_ALPHA
+            self.frame += 1
         self.last_time = now
-        count = self.file.readinto(self.buf)
-        if not count or count < self.frame_size:
+        if self.loop and self.frame >= self.frames:
+            # passou do fim (com os frames saltados): continua na volta seguinte
+            self.frame %= self.frames
+            self.loops += 1
+        if not self._load(self.frame):
             self.file.close()
             self.done = True
+            if self.clock:
+                self.clock.finish(now)
             return False
+        self.new_frame = True
+        self.shown += 1
+        return True
+
+    def _auto_skip(self):
+        # cada frame mostrado gasta cost/frame_delay vezes; o que passa de
+        # uma vez acumula-se e salta-se em frames inteiros
+        debt = self._debt + self.cost / self.frame_delay - 1
+        if debt < 0:
+            debt = 0.0
+        skip = min(int(debt), MAX_AUTO_SKIP)
+        self._debt = debt - skip
+        return skip
+
+    def _skip_frames(self):
+        # os frames saltados nem são descodificados (fora do read-ahead,
+        # _load faz seek); o fim do ficheiro é detetado na leitura seguinte
+        skip = self.frame_skip
+        if self.adaptive:
+            skip += self._auto_skip()
+        if skip:
+            self.frame += skip
+            self.dropped += skip
+        return True
+
+    def next_frame_to_buffer(self, buffer):
+        # buffer: lista de tuplas RGB, len = num_pixels
+        if not self._read_frame():
+            return not self.done
+        if self._weights is not self._lut_key:
+            self._build_luts()
+        self._decode_to_tuples(buffer)
+        return self._skip_frames()
+
+    def next_frame_into(self, frame):
+        """
+        Caminho sem tuplas: frame é um bytearray RGB de num_pixels*3 bytes,
+        enviado direto para os LEDs com pixels[:] = frame.
+        """
+        if not self._read_frame():
+            return not self.done
+        if self._weights is not self._lut_key:
+            self._build_luts()
+        self._decode_into(frame)
+        return self._skip_frames()
+
+    def _decode_to_tuples(self, buffer):
+        # Tinting especial: só aplica tint se (R>0, G==0, B==0) ou (R==255, G==B)
+        buf = self.buf
+        lut_r = self._lut_r
+        lut_g = self._lut_g
+        lut_b = self._lut_b
+        lut_plain = self._lut_plain
+        j = 0
         for i in range(self.num_pixels):
-            r = self.buf[i*3]
-            g = self.buf[i*3+1]
-            b = self.buf[i*3+2]
-            # Tinting especial: só aplica tint se (R>0, G==0, B==0) ou (R==255, G==B)
-            if (r > 0 and g == 0 and b == 0) or (r == 255 and g == b):
-                tr = min(255, int(r * self.tint[0]))
-                tg = min(255, int(r * self.tint[1])) if (g == 0 and b == 0) else min(255, int(g * self.tint[1]))
-                tb = min(255, int(r * self.tint[2])) if (g == 0 and b == 0) else min(255, int(b * self.tint[2]))
-                buffer[i] = (
-                    int(tr * self.brightness),
-                    int(tg * self.brightness),
-                    int(tb * self.brightness)
-                )
-            elif r == g == b:
-                buffer[i] = (int(r * self.brightness), int(g * self.brightness), int(b * self.brightness))
+            r = buf[j]
+            g = buf[j + 1]
+            b = buf[j + 2]
+            j += 3
+            if g == 0 and b == 0:
+                # banda de vermelho puro (preto também cai aqui e dá (0,0,0))
+                buffer[i] = (lut_r[r], lut_g[r], lut_b[r])
+            elif r == 255 and g == b:
+                buffer[i] = (lut_r[255], lut_g[g], lut_b[b])
             else:
-                buffer[i] = (int(r * self.brightness), int(g * self.brightness), int(b * self.brightness))
-        for _ in range(self.frame_skip):
-            skip = self.file.read(self.frame_size)
-            if not skip or len(skip) < self.frame_size:
-                self.file.close()
-                self.done = True
-                return False
-        return True
+                buffer[i] = (lut_plain[r], lut_plain[g], lut_plain[b])
+
+    def _decode_into(self, frame):
+        # Mesmo tinting de _decode_to_tuples, mas escreve bytes no frame
+        buf = self.buf
+        lut_r = self._lut_r
+        lut_g = self._lut_g
+        lut_b = self._lut_b
+        lut_plain = self._lut_plain
+        for j in range(0, self.frame_size, 3):
+            r = buf[j]
+            g = buf[j + 1]
+            b = buf[j + 2]
+            if g == 0 and b == 0:
+                frame[j] = lut_r[r]
+                frame[j + 1] = lut_g[r]
+                frame[j + 2] = lut_b[r]
+            elif r == 255 and g == b:
+                frame[j] = lut_r[255]
+                frame[j + 1] = lut_g[g]
+                frame[j + 2] = lut_b[b]
+            else:
+                frame[j] = lut_plain[r]
+                frame[j + 1] = lut_plain[g]
+                frame[j + 2] = lut_plain[b]
 
 class BinOverlay:
     """
@@ -104,8 +341,18 @@ class BinOverlay:
     def is_done(self):
         return self.done
 
+    def seek(self, frame):
+        """
+        A próxima leitura é a do frame dado, já (para seguir outro .bin frame
+        a frame, como a camada de branco das ignições pré-renderizadas).
+        """
+        if not self.done:
+            self.file.seek(frame * self.frame_size)
+        self.last_time = 0
+
     def next_frame_to_buffer(self, buffer):
-        # buffer: lista de tuplas RGB, len = total de pixels
+        # buffer: lista de pixels RGB mutáveis (bytearray(3) ou lista),
+        # len = total de pixels; alterados no lugar, sem tuplas novas
         if self.done:
             return False
         now = time.monotonic()
@@ -117,28 +364,220 @@ class BinOverlay:
                 self.done = True
                 return False
             # Aplica overlay em escala de cinza: branco = branco, preto = transparente, cinza = blend
+            buf = self.buf
             num_pixels = len(buffer)
-            for i in range(self.overlay_len):
-                pix_idx = self.pos + i
-                if 0 <= pix_idx < num_pixels:
-                    r = self.buf[i*3]
-                    g = self.buf[i*3+1]
-                    b = self.buf[i*3+2]
-                    if r == 255 and g == 255 and b == 255:
-                        buffer[pix_idx] = (255, 255, 255)
-                    elif r == 0 and g == 0 and b == 0:
-                        # transparente, não altera buffer
-                        continue
-                    elif r == g == b:
-                        alpha = r / 255.0
-                        bgc = buffer[pix_idx]
-                        blended = (
-                            int(bgc[0] * (1 - alpha) + 255 * alpha),
-                            int(bgc[1] * (1 - alpha) + 255 * alpha),
-                            int(bgc[2] * (1 - alpha) + 255 * alpha)
-                        )
-                        buffer[pix_idx] = blended
-                    else:
-                        buffer[pix_idx] = (r, g, b)
+            for i in range(max(0, -self.pos), min(self.overlay_len, num_pixels - self.pos)):
+                k = i * 3
+                r = buf[k]
+                g = buf[k + 1]
+                b = buf[k + 2]
+                if r == 0 and g == 0 and b == 0:
+                    # transparente, não altera buffer
+                    continue
+                pixel = buffer[self.pos + i]
+                if r == g == b and r != 255:
+                    # blend para branco em vírgula fixa (ver color.py)
+                    a = ALPHA[r]
+                    w = 255 * a
+                    na = 256 - a
+                    pixel[0] = (w + na * pixel[0]) >> 8
+                    pixel[1] = (w + na * pixel[1]) >> 8
+                    pixel[2] = (w + na * pixel[2]) >> 8
+                else:
+                    pixel[0] = r
+                    pixel[1] = g
+                    pixel[2] = b
             return True
         return True  # aguarda próximo frame
+
+    def next_frame_into(self, frame):
+        """
+        Aplica o overlay diretamente num frame RGB empacotado (bytearray),
+        só na janela pos..pos+overlay_len. O último frame lido é reaplicado
+        enquanto não chega o próximo, porque o frame de destino é
+        restaurado a partir da base em cada passagem.
+        """
+        if self.done:
+            return False
+        now = time.monotonic()
+        if self.last_time == 0 or now - self.last_time >= self.frame_delay:
+            self.last_time = now
+            count = self.file.readinto(self.buf)
+            if not count or count < self.frame_size:
+                self.file.close()
+                self.done = True
+                return False
+        buf = self.buf
+        num_pixels = len(frame) // 3
+        first = max(0, -self.pos)
+        last = min(self.overlay_len, num_pixels - self.pos)
+        for i in range(first, last):
+            k = i * 3
+            r = buf[k]
+            g = buf[k + 1]
+            b = buf[k + 2]
+            if r == 0 and g == 0 and b == 0:
+                # transparente, mantém a base
+                continue
+            j = (self.pos + i) * 3
+            if r == g == b and r != 255:
+                # cinza = blend da base para branco, só com inteiros
+                a = ALPHA[r]
+                w = 255 * a
+                na = 256 - a
+                frame[j] = (w + na * frame[j]) >> 8
+                frame[j + 1] = (w + na * frame[j + 1]) >> 8
+                frame[j + 2] = (w + na * frame[j + 2]) >> 8
+            else:
+                frame[j] = r
+                frame[j + 1] = g
+                frame[j + 2] = b
+        return True
+
+
+# Overlay esparso (.ovl), gerado no PC por tools/mfx2ovl.py a partir dos .bin
+# de /mfx. Cabeçalho: "OVL", versão, overlay_len, nº de frames, tamanho do
+# maior frame e tamanho do primeiro. Cada frame é uma lista de spans
+# (início u16, n u8 com o bit 7 a indicar RGB) com os dados a seguir: n bytes
+# de alpha (cinza, blend para branco) ou n*3 bytes RGB. Os pixels pretos
+# (transparentes) não são guardados. Os dois últimos bytes de cada frame são
+# o tamanho do frame seguinte (0 no último), para ler cada frame numa só
+# leitura.
+OVL_MAGIC = b"OVL"
+OVL_VERSION = 1
+OVL_HEADER = "<3sBHHHH"
+OVL_HEADER_SIZE = struct.calcsize(OVL_HEADER)
+OVL_RGB = 0x80
+OVL_MAX_RUN = 0x7F
+
+
+class SparseOverlay:
+    """
+    Mesma interface que BinOverlay (caminho next_frame_into do Compositor),
+    mas lê só os spans opacos de cada frame e o custo por frame é
+    proporcional aos pixels opacos.
+    """
+    def __init__(self, filename, overlay_len=None, pos=0, frame_delay=0.025):
+        self.filename = filename
+        self.pos = pos
+        self.frame_delay = frame_delay
+        self.file = open(filename, "rb")
+        header = self.file.read(OVL_HEADER_SIZE)
+        if len(header) < OVL_HEADER_SIZE:
+            self.file.close()
+            raise ValueError("overlay truncado: " + filename)
+        magic, version, length, frames, max_size, first_size = struct.unpack(OVL_HEADER, header)
+        if magic != OVL_MAGIC or version != OVL_VERSION:
+            self.file.close()
+            raise ValueError("não é um overlay .ovl v%d: %s" % (OVL_VERSION, filename))
+        if overlay_len is not None and overlay_len != length:
+            self.file.close()
+            raise ValueError("%s tem %d pixels, esperado %d" % (filename, length, overlay_len))
+        self.overlay_len = length
+        self.frames = frames
+        self.buf = bytearray(max_size)
+        self._mv = memoryview(self.buf)
+        self._first = first_size
+        self._views = self._slice_views()
+        self._next = first_size
+        self._size = 0
+        self.last_time = 0
+        self.done = False
+
+    def _slice_views(self):
+        # Uma memoryview por tamanho de frame, criadas aqui numa passagem
+        # pelos tamanhos encadeados: _read_frame não aloca nada por frame
+        views = {}
+        tail = bytearray(2)
+        offset = OVL_HEADER_SIZE
+        size = self._first
+        for _ in range(self.frames):
+            if not size:
+                break
+            if size not in views:
+                views[size] = self._mv[:size]
+            offset += size
+            self.file.seek(offset - 2)
+            if self.file.readinto(tail) < 2:
+                break
+            size = tail[0] | (tail[1] << 8)
+        self.file.seek(OVL_HEADER_SIZE)
+        return views
+
+    def reset(self):
+        try:
+            if self.file.closed:
+                self.file = open(self.filename, "rb")
+            self.file.seek(OVL_HEADER_SIZE)
+        except Exception:
+            self.file = open(self.filename, "rb")
+            self.file.seek(OVL_HEADER_SIZE)
+        self._next = self._first
+        self._size = 0
+        self.done = False
+        self.last_time = 0
+
+    def is_done(self):
+        return self.done
+
+    def _read_frame(self):
+        size = self._next
+        view = self._views.get(size)
+        if view is None or self.file.readinto(view) < size:
+            self.file.close()
+            self.done = True
+            return False
+        buf = self.buf
+        self._next = buf[size - 2] | (buf[size - 1] << 8)
+        self._size = size
+        return True
+
+    def next_frame_into(self, frame):
+        """
+        Aplica os spans do frame atual em frame (bytearray RGB). Tal como no
+        BinOverlay, o último frame é reaplicado até chegar a hora do próximo.
+        """
+        if self.done:
+            return False
+        now = time.monotonic()
+        if self.last_time == 0 or now - self.last_time >= self.frame_delay:
+            self.last_time = now
+            if not self._read_frame():
+                return False
+        buf = self.buf
+        end = self._size - 2
+        pos = self.pos
+        num_pixels = len(frame) // 3
+        k = 0
+        while k < end:
+            p = pos + (buf[k] | (buf[k + 1] << 8))
+            n = buf[k + 2]
+            k += 3
+            rgb = n & OVL_RGB
+            n &= OVL_MAX_RUN
+            lo = -p if p < 0 else 0
+            hi = num_pixels - p if p + n > num_pixels else n
+            j = (p + lo) * 3
+            if rgb:
+                for i in range(k + lo * 3, k + hi * 3):
+                    frame[j] = buf[i]
+                    j += 1
+                k += n * 3
+                continue
+            for i in range(k + lo, k + hi):
+                a = buf[i]
+                if a == 255:
+                    frame[j] = 255
+                    frame[j + 1] = 255
+                    frame[j + 2] = 255
+                elif a:
+                    # cinza = blend da base para branco (como no BinOverlay)
+                    a = ALPHA[a]
+                    w = 255 * a
+                    na = 256 - a
+                    frame[j] = (w + na * frame[j]) >> 8
+                    frame[j + 1] = (w + na * frame[j + 1]) >> 8
+                    frame[j + 2] = (w + na * frame[j + 2]) >> 8
+                j += 3
+            k += n
+        return True
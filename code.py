@@ -5,19 +5,15 @@ import microcontroller
 
 microcontroller.cpu.frequency = 250_000_000  # run at 250 MHz instead of 125 MHz
 import time
+BOOT_START = time.monotonic()  # início do code.py (segundos desde o arranque da placa)
 import os
 import random
 import board
 import pwmio
-import audiocore
 import audiobusio
 from adafruit_debouncer import Button
 from digitalio import DigitalInOut, Direction, Pull
 import neopixel
-from adafruit_led_animation.animation.rainbow import Rainbow
-from adafruit_led_animation.animation.pulse import Pulse
-from adafruit_led_animation.animation.chase import Chase
-from adafruit_led_animation.animation.sparkle import Sparkle
 from adafruit_led_animation.color import (
     RED,
     ORANGE,
@@ -25,7 +21,6 @@ from adafruit_led_animation.color import (
     AQUA,
     JADE,
     MAGENTA,
-    PINK,
     TEAL,
     GOLD,
     BLACK,
@@ -36,33 +31,50 @@ from adafruit_led_animation.color import (
     PURPLE,
     WHITE,
 )
-import json
 import adafruit_lis3dh
+from motion import Motion
+from smooth_swing import SmoothSwing
 import analogio
 from settings_menu import settings_menu
+from user_settings import SettingsStore
 import simpleio
-from adafruit_led_animation import helper
 from adafruit_led_animation.helper import PixelSubset
-from ignition import ignition_explosion,ignition_scan,ignition_reverse_scan_with_photons
+from ignition import ignition_explosion,ignition_scan,ignition_reverse_scan_with_photons, BLIP_WAV, EXPL_WAV
 import audiomixer
-from adafruit_waveform import sine
-import math
-import array
-from bin_animation import BinAnimation, BinOverlay
+from bin_animation import BinAnimation, BinOverlay, SparseOverlay
+from compositor import Compositor
+from idle_player import IdlePlayer
+from color import blend, weight
+from media_clock import MediaClock
+from pack_registry import PackRegistry
+from audio_bank import AudioBank
+from scheduler import Scheduler, LatchedButton
+from profiler import Profiler
 import supervisor
 
+# Diagnóstico no arranque (lista de pinos, validação dos packs): DIAG = 1
+# no settings.toml. Sem ele o arranque vai direto ao loop principal.
+DIAG = bool(os.getenv("DIAG"))
+# Perfil do loop (profiler.py): PROFILE = 1 no settings.toml. Histogramas
+# por modo e span; dump com "p" na consola série ou 4 cliques com a lâmina
+# desligada. Desligado não custa nada que se note.
+profiler = Profiler(bool(os.getenv("PROFILE")))
+# Tempo máximo (s) desde o arranque da placa até o sabre aceitar ignição
+BOOT_BUDGET = 2.0
+
 # Verifica status USB e ajusta comportamento
 if supervisor.runtime.usb_connected:
     print("USB conectado - usando configurações de alto desempenho")
-print(board.board_id)
-print("CPU speed:", microcontroller.cpu.frequency)
-for pin in dir(microcontroller.pin):
-    if isinstance(getattr(microcontroller.pin, pin), microcontroller.Pin):
-        print("".join(("microcontroller.pin.", pin, "\t")), end=" ")
-        for alias in dir(board):
-            if getattr(board, alias) is getattr(microcontroller.pin, pin):
-                print("".join(("", "board.", alias)), end=" ")
-    print()
+if DIAG:
+    print(board.board_id)
+    print("CPU speed:", microcontroller.cpu.frequency)
+    for pin in dir(microcontroller.pin):
+        if isinstance(getattr(microcontroller.pin, pin), microcontroller.Pin):
+            print("".join(("microcontroller.pin.", pin, "\t")), end=" ")
+            for alias in dir(board):
+                if getattr(board, alias) is getattr(microcontroller.pin, pin):
+                    print("".join(("", "board.", alias)), end=" ")
+        print()
 # CUSTOMIZE SENSITIVITY HERE: smaller numbers = more sensitive to motion
 HIT_THRESHOLD = 120
 SWING_THRESHOLD = 130
@@ -84,27 +96,15 @@ COLORS = [
     WHITE,
 ]
 
-# Carregar configurações do usuário no início
-default_settings = {
-    "COR": 3,  # AQUA
-    "Brilho": 2,  # Max
-    "Volume": 2,  # Med
-    "Swing": 1,  # Med
-    "Clash": 1,  # Med
-    "Anim": 0,  # On
-}
-try:
-    with open("/settings.json", "r") as f:
-        user_settings = json.load(f)
-except Exception as e:
-    print("Settings padrão carregado:", e)
-    user_settings = default_settings
-SABER_COLOR = user_settings.get("COR", default_settings["COR"])
-BRILHO_IDX = user_settings.get("Brilho", default_settings["Brilho"])
-VOLUME_IDX = user_settings.get("Volume", default_settings["Volume"])
-SWING_IDX = user_settings.get("Swing", default_settings["Swing"])
-CLASH_IDX = user_settings.get("Clash", default_settings["Clash"])
-ANIM_IDX = user_settings.get("Anim", default_settings["Anim"])
+# Carregar configurações do usuário no início (registo na NVM; o
+# settings.json só é lido se a NVM ainda não tiver um registo válido)
+settings = SettingsStore("/settings.json")
+SABER_COLOR = settings.get("COR")
+BRILHO_IDX = settings.get("Brilho")
+VOLUME_IDX = settings.get("Volume")
+SWING_IDX = settings.get("Swing")
+CLASH_IDX = settings.get("Clash")
+ANIM_IDX = settings.get("Anim")
 
 # Definições dos valores possíveis (igual ao menu)
 BRILHOS = [0.1, 0.4, 0.8]  # 0.1 = low, 0.4 = med, 0.8 = high
@@ -127,36 +127,61 @@ external_power = DigitalInOut(board.EXTERNAL_POWER)
 external_power.direction = Direction.OUTPUT
 external_power.value = True
 
-wavs = []
-for filename in os.listdir("/sounds"):
-    if filename.lower().endswith(".wav") and not filename.startswith("."):
-        wavs.append("/sounds/" + filename)
-wavs.sort()
-print(wavs)
-print(len(wavs))
+# Sons por nome lógico (grupos escolhem um ficheiro ao acaso em cada play)
+SOUND_FILES = {
+    "on": "/sounds/0_on.wav",
+    "idle": "/sounds/1_idle.wav",
+    "off": "/sounds/2_off.wav",
+    "blast": ["/sounds/blst0%d.wav" % i for i in range(1, 5)],
+    "clash": ["/sounds/clash%d.wav" % i for i in range(1, 9)],
+    "lockup": "/sounds/lock01.wav",
+    "swing": ["/sounds/swing%d.wav" % i for i in range(1, 9)],
+    "force": "/sounds/z_force.wav",
+    "low_battery": "/sounds/z_fraca.wav",
+    "blip": "/sounds/z_grave.wav",
+    "vader": "/sounds/z_vader.wav",
+}
+# Smooth swing: pares de loops (vozes 2 e 3) com o level a seguir o movimento.
+# Uma font smoothswing traz pares swingl/swingh; sem eles usam-se os swings
+# normais aos pares. SMOOTH_SWING = False volta ao swing one-shot na voz 1.
+SMOOTH_SWING = True
+SMOOTH_SWING_PAIRS = [("/sounds/swing%d.wav" % i, "/sounds/swing%d.wav" % (i + 1)) for i in (1, 3, 5, 7)]
 
 audio = audiobusio.I2SOut(board.I2S_BIT_CLOCK, board.I2S_WORD_SELECT, board.I2S_DATA)
 mixer = audiomixer.Mixer(
-    voice_count=2,  # <-- agora com 2 vozes!
+    voice_count=4,  # 0 hum, 1 efeitos, 2-3 smooth swing
     sample_rate=22050,
     channel_count=1,
     bits_per_sample=16,
     samples_signed=True,
 )
+audio.play(mixer)
+sounds = AudioBank(mixer, SOUND_FILES)
+# Só o conjunto quente fica aberto desde o arranque: o hum na voz 0 e o
+# clash na voz 1 (e o swing one-shot sem smooth swing). O resto passa pela
+# LRU do AudioBank
+sounds.preload(("idle",), voice=0)
+sounds.preload(("clash",) if SMOOTH_SWING else ("swing", "clash"), voice=1)
+smooth_swing = SmoothSwing(mixer, sounds, SMOOTH_SWING_PAIRS if SMOOTH_SWING else ())
 
 
-def play_wav(num, loop=False, channel=0):
-    try:
-        print(f"Tocando wav {num} no canal {channel}, loop={loop}")
-        n = wavs[num]
-        wave_file = open(n, "rb")
-        wave = audiocore.WaveFile(wave_file)
+# Agendador cooperativo: durante as esperas o botão continua a ser lido e o
+# CPU dorme em vez de ficar num "while ...: pass"
+scheduler = Scheduler()
+
+
+def wait_voice(channel):
+    # Espera o som da voz terminar; um clique interrompe a espera e fica
+    # guardado para o loop principal tratar
+    voice = mixer.voice[channel]
+    scheduler.wait_while(lambda: voice.playing and not switch.pressed)
+
+
+def play_sound(name, loop=False, channel=0):
+    print(f"Tocando {name} no canal {channel}, loop={loop}")
+    if not audio.playing:
         audio.play(mixer)
-        mixer.voice[channel].play(wave, loop=loop)
-        mixer.voice[channel].level = volume
-    except Exception as e:
-        print("Erro ao tocar wav:", e)
-        return
+    sounds.play(name, voice=channel, loop=loop, level=volume)
 
 
 
@@ -167,41 +192,62 @@ pin.pull = Pull.UP
 pin2 = DigitalInOut(board.D13)
 pin2.direction = Direction.INPUT
 pin2.pull = Pull.UP
-switch = Button(pin, long_duration_ms=1000)
+# LatchedButton guarda os cliques feitos enquanto o loop espera no agendador
+switch = LatchedButton(Button(pin, long_duration_ms=1000))
 switch_state = False
+scheduler.add("button", switch.poll, 0.005)
+if profiler.enabled:
+    scheduler.add("profiler", profiler.poll_serial, 0.25)
 
 # external neopixels
-num_pixels = 80
-pixels = neopixel.NeoPixel(board.EXTERNAL_NEOPIXELS, num_pixels, auto_write=True)
+# Comprimento da lâmina: NUM_PIXELS no settings.toml (80 por omissão). Os
+# packs com variantes servem os .bin deste comprimento (ver pack_registry.py)
+num_pixels = int(os.getenv("NUM_PIXELS") or 80)
+pixels = neopixel.NeoPixel(board.EXTERNAL_NEOPIXELS, num_pixels, auto_write=False)
 pixels.brightness = 0.8
 
 center_start = num_pixels // 2 - 5
 center_end = num_pixels // 2 + 5
-center_pixels = PixelSubset(pixels, center_start, center_end)
-clash_pulse = Pulse(center_pixels, speed=0.01, color=WHITE, period=0.5)
-clash_sparkle = Sparkle(center_pixels, speed=0.05, color=WHITE, num_sparkles=4)
-rainbow = Rainbow(pixels, speed=0.05, period=2)
-pulse = Pulse(pixels, speed=0.01, color=COLORS[SABER_COLOR], period=0.01)
-chase = Chase(pixels, speed=0.01, color=COLORS[SABER_COLOR], size=3, spacing=1)
+
+# Animações do adafruit_led_animation: a classe só é importada e a animação
+# criada na primeira utilização (os packs com .bin não precisam delas)
+_animations = {}
+
+def animation(name):
+    anim = _animations.get(name)
+    if anim is None:
+        if name == "chase":
+            from adafruit_led_animation.animation.chase import Chase
+            anim = Chase(pixels, speed=0.01, color=COLORS[SABER_COLOR], size=3, spacing=1)
+        elif name == "pulse":
+            from adafruit_led_animation.animation.pulse import Pulse
+            anim = Pulse(pixels, speed=0.01, color=COLORS[SABER_COLOR], period=0.01)
+        elif name == "rainbow":
+            from adafruit_led_animation.animation.rainbow import Rainbow
+            anim = Rainbow(pixels, speed=0.05, period=2)
+        elif name == "clash_pulse":
+            from adafruit_led_animation.animation.pulse import Pulse
+            anim = Pulse(PixelSubset(pixels, center_start, center_end), speed=0.01, color=WHITE, period=0.5)
+        elif name == "clash_sparkle":
+            from adafruit_led_animation.animation.sparkle import Sparkle
+            anim = Sparkle(PixelSubset(pixels, center_start, center_end), speed=0.05, color=WHITE, num_sparkles=4)
+        else:
+            raise ValueError("Animação desconhecida: " + name)
+        _animations[name] = anim
+    return anim
 
 qw = 0  # contador para forçar atualização do display
 
 
 use_sparkle = False  # Se True, usa Sparkle; senão, Pulse
-def load_pack_data(pack_name):
-    try:
-        with open(f"/gfx/{pack_name}/pack.json", "r") as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Erro ao carregar pack {pack_name}: {e}")
-        # Fallback para packs clássicos: retorna estrutura vazia
-        return {
-            "leds": {},
-            "preon": {},
-            "poweron": {},
-            "poweroff": {},
-            "pstoff": {}
-        }
+# Registo de packs: cada pack.json é lido e validado uma vez e fica em cache
+packs = PackRegistry("/gfx", num_pixels=num_pixels)
+
+
+def check_packs():
+    # Packs alterados por USB: fecha os WAV que o AudioBank tem abertos deles
+    for name in packs.check_for_changes():
+        sounds.close(f"{packs.base_path}/{name}/")
 
 
 # onboard LIS3DH
@@ -210,7 +256,8 @@ int1 = DigitalInOut(board.ACCELEROMETER_INTERRUPT)
 lis3dh = adafruit_lis3dh.LIS3DH_I2C(i2c, int1=int1)
 # Accelerometer Range (can be 2_G, 4_G, 8_G, 16_G)
 lis3dh.range = adafruit_lis3dh.RANGE_4_G
-lis3dh.set_tap(1, HIT_THRESHOLD)
+# FIFO + INT1: clash pelo clique do LIS3DH, swing pelas amostras do FIFO
+motion = Motion(lis3dh, int1, SWING_THRESHOLD, HIT_THRESHOLD)
 
 red_led = pwmio.PWMOut(board.D10)
 green_led = pwmio.PWMOut(board.D11)
@@ -248,12 +295,9 @@ force = True
 # lerp_color((255, 0, 0), (0, 0, 255), -0.5) retorna (127, 0, 127)
 # lerp_color((255, 0, 0), (0, 0, 255), 1.5) retorna (127, 0, 127)
 # Isso pode ser útil para criar efeitos de transição suaves entre cores
+# (vírgula fixa, ver color.py: t vira um peso inteiro uma vez por chamada)
 def lerp_color(color1, color2, t):
-    return (
-        int(color1[0] + (color2[0] - color1[0]) * t),
-        int(color1[1] + (color2[1] - color1[1]) * t),
-        int(color1[2] + (color2[2] - color1[2]) * t),
-    )
+    return blend(color1, color2, weight(t))
 
 # Função auxiliar para posição aleatória do overlay
 def overlay_random_pos(num_pixels, overlay_len):
@@ -268,6 +312,13 @@ def overlay_center_pos(num_pixels, overlay_len):
 # Define the path to the MFX (effects) binaries
 MFX_PATH = "/mfx"  # Adjust this path as needed for your project
 
+# Overlay de /mfx: usa o .ovl esparso (tools/mfx2ovl.py) se existir, senão o .bin
+def open_overlay(name, overlay_len, pos, frame_delay):
+    try:
+        return SparseOverlay(f"{MFX_PATH}/{name}.ovl", overlay_len, pos, frame_delay)
+    except (OSError, ValueError):
+        return BinOverlay(f"{MFX_PATH}/{name}.bin", overlay_len, pos, (1,1,1), (0,0,0), frame_delay)
+
 
 # Verifica se o arquivo de configurações existe, se não, cria com os valores padrão
 print("Settings carregados:")
@@ -291,48 +342,16 @@ print("VBat voltage: {:.2f}".format(battery_voltage))
 print("VBat voltage 2: {:.2f}".format(battery_voltage2))
 
 
-# Packs disponíveis (subpastas em /gfx + clássicos)
-gfx_effects = set(["explosion", "scan", "reverse_scan_with_photons"])
-gfx_base_path = "/gfx"
-for entry in os.listdir(gfx_base_path):
-    full_path = gfx_base_path + "/" + entry
-    if os.stat(full_path)[0] & 0x4000:
-        gfx_effects.add(entry)
-gfx_effects = sorted(gfx_effects)
+# Packs disponíveis (subpastas em /gfx + clássicos), do /gfx/index.json
+# se existir (tools/index_packs.py); sem índice lista a pasta
+gfx_effects = sorted(set(["explosion", "scan", "reverse_scan_with_photons"]) | set(packs.names()))
 print("Efeitos gfx encontrados:", gfx_effects)
-for pack in gfx_effects:
-    json_path = f"/gfx/{pack}/pack.json"
-    def exists(path):
-        try:
-            os.stat(path)
-            return True
-        except OSError:
-            return False
-    print(f"[DEBUG] Pack: {pack}")
-    if exists(json_path):
-        print(f"  pack.json: OK")
-        try:
-            with open(json_path, "r") as f:
-                data = json.load(f)
-            print(f"  JSON válido!")
-            for key, val in data.items():
-                if isinstance(val, dict):
-                    for subkey in ["bin", "wav"]:
-                        if subkey in val:
-                            fpath = f"/gfx/{pack}/{val[subkey]}"
-                            print(f"    {key}.{subkey}: {'OK' if exists(fpath) else 'NÃO ENCONTRADO'}")
-                # Se for lista de animações (não usado no seu caso atual)
-                elif isinstance(val, list):
-                    for idx, anim in enumerate(val):
-                        for subkey in ["bin", "wav"]:
-                            if subkey in anim:
-                                fpath = f"/gfx/{pack}/{anim[subkey]}"
-                                print(f"    {key}[{idx}].{subkey}: {'OK' if exists(fpath) else 'NÃO ENCONTRADO'}")
-        except Exception as e:
-            print(f"  Erro ao ler JSON: {e}")
-    else:
-        print(f"  pack.json: NÃO ENCONTRADO")
+if DIAG:
+    from pack_registry import build_index, describe_index
+    for line in describe_index(build_index("/gfx")):
+        print(line)
 gfx_pack = "scan"  # ou outro pack padrão
+gfx_pack_idx = gfx_effects.index(gfx_pack)  # troca de pack sem procurar na lista
 
 # Exemplo: ignition_mode == 3 usa o efeito 'nuke'
 # Você pode associar cada ignition_mode a um efeito, ou permitir seleção dinâmica
@@ -352,33 +371,146 @@ LOW_BATTERY_LIMIT = 3.4  # ajuste conforme necessário
 
 last_mode = None
 current_animation = None
-current_led_animations = []
-led_anim_index = 0
-pack_trocado = False
 current_pack_data = None
 current_leds = None
 current_gfx_pack = None
 
-def pack_json_exists(pack):
-    try:
-        os.stat(f"/gfx/{pack}/pack.json")
-        return True
-    except OSError:
-        return False
 usb = 0
 usb_connected = False
 # Inicialização dos buffers RAM
-base_buffer = [(0, 0, 0)] * num_pixels
-overlay_buffer = [(0, 0, 0)] * num_pixels
-
-# Utilitário para compor overlay sobre base_buffer
-def compose_buffers(base, overlay, out):
-    for i in range(len(base)):
-        # overlay preto = transparente
-        if overlay[i] == (0, 0, 0):
-            out[i] = base[i]
+# base_frame: frame RGB empacotado (3 bytes por pixel), vai direto para
+# pixels[:] sem criar uma tupla por pixel a cada frame
+base_frame = bytearray(num_pixels * 3)
+BLACK_FRAME = bytes(num_pixels * 3)
+# Compositor: overlay (clash/blast/lockup) por cima de base_frame, sem
+# alocar listas por frame
+compositor = Compositor(num_pixels, base_frame)
+
+# Segmentos com .wav e .bin: os frames seguem o áudio (media_clock.py).
+# SYNC_TOLERANCE: frames de atraso antes de saltar frames; AUDIO_LATENCY:
+# segundos entre play() e o som sair. Com DIAG imprime o desvio medido.
+SYNC_TOLERANCE = 2
+AUDIO_LATENCY = 0.0
+# Animações sem áudio (idle, poweroff3): salta frames quando o loop não
+# acompanha o frame_time, em vez de andar em câmara lenta
+ADAPTIVE_SKIP = True
+# Idle do modo 1 (idle_player.py): um só BinAnimation em loop, aberto ao
+# ligar e fechado ao desligar. IDLE_CROSSFADE: frames de crossfade entre o
+# fim e o início de cada volta (0 = corte seco)
+IDLE_CROSSFADE = 0
+idle = IdlePlayer(num_pixels, IDLE_CROSSFADE, adaptive=ADAPTIVE_SKIP)
+
+def play_segment(segment, fallback_sound=None):
+    """
+    Toca o wav do segmento (ou fallback_sound) e mostra o .bin preso ao áudio.
+    Ignições pré-renderizadas: a camada de branco vai por cima de cada frame
+    e os cues ("blip"/"expl") tocam na voz 1 quando chega o frame de cada um,
+    em vez do fallback_sound.
+    """
+    cues = segment.cues
+    if segment.wav:
+        sounds.play_file(segment.wav, voice=1, loop=False)
+    elif fallback_sound and not cues:
+        play_sound(fallback_sound, loop=False, channel=1)
+    clock = MediaClock(segment.frame_time, SYNC_TOLERANCE, AUDIO_LATENCY)
+    clock.start()
+    anim = BinAnimation(
+        segment.bin,
+        num_pixels,
+        rgb_to_tint(COLORS[int(SABER_COLOR)]) if segment.tinting else (1, 1, 1),
+        segment.frame_time,
+        0,
+        clock=clock
+    )
+    if segment.brightness is not None:
+        anim.brightness = segment.brightness
+    white = BinOverlay(segment.white, num_pixels, 0, frame_delay=0) if segment.white else None
+    cue = 0
+    while not anim.is_done():
+        pt = profiler.mark()
+        anim.next_frame_into(base_frame)
+        pt = profiler.lap("decode", pt)
+        if anim.new_frame:
+            if white:
+                # mesmo índice que a base (o clock do áudio pode saltar frames)
+                white.seek(anim.frame)
+                white.next_frame_into(base_frame)
+                pt = profiler.lap("compose", pt)
+            if cue < len(cues) and anim.frame >= cues[cue][0]:
+                # frames saltados: só o último cue que já passou toca
+                while cue < len(cues) and anim.frame >= cues[cue][0]:
+                    cue += 1
+                name = cues[cue - 1][1]
+                sounds.play_file(BLIP_WAV if name == "blip" else EXPL_WAV, voice=1, loop=False, level=volume)
+            pixels[:] = base_frame
+            pixels.show()
+            pt = profiler.lap("show", pt)
+        # cliques ficam guardados no LatchedButton para o loop principal
+        scheduler.tick()
+        profiler.lap("tasks", pt)
+    if DIAG:
+        print(clock.report(segment.bin, segment.frames, segment.wav))
+        print("Read-ahead: {} frames por leitura, {} leituras, {:.0f}% dos frames sem ler o ficheiro".format(
+            anim.chunk, anim.reads, anim.hit_ratio * 100))
+    if white:
+        white.file.close()
+    return anim
+
+def poll_motion():
+    pt = profiler.mark()
+    motion.poll()
+    profiler.lap("sensor", pt)
+
+
+def render_idle():
+    # Tarefa "render" (só no modo 1): um frame do idle do pack, ou chase/cor fixa
+    pt = profiler.mark()
+    if use_anim:
+        if idle.active:
+            idle.next_frame_into(base_frame)
+            if DIAG and idle.wrapped and idle.pass_dropped:
+                print("Idle: volta {}, {} frames saltados, custo {:.1f} ms/frame".format(
+                    idle.anim.loops, idle.pass_dropped, idle.anim.cost * 1000))
+            pt = profiler.lap("decode", pt)
+            pixels[:] = base_frame
+            pixels.show()
+            pt = profiler.lap("show", pt)
         else:
-            out[i] = overlay[i]
+            chase = animation("chase")
+            chase.color = COLORS[SABER_COLOR]
+            chase.animate()
+    else:
+        pixels.fill(COLORS[SABER_COLOR])
+        pixels.show()
+    profiler.lap("render", pt)  # chase/cor fixa (sem .bin)
+
+
+def idle_audio():
+    # Tarefa "audio" (só no modo 1): o hum volta a tocar se parou e os
+    # levels do smooth swing seguem o movimento (no máximo a cada 20 ms)
+    pt = profiler.mark()
+    if not mixer.voice[0].playing and not mixer.voice[1].playing:
+        if use_anim and current_leds and current_leds.wav:
+            sounds.play_file(current_leds.wav, voice=0, loop=True)
+        else:
+            sounds.play("idle", voice=0, loop=True)
+    smooth_swing.update(motion.intensity)
+    profiler.lap("audio", pt)
+
+
+# O loop principal corre o agendador uma vez por volta, e play_segment, as
+# ignições procedurais e os efeitos a cada frame: o acelerómetro e a consola
+# série (profiler) são lidos com a lâmina ligada. Render e áudio do idle só
+# estão ativos no modo 1
+motion_task = scheduler.add("motion", poll_motion)
+idle_tasks = (scheduler.add("render", render_idle), scheduler.add("audio", idle_audio))
+for task in idle_tasks + (motion_task,):
+    task.enabled = False  # arranca desligada (modo 4)
+
+boot_ready = time.monotonic()
+print("Pronto: {:.2f} s desde o arranque ({:.2f} s no code.py)".format(boot_ready, boot_ready - BOOT_START))
+if boot_ready > BOOT_BUDGET:
+    print("Aviso: arranque acima do orçamento de {:.1f} s".format(BOOT_BUDGET))
 
 while True:
 #    battery_voltage2 = get_voltage(vbat_voltage2)
@@ -399,15 +531,12 @@ while True:
 #        print("VBat voltage A1: {:.2f}".format(battery_voltage))
 #        battery_voltage_old = battery_voltage  # Atualiza o valor antigo
 #        qw = 0
-    chase.color = COLORS[SABER_COLOR]
+    profiler.mode = mode
+    loop_start = pt = profiler.mark()
     switch.update()
 
     pixels.brightness = BRILHOS[BRILHO_IDX]
-
-    
-    x, y, z = lis3dh.acceleration
-    # Atualiza histórico de X e Z
-    accel_total = x * x + z * z
+    pt = profiler.lap("button", pt)
     
     # startup
 
@@ -416,211 +545,88 @@ while True:
         mixer.voice[0].level = volume
         print("Ignition pack:", gfx_pack)
         if use_anim:
-            if gfx_pack == "explosion":
-                ignition_explosion(pixels, COLORS[SABER_COLOR], mixer=mixer, volume=volume)
+            pack_data = packs.get(gfx_pack)
+            # Ignições pré-renderizadas (tools/bake_ignitions.py) tocam como
+            # qualquer pack; sem poweron.bin cai no efeito procedural
+            baked = pack_data.poweron and pack_data.poweron.bin
+            if gfx_pack == "explosion" and not baked:
+                ignition_explosion(pixels, COLORS[SABER_COLOR], mixer=mixer, volume=volume, sounds=sounds, tick=scheduler.tick)
                 # Aguarda o som de ignição terminar antes de prosseguir
-                while mixer.voice[1].playing:
-                    pass
-            elif gfx_pack == "scan":
-                ignition_scan(pixels, COLORS[SABER_COLOR], mixer=mixer, volume=volume)
+                wait_voice(1)
+            elif gfx_pack == "scan" and not baked:
+                ignition_scan(pixels, COLORS[SABER_COLOR], mixer=mixer, volume=volume, sounds=sounds, tick=scheduler.tick)
                 # Aguarda o som de ignição terminar antes de prosseguir
-                while mixer.voice[1].playing:
-                    pass
-            elif gfx_pack == "reverse_scan_with_photons":
-                ignition_reverse_scan_with_photons(pixels, COLORS[SABER_COLOR], mixer=mixer, volume=volume)
+                wait_voice(1)
+            elif gfx_pack == "reverse_scan_with_photons" and not baked:
+                ignition_reverse_scan_with_photons(pixels, COLORS[SABER_COLOR], mixer=mixer, volume=volume, sounds=sounds, tick=scheduler.tick)
                 # Aguarda o som de ignição terminar antes de prosseguir
-                while mixer.voice[1].playing:
-                    pass
+                wait_voice(1)
             else:
-                pack_data = load_pack_data(gfx_pack)
-                preon = pack_data.get("preon")
-                poweron = pack_data.get("poweron")
-                if preon:
-                    frame_time = preon.get("frame_time", 25) / 1000
-                    wav_file = preon.get("wav", "")
-                    tinting = preon.get("tinting", True)
-                    if wav_file:
-                        mixer.voice[1].play(audiocore.WaveFile(open(f"/gfx/{gfx_pack}/{wav_file}", "rb")), loop=False)
-                    current_animation = BinAnimation(
-                        f"/gfx/{gfx_pack}/{preon['bin']}",
-                        num_pixels,
-                        rgb_to_tint(COLORS[int(SABER_COLOR)]) if tinting else (1, 1, 1),
-                        frame_time,
-                        0
-                    )
-                    while not current_animation.is_done():
-                        current_animation.next_frame_to_buffer(base_buffer)
-                        # Opcional: envie para os LEDs se quiser mostrar durante poweron
-                        pixels[:] = base_buffer
-                        pixels.show()
-                        switch.update()
-                if poweron:
-                    frame_time = poweron.get("frame_time", 25) / 1000
-                    wav_file = poweron.get("wav", "")
-                    tinting = poweron.get("tinting", True)
-                    if wav_file:
-                        mixer.voice[1].play(audiocore.WaveFile(open(f"/gfx/{gfx_pack}/{wav_file}", "rb")), loop=False)
+                # Segmento sem .bin (o pack não tem variante para este
+                # comprimento de lâmina, ver pack_registry): o wav do pack
+                # toca na mesma e o poweron cai no scan procedural, sem blips
+                preon = pack_data.preon
+                poweron = pack_data.poweron
+                if preon and preon.bin:
+                    current_animation = play_segment(preon)
+                elif preon:
+                    sounds.play_file(preon.wav, voice=1, loop=False)
+                    wait_voice(1)
+                if poweron and poweron.bin:
+                    current_animation = play_segment(poweron, "on")
+                    if poweron.wav and not poweron.cues:
+                        # o .bin segue o wav do segmento: acabou com ele
+                        mixer.stop_voice(1)
                     else:
-                        play_wav(0, loop=False, channel=1)
-
-                    current_animation = BinAnimation(
-                        f"/gfx/{gfx_pack}/{poweron['bin']}",
-                        num_pixels,
-                        rgb_to_tint(COLORS[int(SABER_COLOR)]) if tinting else (1, 1, 1),
-                        frame_time,
-                        0
-                    )
-                    while not current_animation.is_done():
-                        # Substitua next_frame() por next_frame_to_buffer(base_buffer)
-                        current_animation.next_frame_to_buffer(base_buffer)
-                        # Opcional: envie para os LEDs se quiser mostrar durante poweron
-                        pixels[:] = base_buffer
-                        pixels.show()
-                        switch.update()
-                    mixer.stop_voice(1)
-                elif preon and not poweron:
-                    ignition_scan(pixels, COLORS[SABER_COLOR], mixer=mixer, volume=volume)
-                elif not preon and poweron:
-                    pass
+                        # cues das ignições pré-renderizadas: o som vai até
+                        # ao fim, como no caminho procedural
+                        wait_voice(1)
+                elif poweron:
+                    sounds.play_file(poweron.wav, voice=1, loop=False)
+                    ignition_scan(pixels, COLORS[SABER_COLOR], tick=scheduler.tick)
+                    wait_voice(1)
                 else:
-                    ignition_scan(pixels, COLORS[SABER_COLOR], mixer=mixer, volume=volume)
+                    ignition_scan(pixels, COLORS[SABER_COLOR], mixer=mixer, volume=volume, sounds=sounds, tick=scheduler.tick)
         else:
-            play_wav(0, loop=False, channel=1)
-            for i in range(pixels):
+            play_sound("on", loop=False, channel=1)
+            for i in range(num_pixels):
                 pixels[i] = COLORS[SABER_COLOR]
                 pixels.show()
         # Aguarda o som de ignição terminar antes de tocar o idle
-        while mixer.voice[1].playing:
-            pass
+        wait_voice(1)
         # Antes de mudar para modo 1, toca o idle correto
-        pack_data = load_pack_data(gfx_pack)
-        leds = pack_data.get("leds")
+        leds = packs.get(gfx_pack).leds
         mixer.voice[0].stop()
-        if use_anim and leds and leds.get("wav"):
-            mixer.voice[0].play(audiocore.WaveFile(open(f"/gfx/{gfx_pack}/{leds['wav']}", "rb")), loop=True)
+        if use_anim and leds and leds.wav:
+            sounds.play_file(leds.wav, voice=0, loop=True)
         else:
-            play_wav(1, loop=True, channel=0)
+            play_sound("idle", loop=True, channel=0)
+        smooth_swing.start(volume)
+        # Descarta clash/swing detetados durante a ignição
+        motion.clear()
         mode = 1
     elif mode == 1:
-        # Garante que a animação idle nunca para
-        if use_anim and current_led_animations:
-            current_animation = current_led_animations[0]["anim"]
         if last_mode != 1 or gfx_pack != current_gfx_pack:
-            if pack_json_exists(gfx_pack):
-                try:
-                    current_pack_data = load_pack_data(gfx_pack)
-                except Exception:
-                    current_pack_data = None
-                current_leds = current_pack_data.get("leds") if current_pack_data else None
-            else:
-                current_pack_data = None
-                current_leds = None
+            # Só consulta o registo (em cache) ao entrar no modo ou trocar de
+            # pack. Depois de hit/blast/swing o idle continua onde estava.
+            current_pack_data = packs.get(gfx_pack)
+            current_leds = current_pack_data.leds
             current_gfx_pack = gfx_pack
-            # Só para idle anterior se necessário
-        else:
-            pack_data = load_pack_data(gfx_pack)
-            leds = pack_data.get("leds")
-        # Garante que a animação de LEDs é carregada sempre que necessário
-        if not mixer.voice[0].playing and not mixer.voice[1].playing:
-            #mixer.voice[0].stop()
-            if use_anim and current_leds and current_leds.get("wav"):
-                mixer.voice[0].play(audiocore.WaveFile(open(f"/gfx/{gfx_pack}/{current_leds['wav']}", "rb")), loop=True)
+            if use_anim and current_leds and current_leds.bin:
+                tint = rgb_to_tint(COLORS[int(SABER_COLOR)]) if current_leds.tinting else (1, 1, 1)
+                if idle.enter(current_leds, tint):
+                    # Limpa o buffer base para evitar frames residuais
+                    base_frame[:] = BLACK_FRAME
             else:
-                mixer.voice[0].play(audiocore.WaveFile(open(f"/sounds/1_idle.wav", "rb")), loop=True)
-        if use_anim:
-            if leds and (not current_led_animations or last_mode != 1 or pack_trocado):
-                # Limpa buffers/caches ao trocar de pack de animação
-                current_led_animations = []
-                led_anim_index = 0
-                # Limpa o buffer base para evitar frames residuais
-                for i in range(num_pixels):
-                    base_buffer[i] = (0, 0, 0)
-                # Só limpa os LEDs se já havia animação anterior
-                if len(current_led_animations) > 0:
-                    pixels.fill((0, 0, 0))
-                frame_time = leds.get("frame_time", 25) / 1000
-                bin_file = leds.get("bin")
-                wav_file = leds.get("wav", "")
-                # --- TINTING LOGIC ---
-                tinting = leds.get("tinting", True)
-                if bin_file:
-                    current_led_animations.append({
-                        "anim": BinAnimation(
-                            f"/gfx/{gfx_pack}/{bin_file}",
-                            num_pixels,
-                            rgb_to_tint(COLORS[int(SABER_COLOR)]) if tinting else (1, 1, 1),
-                            frame_time,
-                            0
-                        ),
-                        "wav": wav_file,
-                        "wav_played": False
-                    })
-            elif not leds and current_led_animations:
-                #mixer.voice[1].stop()
-                current_led_animations = []
-                led_anim_index = 0
-        # Só toca idle se não estiver tocando
-        if last_mode != 1:
-            led_anim_index = 0
-            if use_anim and leds:
-                frame_time = leds.get("frame_time", 25) / 1000
-                bin_file = leds.get("bin")
-                wav_file = leds.get("wav", "")
-                tinting = leds.get("tinting", True)
-                if bin_file:
-                    current_led_animations.append({
-                        "anim": BinAnimation(
-                            f"/gfx/{gfx_pack}/{bin_file}",
-                            num_pixels,
-                            rgb_to_tint(COLORS[int(SABER_COLOR)]) if tinting else (1, 1, 1),
-                            frame_time,
-                            0
-                        ),
-                        "wav": wav_file,
-                        "wav_played": False
-                    })
-                    # Garante limpeza do buffer interno da animação
-                    current_led_animations[-1]["anim"].reset()
-        if use_anim:
-            # Executa animação de LEDs se houver, senão faz chase e idle padrão
-            if current_led_animations:
-                led_anim = current_led_animations[0]
-                if led_anim["wav"] and not led_anim["wav_played"]:
-                    mixer.voice[0].play(audiocore.WaveFile(open(f"/gfx/{gfx_pack}/{led_anim['wav']}", "rb")), loop=True)
-                    led_anim["wav_played"] = True
-                # Substitua next_frame() por next_frame_to_buffer(base_buffer)
-                if not led_anim["anim"].next_frame_to_buffer(base_buffer) or current_animation is None:
-                    frame_time = leds.get("frame_time", 25) / 1000
-                    bin_file = leds.get("bin")
-                    tinting = leds.get("tinting", True)
-                    led_anim["anim"] = BinAnimation(
-                        f"/gfx/{gfx_pack}/{bin_file}",
-                        num_pixels,
-                        rgb_to_tint(COLORS[int(SABER_COLOR)]) if tinting else (1, 1, 1),
-                        frame_time,
-                        0
-                    )
-                
-                # Substitua next_frame() por next_frame_to_buffer(base_buffer)
-                if current_animation is None:
-                    current_animation = led_anim["anim"]
-                current_animation.next_frame_to_buffer(base_buffer)
-                # Opcional: envie para os LEDs se quiser mostrar durante poweron
-                pixels[:] = base_buffer
-                pixels.show()
-            else:
-                #mixer.voice[1].stop()  # Para qualquer som de animação anterior
-                chase.animate()
-        else:
-            pixels.fill(COLORS[SABER_COLOR])
-            pixels.show()
-        x, y, z = lis3dh.acceleration
-        accel_total = x * x + z * z
-
-        if lis3dh.tapped:
+                idle.exit()
+        leds = current_leds
+        # hum, render do idle e smooth swing correm nas tarefas "audio" e
+        # "render" do agendador, no fim da volta
+        pt = profiler.lap("state", pt)
+        if motion.take_clash():
             print("tapped")
             mode = "hit"
-        elif accel_total >= SWING_THRESHOLD:
+        elif motion.take_swing() and not smooth_swing.active:
             print("swing")
             mode = "swing"
         if switch.short_count == 1:
@@ -634,137 +640,122 @@ while True:
 
     # clash or move
     elif mode == "hit":
-        # Defina o nome do arquivo binário do efeito clash
-        CLASH_BIN = "hit.bin"
+        # Nome do overlay do efeito clash em /mfx (sem extensão)
+        CLASH_BIN = "hit"
         # Defina o comprimento do overlay clash (ajuste conforme necessário)
         CLASH_LEN = 80
 
         # Clash overlay centralizado
-        overlay = BinOverlay(
-            f"{MFX_PATH}/{CLASH_BIN}",   # filename como primeiro argumento posicional
-            CLASH_LEN,
-            overlay_center_pos(num_pixels, CLASH_LEN),
-            (1,1,1),
-            (0,0,0),
-            0.025
-        )
-        play_wav(random.randint(7, 14), loop=False, channel=1)
+        overlay = open_overlay(CLASH_BIN, CLASH_LEN, overlay_center_pos(num_pixels, CLASH_LEN), 0.025)
+        play_sound("clash", loop=False, channel=1)
+        smooth_swing.mute()
         # Verifica se há animação de LEDs base ativa (idle customizada)
-        if use_anim and current_led_animations and current_led_animations[0]["anim"]:
-            base_anim = current_led_animations[0]["anim"]
-        else:
-            base_anim = None
+        base_anim = idle if use_anim and idle.active else None
+        if not base_anim:
+            compositor.fill_base(COLORS[SABER_COLOR])
+        compositor.mark_base_changed()
         while not overlay.is_done():
+            pt = profiler.mark()
             if base_anim:
-                current_animation.next_frame_to_buffer(base_buffer)
-            elif use_anim:
-                chase.animate()
-            else:
-                pixels.fill(COLORS[SABER_COLOR])
-            for i in range(num_pixels):
-                overlay_buffer[i] = (0, 0, 0)
-            overlay.next_frame_to_buffer(overlay_buffer)
-            composed = None
-            composed = [(0, 0, 0)] * num_pixels  # Define composed buffer
-            compose_buffers(base_buffer, overlay_buffer, composed)
-            pixels[:] = composed
+                base_anim.next_frame_into(base_frame)
+                if base_anim.new_frame:
+                    compositor.mark_base_changed()
+            pt = profiler.lap("decode", pt)
+            compositor.compose(overlay)
+            pt = profiler.lap("compose", pt)
+            pixels[:] = compositor.out
             pixels.show()
-            switch.update()
+            pt = profiler.lap("show", pt)
+            scheduler.tick()
+            profiler.lap("tasks", pt)
         # Retoma idle ou entra em lockup se botão ainda pressionado
         if switch.value:  # não pressionado
-            pack_data = load_pack_data(gfx_pack)
-            leds = pack_data.get("leds")
-            if use_anim and leds and leds.get("wav"):
-                mixer.voice[0].play(audiocore.WaveFile(open(f"/gfx/{gfx_pack}/{leds['wav']}", "rb")), loop=True)
+            leds = packs.get(gfx_pack).leds
+            if use_anim and leds and leds.wav:
+                sounds.play_file(leds.wav, voice=0, loop=True)
             else:
-                play_wav(1, loop=True, channel=0)
+                play_sound("idle", loop=True, channel=0)
             mode = 1
         else:  # botão ainda pressionado
             mode = "lockup"
     elif mode == "blast":
-        # Defina o nome do arquivo binário do efeito blast
-        BLAST_BIN = "blast.bin"
+        # Nome do overlay do efeito blast em /mfx (sem extensão)
+        BLAST_BIN = "blast"
         # Defina o comprimento do overlay blast (ajuste conforme necessário)
         BLAST_LEN = 42
 
         # Blast overlay em posição aleatória
         pos = overlay_random_pos(num_pixels, BLAST_LEN)
-        for i in range(num_pixels):
-            overlay_buffer[i] = (0, 0, 0)
-        overlay = BinOverlay(
-            f"{MFX_PATH}/{BLAST_BIN}",
-            BLAST_LEN,
-            pos,
-            (1,1,1),
-            (0,0,0),
-            0.01
-        )
-        mixer.voice[1].play(audiocore.WaveFile(open(f"/sounds/blst0{random.randint(1, 4)}.wav", "rb")), loop=False)
+        overlay = open_overlay(BLAST_BIN, BLAST_LEN, pos, 0.01)
+        sounds.play("blast", voice=1, loop=False)
+        smooth_swing.mute()
 
 
 
         # Verifica se há animação de LEDs base ativa (idle customizada)
-        if use_anim and current_led_animations and current_led_animations[0]["anim"]:
-            base_anim = current_led_animations[0]["anim"]
-        else:
-            base_anim = None
+        base_anim = idle if use_anim and idle.active else None
+        if not base_anim:
+            compositor.fill_base(COLORS[SABER_COLOR])
+        compositor.mark_base_changed()
         while not overlay.is_done():
-            if base_anim:                
-                current_animation.next_frame_to_buffer(base_buffer)
-            elif use_anim:
-                chase.animate()
-            else:
-                pixels.fill(COLORS[SABER_COLOR])
-            for i in range(num_pixels):
-                overlay_buffer[i] = (0, 0, 0)
-            overlay.next_frame_to_buffer(overlay_buffer)
-            composed = None
-            composed = [(0, 0, 0)] * num_pixels  # Define composed buffer
-            compose_buffers(base_buffer, overlay_buffer, composed)
-            pixels[:] = composed
+            pt = profiler.mark()
+            if base_anim:
+                base_anim.next_frame_into(base_frame)
+                if base_anim.new_frame:
+                    compositor.mark_base_changed()
+            pt = profiler.lap("decode", pt)
+            compositor.compose(overlay)
+            pt = profiler.lap("compose", pt)
+            pixels[:] = compositor.out
             pixels.show()
-            switch.update()
+            pt = profiler.lap("show", pt)
+            scheduler.tick()
+            profiler.lap("tasks", pt)
 
         mode = 1                
     elif mode == "swing":
 #        mixer.voice[1].stop()
         if not mixer.voice[1].playing:
-            play_wav(random.randint(16, 23), loop=False, channel=1)
+            play_sound("swing", loop=False, channel=1)
 
         mode = 1
             # Garante que a animação idle volta após swing
 
 
     elif mode == "lockup":
-        # Defina o nome do arquivo binário do efeito lockup
-        LOCKUP_BIN = "lockup20x60.bin"
+        # Nome do overlay do efeito lockup em /mfx (sem extensão)
+        LOCKUP_BIN = "lockup20x60"
         # Defina o comprimento do overlay lockup (ajuste conforme necessário)
         LOCKUP_LEN = 20
         overlay.reset()
-        overlay = BinOverlay(
-            f"{MFX_PATH}/{LOCKUP_BIN}",
-            LOCKUP_LEN,
-            0,  # posição inicial, será ajustada dinamicamente
-            (1,1,1),
-            (0,0,0),
-            0.025
-        )
-        play_wav(15, loop=True, channel=1)
-        if use_anim and current_led_animations and current_led_animations[0]["anim"]:
-            base_anim = current_led_animations[0]["anim"]
-        else:
-            base_anim = None
+        overlay = open_overlay(LOCKUP_BIN, LOCKUP_LEN, 0, 0.025)  # posição ajustada em cada frame
+        play_sound("lockup", loop=True, channel=1)
+        # o loop não corre o scheduler: as vozes do smooth swing ficam caladas
+        smooth_swing.mute()
+        base_anim = idle if use_anim and idle.active else None
 
         Y_MIN = -9.8  # ponta para cima
         Y_MAX = 9.8   # ponta para baixo
 
+        BRILHO_ANIM = 0.5    # BinAnimation (idle, base) - 50% do brilho normal
+        if base_anim:
+            # O brilho da base entra nas tabelas de tint (uma vez), não por frame
+            base_brightness = base_anim.brightness
+            base_anim.brightness = base_brightness * BRILHO_ANIM
+        else:
+            compositor.fill_base(COLORS[SABER_COLOR])
+        compositor.mark_base_changed()
+
         while not switch.value:
             # Atualiza animação base corretamente (idle customizada ou chase/cor fixa)
             while not overlay.is_done():
+                pt = profiler.mark()
                 switch.update()
 
                 # Lê inclinação Y
-                _, y, _ = lis3dh.acceleration
+                motion.poll()
+                pt = profiler.lap("sensor", pt)
+                y = motion.acceleration[1]
                 # INVERTE O CÁLCULO: t=0 na base (punho), t=1 na ponta
                 t = (Y_MAX - y) / (Y_MAX - Y_MIN)
                 t = min(1.0, max(0.0, t))
@@ -775,47 +766,26 @@ while True:
                 if switch.value == True:
                     break
                 if base_anim:
-                    if current_animation.is_done():
-                        current_animation.reset()
-
-                    current_animation.next_frame_to_buffer(base_buffer)
-
-                    BRILHO_ANIM = 0.5    # BinAnimation (idle, base) - 60%
-                    BRILHO_OVERLAY = 1.0 # BinOverlay (clash, overlay) - 100%
-
-                    # 1) Aplica brilho só no base_buffer
-                    for i in range(num_pixels):
-                        r, g, b = base_buffer[i]
-                        base_buffer[i] = (int(r * BRILHO_ANIM), int(g * BRILHO_ANIM), int(b * BRILHO_ANIM))
-
-                elif use_anim:
-                    chase.animate()
-                else:
-                    pixels.fill(COLORS[SABER_COLOR])
-                for i in range(num_pixels):
-                    overlay_buffer[i] = (0, 0, 0)
-                overlay.next_frame_to_buffer(overlay_buffer)
-                composed = None
-                composed = [(0, 0, 0)] * num_pixels  # Define composed buffer
-                compose_buffers(base_buffer, overlay_buffer, composed)
-                pixels[:] = composed
+                    base_anim.next_frame_into(base_frame)
+                    if base_anim.new_frame:
+                        compositor.mark_base_changed()
+                pt = profiler.lap("decode", pt)
+
+                compositor.compose(overlay)
+                pt = profiler.lap("compose", pt)
+                pixels[:] = compositor.out
                 pixels.show()
+                profiler.lap("show", pt)
 
             if overlay.is_done():
                 try:
                     overlay.reset()
                 except Exception:
-                    overlay = BinOverlay(
-                        f"{MFX_PATH}/{LOCKUP_BIN}",
-                        pixels,
-                        LOCKUP_LEN,
-                        pos,
-                        (1,1,1),
-                        (0,0,0),
-                        0.025
-                    )
+                    overlay = open_overlay(LOCKUP_BIN, LOCKUP_LEN, pos, 0.025)
 #            overlay.next_frame(bg=bg)
             switch.update()
+        if base_anim:
+            base_anim.brightness = base_brightness
         mixer.voice[1].stop()
         mode = 1
 
@@ -827,19 +797,23 @@ while True:
 
 
     elif mode == "blade_bleeding":  # blade_bleeding
-        tinting = leds.get("tinting", True) 
+        tinting = leds.tinting if leds else True
+        # o loop não corre o scheduler: as vozes do smooth swing ficam caladas
+        smooth_swing.mute()
 
         if tinting:
             print("tinting modo blade_bleeding")
-            if use_anim and current_led_animations and current_led_animations[0]["anim"]:
-                base_anim = current_led_animations[0]["anim"]
-            else:
-                base_anim = None
+            base_anim = idle if use_anim and idle.active else None
+            if base_anim:
+                # O idle é partilhado: o tint volta ao da cor do sabre à saída
+                base_tint = base_anim.tint
 
             # Lê o valor inicial de z como referência
-            _, _, z0 = lis3dh.acceleration
+            motion.poll()
+            z0 = motion.acceleration[2]
             while True:
-                x, y, z = lis3dh.acceleration
+                motion.poll()
+                z = motion.acceleration[2]
                 # Calcula a diferença relativa ao início
                 dz = z - z0
                 # Imprime os valores de aceleração
@@ -854,14 +828,13 @@ while True:
                 if base_anim:
 
                     # Aplica tinting dinâmico antes de enviar ao buffer
-                    current_animation.tint = rgb_to_tint(color)
-                    if current_animation.is_done():
-                        current_animation.reset()
-                    current_animation.next_frame_to_buffer(base_buffer)
-                    pixels[:] = base_buffer
+                    base_anim.tint = rgb_to_tint(color)
+                    base_anim.next_frame_into(base_frame)
+                    pixels[:] = base_frame
                     pixels.show()
                     
                 elif use_anim:
+                    chase = animation("chase")
                     chase.color = color
                     chase.animate()
                 else:
@@ -876,6 +849,8 @@ while True:
                         # Retorna à cor original
                         pixels.fill(COLORS[SABER_COLOR])
                         pixels.show()
+                    elif base_anim:
+                        base_anim.tint = base_tint
                     mode = 1
                     break
         else:
@@ -886,99 +861,67 @@ while True:
     # turn off
     elif mode == 3:  # turn off
         mixer.voice[0].stop()
+        smooth_swing.stop()
+        idle.exit()
         if use_anim:
-            if gfx_pack == "reverse_scan_with_photons":
-                play_wav(2, loop=False, channel=1)
+            if gfx_pack == "reverse_scan_with_photons" and packs.bin_path(gfx_pack, "poweroff3.bin"):
+                play_sound("off", loop=False, channel=1)
 #                current_animation = BinAnimation(f"/gfx/{gfx_pack}/poweroff3.bin", pixels, num_pixels, rgb_to_tint(COLORS[int(SABER_COLOR)]) if tinting else (1, 1, 1), 20/1000, 0)
 
                 tinting = True
                 frame_time = 20 / 1000
                 current_animation = BinAnimation(
-                    f"/gfx/{gfx_pack}/poweroff3.bin",
+                    packs.bin_path(gfx_pack, "poweroff3.bin"),
                     num_pixels,
                     rgb_to_tint(COLORS[int(SABER_COLOR)]) if tinting else (1, 1, 1),
                     frame_time,
-                    0
+                    0,
+                    adaptive=ADAPTIVE_SKIP
                 )
                 while not current_animation.is_done():
-                    current_animation.next_frame_to_buffer(base_buffer)
-                    pixels[:] = base_buffer
+                    current_animation.next_frame_into(base_frame)
+                    pixels[:] = base_frame
                     pixels.show()
-                    switch.update()
-                time.sleep(0.1)
+                    scheduler.tick()
+                scheduler.sleep(0.1)
             elif gfx_pack in ["explosion", "scan"]:
-                play_wav(2, loop=False, channel=1)
+                play_sound("off", loop=False, channel=1)
                 pixels.fill(COLORS[SABER_COLOR])
                 for i in range(num_pixels - 1, 0, -1):
                     pixels[i] = BLACK
                     pixels.show()
-                    time.sleep(0.01)
-                time.sleep(0.1)
+                    scheduler.sleep(0.01)
+                scheduler.sleep(0.1)
             else:
-                pack_data = load_pack_data(gfx_pack)
-                poweroff = pack_data.get("poweroff")
-                pstoff = pack_data.get("pstoff")
+                pack_data = packs.get(gfx_pack)
+                poweroff = pack_data.poweroff
+                pstoff = pack_data.pstoff
                 
-                if poweroff:
-                    tinting = poweroff.get("tinting", True)
-                    frame_time = poweroff.get("frame_time", 25) / 1000
-                    wav_file = poweroff.get("wav", "")
-                    if wav_file:
-                        mixer.voice[1].play(audiocore.WaveFile(open(f"/gfx/{gfx_pack}/{wav_file}", "rb")), loop=False)
-                    else:
-                        play_wav(2, loop=False, channel=1)
-                    current_animation = BinAnimation(
-                        f"/gfx/{gfx_pack}/{poweroff['bin']}",
-                        num_pixels,
-                        rgb_to_tint(COLORS[int(SABER_COLOR)]) if tinting else (1, 1, 1),
-                        frame_time,
-                        0
-                    )
-                    while not current_animation.is_done():                        
-                        # Substitua next_frame() por next_frame_to_buffer(base_buffer)
-                        current_animation.next_frame_to_buffer(base_buffer)
-                        # Opcional: envie para os LEDs se quiser mostrar durante poweron
-                        pixels[:] = base_buffer
-                        pixels.show()
-                        switch.update()
+                if poweroff and poweroff.bin:
+                    current_animation = play_segment(poweroff, "off")
                     mixer.stop_voice(1)
                 else:
-                    play_wav(2, loop=False, channel=1)
+                    if poweroff:
+                        sounds.play_file(poweroff.wav, voice=1, loop=False)
+                    else:
+                        play_sound("off", loop=False, channel=1)
                     #pixels.fill(COLORS[SABER_COLOR])
                     for i in range(num_pixels - 1, 0, -1):
                         pixels[i] = BLACK
                         pixels.show()
-                        time.sleep(0.01)
-                    time.sleep(0.1)
-                if pstoff:
-                    frame_time = pstoff.get("frame_time", 25) / 1000
-                    wav_file = pstoff.get("wav", "")
-                    tinting = pstoff.get("tinting", True)
-                    if wav_file:
-                        mixer.voice[1].play(audiocore.WaveFile(open(f"/gfx/{gfx_pack}/{wav_file}", "rb")), loop=False)
-                    current_animation = BinAnimation(
-                        f"/gfx/{gfx_pack}/{pstoff['bin']}",
-                        num_pixels,
-                        rgb_to_tint(COLORS[int(SABER_COLOR)]) if tinting else (1, 1, 1),
-                        frame_time,
-                        0
-                    )
-                    while not current_animation.is_done():
-                        
-                        current_animation.next_frame_to_buffer(base_buffer)
-                        # Opcional: envie para os LEDs se quiser mostrar durante poweron
-                        pixels[:] = base_buffer
-                        pixels.show()
-                        switch.update()
+                        scheduler.sleep(0.01)
+                    scheduler.sleep(0.1)
+                if pstoff and pstoff.bin:
+                    current_animation = play_segment(pstoff)
                     mixer.stop_voice(1)
         else:
-            play_wav(2, loop=False, channel=1)
+            play_sound("off", loop=False, channel=1)
             #pixels.fill(COLORS[SABER_COLOR])
             for i in range(num_pixels - 1, 0, -1):
                 pixels[i] = BLACK
                 pixels.show()
-                time.sleep(0.01)
-            time.sleep(0.1)
+                scheduler.sleep(0.01)
+            scheduler.sleep(0.1)
         mode = 4
         last_mode = None  # Garante que idle será reiniciado ao ligar novamente
     # go to startup from off
@@ -987,32 +930,31 @@ while True:
 
         if force:
             volume = 1
-            play_wav(24, loop=False)
+            play_sound("force", loop=False)
             force = False
-        while mixer.voice[0].playing:
-            pass
-        else:
-            external_power.value = False
-            volume = VOLUMES[VOLUME_IDX]
+        wait_voice(0)
+        external_power.value = False
+        volume = VOLUMES[VOLUME_IDX]
         if switch.short_count == 1:
             battery_voltage = get_voltage(vbat_voltage)
             print("VBat voltage: {:.2f}".format(battery_voltage))
             if battery_voltage < LOW_BATTERY_LIMIT:
-                play_wav(25, loop=False)  # wav z_fraca
+                play_sound("low_battery", loop=False)  # wav z_fraca
                 # Pisca a lâmina em vermelho enquanto a bateria estiver fraca
                 for _ in range(10):
                     pixels.fill((255, 0, 0))
                     pixels.show()
-                    time.sleep(0.1)
+                    scheduler.sleep(0.1)
                     pixels.fill((0, 0, 0))
                     pixels.show()
-                    time.sleep(0.1)
-                while mixer.voice[0].playing:
-                    delay = 0.1
+                    scheduler.sleep(0.1)
+                wait_voice(0)
                 external_power.value = False  # desliga a lâmina#
             else:
                 print("Ligando a lâmina")
                 external_power.value = True
+                # Único ponto (fora do idle) onde se verifica se o USB mudou packs
+                check_packs()
                 mode = 0  # Volta para o modo de ignição
                 last_mode = None  # Garante que idle será reiniciado ao ligar novamente
         
@@ -1020,31 +962,33 @@ while True:
             mixer.voice[0].stop()
             print("settings")
             mode = 5
+        if switch.short_count == 4:
+            profiler.dump()
         # Troca animação de ignição/retração com long press
         if switch.long_press:
             # Troca o gfx_pack ciclicamente
-            current_idx = gfx_effects.index(gfx_pack)
-            gfx_pack = gfx_effects[(current_idx + 1) % len(gfx_effects)]
+            current_idx = gfx_pack_idx
+            gfx_pack_idx = (gfx_pack_idx + 1) % len(gfx_effects)
+            gfx_pack = gfx_effects[gfx_pack_idx]
             print("Ignition pack:", gfx_pack)
+            check_packs()
             # Feedback visual: pisca a lâmina na cor da animação escolhida
-            mixer.voice[1].play(audiocore.WaveFile(open(f"/gfx/{gfx_pack}/font.wav", "rb")), loop=False)
+            sounds.play_file(f"/gfx/{gfx_pack}/font.wav", voice=1, loop=False)
             preview_colors = [WHITE, (0, 255, 255), (255, 255, 0), (255, 0, 255)]
             external_power.value = True
             for _ in range(3):
                 pixels.fill(preview_colors[current_idx % len(preview_colors)])
                 pixels.show()
-                time.sleep(0.2)
+                scheduler.sleep(0.2)
                 pixels.fill((0, 0, 0))
                 pixels.show()
-                time.sleep(0.2)
+                scheduler.sleep(0.2)
             external_power.value = False
             # Limpa imediatamente todos os buffers e LEDs para evitar frames residuais
-            for i in range(num_pixels):
-                base_buffer[i] = (0, 0, 0)
-                overlay_buffer[i] = (0, 0, 0)
-            # Limpa também as animações de LED para evitar frames residuais
-            current_led_animations = []
-            led_anim_index = 0
+            base_frame[:] = BLACK_FRAME
+            compositor.mark_base_changed()
+            # Fecha também o idle para evitar frames residuais
+            idle.exit()
             # Garante que não há animação corrente
             current_animation = None
 
@@ -1106,10 +1050,9 @@ while True:
                 else:
                     pixels[i] = (0, 0, 0)
             pixels.show()
-            # Mostra por 5 segundos
-            t0 = time.monotonic()
-            while time.monotonic() - t0 < 5:
-                pass
+            # Mostra por 5 segundos (um clique fecha antes e é descartado)
+            scheduler.wait_while(lambda: not switch.pressed, timeout=5)
+            switch.update()
 
             # Apaga a lâmina ao terminar
             pixels.fill((0, 0, 0))
@@ -1117,6 +1060,9 @@ while True:
             pixels.brightness = prev_brightness  # Restore previous brightness
             # Volta para modo off
             mode = 4
+        if mode == 4:
+            # Desligado: dorme entre leituras do botão em vez de girar o loop
+            scheduler.sleep(0.01)
 
     # settings menu
     elif mode == 5:
@@ -1129,28 +1075,32 @@ while True:
             COLORS,
             switch,
             pin2,
-            user_settings,
+            settings,
             VOLUMES,
             PixelSubset,
             WHITE,
         )
-        try:
-            with open("/settings.json", "r") as f:
-                user_settings = json.load(f)
-        except Exception as e:
-            print("Settings padrão carregado:", e)
-            user_settings = default_settings
-        SABER_COLOR = user_settings.get("COR", default_settings["COR"])
-        BRILHO_IDX = user_settings.get("Brilho", default_settings["Brilho"])
-        VOLUME_IDX = user_settings.get("Volume", default_settings["Volume"])
-        SWING_IDX = user_settings.get("Swing", default_settings["Swing"])
-        CLASH_IDX = user_settings.get("Clash", default_settings["Clash"])
-        ANIM_IDX = user_settings.get("Anim", default_settings["Anim"])
+        # o menu já deixou os valores no store; não é preciso reler o ficheiro
+        SABER_COLOR = settings.get("COR")
+        BRILHO_IDX = settings.get("Brilho")
+        VOLUME_IDX = settings.get("Volume")
+        SWING_IDX = settings.get("Swing")
+        CLASH_IDX = settings.get("Clash")
+        ANIM_IDX = settings.get("Anim")
+        SWING_THRESHOLD = SWINGS[SWING_IDX]
+        HIT_THRESHOLD = CLASHES[CLASH_IDX]
+        motion.configure(SWING_THRESHOLD, HIT_THRESHOLD)
         force = True
         mode = 3
 
 
+    for task in idle_tasks:
+        task.enabled = mode == 1
+    motion_task.enabled = mode != 4  # desligada não há clash nem swing
+    scheduler.tick()
+
     last_mode = mode
 
     last_mode = mode
+    profiler.lap("loop", loop_start)
 
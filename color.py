@@ -0,0 +1,59 @@
+# color.py
+# Contas de cor em vírgula fixa. No CircuitPython cada float é um objeto no
+# heap e os inteiros pequenos não, por isso os blends por pixel usam só
+# inteiros: canais 0..255 e pesos 0..256 (ONE = 1.0),
+#   mix(x, y, a) = (a*x + (256-a)*y) >> 8
+# Frações em float (t, factor) são convertidas uma vez com weight(), fora
+# dos loops por pixel.
+from array import array
+
+ONE = 256
+
+# ALPHA[v]: byte 0..255 (ex.: cinza de um overlay) -> peso 0..256, 255 -> 256
+ALPHA = array("H", [(v * ONE + 127) // 255 for v in range(256)])
+
+
+def weight(t):
+    """Fração (float, normalmente 0..1) -> peso inteiro (256 = 1.0)."""
+    return int(t * ONE + 0.5)
+
+
+def mix(x, y, a):
+    """Canal x com peso a e y com peso 256 - a."""
+    return (a * x + (ONE - a) * y) >> 8
+
+
+def blend(color1, color2, a):
+    """color1 -> color2; a = 0 dá color1, a = 256 dá color2."""
+    b = ONE - a
+    return (
+        (b * color1[0] + a * color2[0]) >> 8,
+        (b * color1[1] + a * color2[1]) >> 8,
+        (b * color1[2] + a * color2[2]) >> 8,
+    )
+
+
+def scale(color, a):
+    """Cor multiplicada pelo peso a (pode passar de 256; satura em 255)."""
+    return (
+        min(255, (color[0] * a) >> 8),
+        min(255, (color[1] * a) >> 8),
+        min(255, (color[2] * a) >> 8),
+    )
+
+
+# Versões "into": escrevem no pixel j de um frame RGB (bytearray, j = índice
+# do byte R) em vez de devolver um tuplo novo, para os caminhos por frame.
+def blend_into(frame, j, color1, color2, a):
+    """Como blend(), com o resultado em frame[j:j+3]."""
+    b = ONE - a
+    frame[j] = (b * color1[0] + a * color2[0]) >> 8
+    frame[j + 1] = (b * color1[1] + a * color2[1]) >> 8
+    frame[j + 2] = (b * color1[2] + a * color2[2]) >> 8
+
+
+def scale_into(frame, j, a):
+    """Como scale(), aplicado no lugar ao pixel frame[j:j+3]."""
+    frame[j] = min(255, (frame[j] * a) >> 8)
+    frame[j + 1] = min(255, (frame[j + 1] * a) >> 8)
+    frame[j + 2] = min(255, (frame[j + 2] * a) >> 8)
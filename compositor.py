@@ -0,0 +1,56 @@
+# compositor.py
+# Composição sem alocações por frame: base (animação idle) + overlay
+# (clash/blast/lockup) num frame de saída pré-alocado.
+
+
+class Compositor:
+    """
+    Mantém o frame base e o frame de saída como bytearrays RGB.
+    Só a janela tocada pelo overlay (pos..pos+overlay_len) é restaurada e
+    reescrita a cada frame; a base inteira só é copiada quando muda.
+    """
+    def __init__(self, num_pixels, base=None):
+        self.num_pixels = num_pixels
+        self.frame_size = num_pixels * 3
+        self.base = base if base is not None else bytearray(self.frame_size)
+        self.out = bytearray(self.frame_size)
+        self.base_dirty = True
+        # janela (em bytes) de self.out que difere de self.base
+        self._lo = 0
+        self._hi = 0
+
+    def mark_base_changed(self):
+        self.base_dirty = True
+
+    def fill_base(self, color):
+        r, g, b = color
+        base = self.base
+        for j in range(0, self.frame_size, 3):
+            base[j] = r
+            base[j + 1] = g
+            base[j + 2] = b
+        self.base_dirty = True
+
+    def _restore(self):
+        out = self.out
+        if self.base_dirty:
+            out[:] = self.base
+            self.base_dirty = False
+        else:
+            base = self.base
+            for j in range(self._lo, self._hi):
+                out[j] = base[j]
+        self._lo = 0
+        self._hi = 0
+
+    def compose(self, overlay):
+        """
+        Restaura a saída e aplica o próximo frame do overlay por cima.
+        Devolve False quando o overlay terminou (como next_frame_to_buffer).
+        """
+        self._restore()
+        alive = overlay.next_frame_into(self.out)
+        if alive:
+            self._lo = max(0, overlay.pos) * 3
+            self._hi = max(self._lo, min(self.num_pixels, overlay.pos + overlay.overlay_len) * 3)
+        return alive
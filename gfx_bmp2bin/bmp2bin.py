@@ -1,33 +1,146 @@
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from PIL import Image
 import numpy as np
 
-def bmp_to_bin_rgb_resample(bmp_path, bin_path, num_leds=80):
-    bmp = Image.open(bmp_path)
-    if bmp.mode != "RGB":
-        bmp = bmp.convert("RGB")
+RESAMPLE_MODES = ("nearest", "area", "bilinear")
+LEGACY_PIXELS = 80  # largura dos .bin de /gfx/<pack>/ sem "pixels" no pack.json
+
+def load_rgb(bmp_path):
+    """Imagem como array (linhas, colunas, 3) uint8, com as linhas de baixo para cima."""
+    with Image.open(bmp_path) as bmp:
+        if bmp.mode != "RGB":
+            bmp = bmp.convert("RGB")
+        pixels = np.asarray(bmp, dtype=np.uint8)
+    return pixels[::-1]
+
+def resample_rows(pixels, num_leds, mode="nearest"):
+    """
+    Reamostra todas as linhas de uma vez para num_leds colunas.
+    nearest: o mesmo que o conversor antigo (linspace truncado).
+    area: média das colunas de origem que caem em cada LED (para reduzir).
+    bilinear: interpolação entre as duas colunas mais próximas.
+    """
+    width = pixels.shape[1]
+    if mode == "nearest":
+        src_x = np.linspace(0, width - 1, num=num_leds).astype(np.intp)
+        return pixels[:, src_x]
+    if mode == "bilinear":
+        src_x = np.linspace(0, width - 1, num=num_leds)
+        x0 = np.floor(src_x).astype(np.intp)
+        x1 = np.minimum(x0 + 1, width - 1)
+        frac = (src_x - x0)[None, :, None]
+        out = pixels[:, x0] * (1.0 - frac) + pixels[:, x1] * frac
+        return np.rint(out).astype(np.uint8)
+    if mode == "area":
+        edges = np.arange(num_leds + 1) * width // num_leds
+        start = np.minimum(edges[:-1], width - 1)
+        end = np.maximum(edges[1:], start + 1)
+        # soma acumulada com um zero à frente: soma(start..end) = cs[end] - cs[start]
+        cs = np.zeros((pixels.shape[0], width + 1, 3), dtype=np.uint32)
+        np.cumsum(pixels, axis=1, dtype=np.uint32, out=cs[:, 1:])
+        sums = cs[:, end] - cs[:, start]
+        out = sums / (end - start)[None, :, None]
+        return np.rint(out).astype(np.uint8)
+    raise ValueError(f"Modo de reamostragem desconhecido: {mode}")
+
+def bmp_to_bin_rgb_resample(bmp_path, bin_path, num_leds=80, mode="nearest"):
+    frames = resample_rows(load_rgb(bmp_path), num_leds, mode)
     with open(bin_path, "wb") as f:
-        for y in reversed(range(bmp.height)):  # de baixo para cima
-            src_x = np.linspace(0, bmp.width-1, num=num_leds)
-            row = [bmp.getpixel((int(x), y)) for x in src_x]
-            for rgb in row:
-                f.write(bytes([int(v) for v in rgb[:3]]))
+        f.write(np.ascontiguousarray(frames).tobytes())
+    return bin_path
+
+def is_up_to_date(bmp_path, bin_path):
+    try:
+        return os.path.getmtime(bin_path) >= os.path.getmtime(bmp_path)
+    except OSError:
+        return False
 
-def process_folder(root_folder, num_leds=80):
+def convert_all(tasks, mode="nearest", jobs=None, force=False):
+    """tasks: (bmp_path, bin_path, num_leds). Salta os .bin mais recentes que o .bmp."""
+    pending = []
+    for bmp_path, bin_path, num_leds in tasks:
+        if not force and is_up_to_date(bmp_path, bin_path):
+            print(f"Atualizado, a saltar: {bin_path}")
+            continue
+        pending.append((bmp_path, bin_path, num_leds))
+    if pending:
+        # Cada BMP é independente: espalha os ficheiros pelos processos
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(bmp_to_bin_rgb_resample, bmp_path, bin_path, num_leds, mode): bmp_path
+                for bmp_path, bin_path, num_leds in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    print(f"Convertido: {futures[future]} -> {future.result()}")
+                except Exception as e:
+                    print(f"Erro ao converter {futures[future]}: {e}")
+
+def process_folder(root_folder, num_leds=80, mode="nearest", jobs=None, force=False):
+    tasks = []
     for dirpath, _, filenames in os.walk(root_folder):
         for filename in filenames:
             if filename.lower().endswith('.bmp'):
                 bmp_path = os.path.join(dirpath, filename)
-                bin_path = os.path.splitext(bmp_path)[0] + f".bin"
-                print(f"Convertendo: {bmp_path} -> {bin_path}")
-                bmp_to_bin_rgb_resample(bmp_path, bin_path, num_leds)
+                bin_path = os.path.splitext(bmp_path)[0] + ".bin"
+                tasks.append((bmp_path, bin_path, num_leds))
+    convert_all(tasks, mode, jobs, force)
     print("Conversão completa.")
 
+def write_pack_json(path, pack):
+    # Mesmo formato dos pack.json do repositório: uma chave por linha, CRLF
+    lines = [f'    "{key}": {json.dumps(value)}' for key, value in pack.items()]
+    with open(path, "w", newline="\r\n") as f:
+        f.write("{\n" + ",\n".join(lines) + "\n}\n")
+
+def build_pack(bmp_folder, pack_dir, lengths, mode="nearest", jobs=None, force=False):
+    """
+    Gera as variantes de um pack para vários comprimentos de lâmina:
+    <pack_dir>/<N>/<nome>.bin para cada BMP de bmp_folder, e regista os
+    comprimentos em "variants" no pack.json. O dispositivo escolhe a pasta
+    do seu comprimento no arranque (pack_registry.py).
+    """
+    bmps = sorted(f for f in os.listdir(bmp_folder) if f.lower().endswith('.bmp'))
+    tasks = []
+    for num_leds in lengths:
+        out_dir = os.path.join(pack_dir, str(num_leds))
+        os.makedirs(out_dir, exist_ok=True)
+        for filename in bmps:
+            bin_name = os.path.splitext(filename)[0] + ".bin"
+            tasks.append((os.path.join(bmp_folder, filename), os.path.join(out_dir, bin_name), num_leds))
+    convert_all(tasks, mode, jobs, force)
+
+    json_path = os.path.join(pack_dir, "pack.json")
+    try:
+        with open(json_path, "r") as f:
+            pack = json.load(f)
+    except (OSError, ValueError):
+        pack = {}
+    pack.setdefault("pixels", LEGACY_PIXELS)
+    pack["variants"] = sorted(set(pack.get("variants", [])) | set(lengths))
+    write_pack_json(json_path, pack)
+    print(f"Pack {pack_dir}: variantes {pack['variants']}")
+
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) < 3:
-        print("Uso: python bmp_folder2bin.py <pasta> <num_leds>")
+    import argparse
+    parser = argparse.ArgumentParser(description="Converte BMPs (uma linha por frame) em .bin para a lâmina")
+    parser.add_argument("pasta")
+    parser.add_argument("num_leds", type=int, nargs="?", default=None)
+    parser.add_argument("--pack", help="pasta do pack em /gfx: gera <pack>/<N>/*.bin para cada comprimento")
+    parser.add_argument("--comprimentos", default="80,120,144", help="comprimentos para --pack (ex: 80,120,144)")
+    parser.add_argument("--modo", choices=RESAMPLE_MODES, default="nearest", help="reamostragem das colunas")
+    parser.add_argument("--jobs", type=int, default=None, help="número de processos (por omissão, um por CPU)")
+    parser.add_argument("--force", action="store_true", help="converte mesmo que o .bin seja mais recente")
+    args = parser.parse_args()
+    if args.pack:
+        lengths = [int(n) for n in args.comprimentos.split(",") if n.strip()]
+        build_pack(args.pasta, args.pack, lengths, args.modo, args.jobs, args.force)
+    elif args.num_leds:
+        process_folder(args.pasta, args.num_leds, args.modo, args.jobs, args.force)
+    else:
+        print("Uso: python bmp2bin.py <pasta> <num_leds> [--modo nearest|area|bilinear] [--jobs N] [--force]")
+        print("     python bmp2bin.py <pasta_bmp> --pack <gfx/pack> [--comprimentos 80,120,144]")
         sys.exit(1)
-    folder = sys.argv[1]
-    num_leds = int(sys.argv[2])
-    process_folder(folder, num_leds)
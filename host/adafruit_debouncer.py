@@ -0,0 +1,90 @@
+# adafruit_debouncer.py (substituto de host, ver hal.py): mesma lógica de
+# cliques curtos/longos do Button da biblioteca, no relógio virtual
+import hal
+
+
+def _ms():
+    return int(hal.clock.now() * 1000)
+
+
+class Debouncer:
+    def __init__(self, io, interval=0.010):
+        self.function = io if callable(io) else (lambda: io.value)
+        self.interval = interval
+        self._state = self.function()
+        self._last_state = self._state
+        self._changed = False
+
+    def update(self, new_value=None):
+        value = self.function() if new_value is None else new_value
+        self._last_state = self._state
+        self._changed = value != self._state
+        self._state = value
+
+    @property
+    def value(self):
+        return self._state
+
+    @property
+    def rose(self):
+        return self._changed and self._state
+
+    @property
+    def fell(self):
+        return self._changed and not self._state
+
+
+class Button(Debouncer):
+    # short_count/long_press valem até ao update() seguinte, como na biblioteca
+    def __init__(self, pin, short_duration_ms=200, long_duration_ms=500, value_when_pressed=False, **kwargs):
+        super().__init__(pin, **kwargs)
+        self.short_duration_ms = short_duration_ms
+        self.long_duration_ms = long_duration_ms
+        self.value_when_pressed = value_when_pressed
+        self.last_change_ms = _ms()
+        self.short_counter = 0
+        self.short_to_show = 0
+        self.long_registered = False
+        self.long_showed = False
+
+    @property
+    def pressed(self):
+        return self._changed and self._state == self.value_when_pressed
+
+    @property
+    def released(self):
+        return self._changed and self._state != self.value_when_pressed
+
+    def update(self, new_value=None):
+        if self.long_registered:
+            self.long_showed = True  # long_press só no update em que foi detetado
+        super().update(new_value)
+        now = _ms()
+        if self.pressed:
+            self.last_change_ms = now
+            self.short_counter += 1
+        elif self.released:
+            self.last_change_ms = now
+            if self.long_registered:
+                self.long_registered = False
+                self.long_showed = False
+        else:
+            duration = now - self.last_change_ms
+            if (not self.long_registered and self._state == self.value_when_pressed
+                    and duration > self.long_duration_ms):
+                self.long_registered = True
+                self.short_to_show = self.short_counter - 1
+                self.short_counter = 0
+            elif (self._state != self.value_when_pressed and duration > self.short_duration_ms):
+                self.short_to_show = self.short_counter
+                self.short_counter = 0
+            else:
+                self.short_to_show = 0
+
+    @property
+    def short_count(self):
+        return self.short_to_show
+
+    @property
+    def long_press(self):
+        return self.long_registered and not self.long_showed
@@ -0,0 +1,2 @@
+# adafruit_led_animation (substituto de host, ver hal.py): só o que o
+# code.py usa, para correr no PC sem os .mpy de lib/
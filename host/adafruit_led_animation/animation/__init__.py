@@ -0,0 +1,31 @@
+# Base mínima das animações: animate() desenha um passo a cada `speed` s
+import time
+
+
+class Animation:
+    def __init__(self, pixel_object, speed, color):
+        self.pixel_object = pixel_object
+        self.speed = speed
+        self.color = color
+        self._next = 0.0
+        self._step = 0
+
+    def animate(self, show=True):
+        now = time.monotonic()
+        if now < self._next:
+            return False
+        self._next = now + self.speed
+        self.draw(self._step)
+        self._step += 1
+        if show:
+            self.pixel_object.show()
+        return True
+
+    def draw(self, step):
+        self.pixel_object.fill(self.color)
+
+    def fill(self, color):
+        self.pixel_object.fill(color)
+
+    def reset(self):
+        self._step = 0
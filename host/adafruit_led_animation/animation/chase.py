@@ -0,0 +1,17 @@
+from adafruit_led_animation.animation import Animation
+
+
+class Chase(Animation):
+    def __init__(self, pixel_object, speed, color, size=2, spacing=3, reverse=False, name=None):
+        super().__init__(pixel_object, speed, color)
+        self.size = size
+        self.spacing = spacing
+        self.reverse = reverse
+
+    def draw(self, step):
+        period = self.size + self.spacing
+        pixels = self.pixel_object
+        n = len(pixels)
+        for i in range(n):
+            k = (i + (-step if self.reverse else step)) % period
+            pixels[i] = self.color if k < self.size else (0, 0, 0)
@@ -0,0 +1,14 @@
+import math
+import time
+
+from adafruit_led_animation.animation import Animation
+
+
+class Pulse(Animation):
+    def __init__(self, pixel_object, speed, color, period=5, breath=0, min_intensity=0, max_intensity=1, name=None):
+        super().__init__(pixel_object, speed, color)
+        self.period = period
+
+    def draw(self, step):
+        level = (1 - math.cos(2 * math.pi * (time.monotonic() % self.period) / self.period)) / 2
+        self.pixel_object.fill(tuple(int(c * level) for c in self.color))
@@ -0,0 +1,17 @@
+import time
+
+from adafruit_led_animation.animation import Animation
+from adafruit_led_animation.color import colorwheel
+
+
+class Rainbow(Animation):
+    def __init__(self, pixel_object, speed, period=5, step=1, name=None, precompute_rainbow=True):
+        super().__init__(pixel_object, speed, (0, 0, 0))
+        self.period = period
+
+    def draw(self, step):
+        pixels = self.pixel_object
+        n = len(pixels)
+        offset = int((time.monotonic() % self.period) / self.period * 256)
+        for i in range(n):
+            pixels[i] = colorwheel(offset + i * 256 // n)
@@ -0,0 +1,17 @@
+import random
+
+from adafruit_led_animation.animation import Animation
+
+
+class Sparkle(Animation):
+    def __init__(self, pixel_object, speed, color, num_sparkles=1, name=None, mask=None):
+        super().__init__(pixel_object, speed, color)
+        self.num_sparkles = num_sparkles
+
+    def draw(self, step):
+        pixels = self.pixel_object
+        n = len(pixels)
+        dim = tuple(c // 4 for c in self.color)
+        pixels.fill(dim)
+        for _ in range(int(self.num_sparkles)):
+            pixels[random.randint(0, n - 1)] = self.color
@@ -0,0 +1,37 @@
+# PixelSubset: janela de uma fita, como na adafruit_led_animation.helper
+
+
+class PixelSubset:
+    def __init__(self, pixel_object, start, end):
+        self._pixels = pixel_object
+        self._start = start
+        self._end = end
+        self.n = end - start
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            for i, color in zip(range(*index.indices(self.n)), value):
+                self._pixels[self._start + i] = color
+        else:
+            self._pixels[self._start + index] = value
+
+    def __getitem__(self, index):
+        return self._pixels[self._start + index]
+
+    def fill(self, color):
+        for i in range(self._start, self._end):
+            self._pixels[i] = color
+
+    def show(self):
+        self._pixels.show()
+
+    @property
+    def brightness(self):
+        return self._pixels.brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        self._pixels.brightness = value
@@ -0,0 +1,152 @@
+# adafruit_lis3dh.py (substituto de host, ver hal.py): registos que o
+# motion.py usa (FIFO em modo stream, watermark e clique no INT1), com as
+# amostras tiradas do traço do hal ao ritmo do ODR no relógio virtual
+import struct
+
+import hal
+
+RANGE_2_G = 0
+RANGE_4_G = 1
+RANGE_8_G = 2
+RANGE_16_G = 3
+DATARATE_400_HZ = 0x70
+DATARATE_100_HZ = 0x50
+STANDARD_GRAVITY = 9.806
+
+_DIVIDERS = (16380, 8190, 4096, 1365)
+_ODR = {0x70: 400, 0x50: 100}
+_REG_CTRL3 = 0x22
+_REG_CTRL5 = 0x24
+_REG_OUT_X_L = 0x28
+_REG_FIFO_CTRL = 0x2E
+_REG_FIFO_SRC = 0x2F
+_FIFO_SIZE = 32
+
+
+class _Bus:
+    def __init__(self, sensor):
+        self.sensor = sensor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write_then_readinto(self, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0, in_end=None):
+        reg = out_buffer[out_start] & 0x7F
+        end = len(in_buffer) if in_end is None else in_end
+        self.sensor._read_into(reg, in_buffer, in_start, end)
+
+
+class LIS3DH_I2C:
+    def __init__(self, i2c, *, address=0x18, int1=None, int2=None):
+        self.range = RANGE_2_G
+        self.data_rate = DATARATE_400_HZ
+        self._regs = {}
+        self._i2c = _Bus(self)
+        self._fifo = []
+        self._overrun = False
+        self._last_sample_t = hal.clock.now()
+        self._tap_enabled = False
+        self._tap_pending = False
+        self._last_tap_check = self._last_sample_t
+        hal.accelerometers.append(self)
+        if int1 is not None:
+            hal.pin_readers[int1.pin.name] = self._int1
+
+    # -- amostras ---------------------------------------------------------
+    def _odr(self):
+        return _ODR.get(self.data_rate, 400)
+
+    def _raw(self, t):
+        div = _DIVIDERS[self.range] / STANDARD_GRAVITY
+        return tuple(max(-32768, min(32767, int(v * div))) for v in hal.accel_at(t))
+
+    def _fill(self):
+        clock = hal.clock
+        clock.pause()
+        try:
+            now = clock.now()
+            period = 1.0 / self._odr()
+            t = self._last_sample_t + period
+            streaming = self._regs.get(_REG_FIFO_CTRL, 0) & 0xC0 == 0x80
+            missed = int((now - self._last_sample_t) * self._odr()) - _FIFO_SIZE
+            if missed > 0:
+                # só as últimas 32 amostras podem ficar no FIFO
+                t += missed * period
+                self._overrun = self._overrun or streaming
+            while t <= now:
+                if streaming:
+                    if len(self._fifo) >= _FIFO_SIZE:
+                        self._fifo.pop(0)
+                        self._overrun = True
+                    self._fifo.append(self._raw(t))
+                t += period
+            self._last_sample_t = t - period
+            if self._tap_enabled and hal.scenario.taps_between(self._last_tap_check, now):
+                self._tap_pending = True
+            self._last_tap_check = now
+        finally:
+            clock.resume()
+
+    def _int1(self):
+        self._fill()
+        ctrl3 = self._regs.get(_REG_CTRL3, 0)
+        watermark = self._regs.get(_REG_FIFO_CTRL, 0) & 0x1F
+        if ctrl3 & 0x04 and watermark and len(self._fifo) >= watermark:
+            return True
+        return bool(ctrl3 & 0x80 and self._tap_pending)
+
+    # -- registos ---------------------------------------------------------
+    def _read_register_byte(self, reg):
+        if reg == _REG_FIFO_SRC:
+            self._fill()
+            count = min(len(self._fifo), _FIFO_SIZE - 1)
+            watermark = self._regs.get(_REG_FIFO_CTRL, 0) & 0x1F
+            value = count
+            if self._overrun:
+                value |= 0x40
+            if not self._fifo:
+                value |= 0x20
+            if watermark and len(self._fifo) >= watermark:
+                value |= 0x80
+            return value
+        return self._regs.get(reg, 0)
+
+    def _write_register_byte(self, reg, value):
+        self._regs[reg] = value & 0xFF
+        if reg == _REG_FIFO_CTRL and value & 0xC0 == 0:
+            self._fifo = []  # bypass limpa o FIFO
+            self._overrun = False
+
+    def _read_into(self, reg, buf, start, end):
+        if reg != _REG_OUT_X_L:
+            for i in range(start, end):
+                buf[i] = self._read_register_byte(reg + i - start)
+            return
+        self._fill()
+        for k in range((end - start) // 6):
+            sample = self._fifo.pop(0) if self._fifo else self._raw(hal.clock.now())
+            struct.pack_into("<hhh", buf, start + k * 6, *sample)
+        self._overrun = False
+
+    # -- API pública usada pelo code.py ------------------------------------
+    @property
+    def acceleration(self):
+        return tuple(v for v in hal.accel_at(hal.clock.now()))
+
+    def set_tap(self, tap, threshold, *, time_limit=10, time_latency=20, time_window=255, click_cfg=None):
+        self._tap_enabled = bool(tap)
+        self._regs[_REG_CTRL3] = 0x80 if tap else 0
+
+    @property
+    def tapped(self):
+        self._fill()
+        tapped = self._tap_pending
+        self._tap_pending = False
+        return tapped
+
+    @property
+    def shake_threshold(self):
+        return 30
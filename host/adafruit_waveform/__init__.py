@@ -0,0 +1 @@
+# adafruit_waveform (substituto de host, ver hal.py)
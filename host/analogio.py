@@ -0,0 +1,18 @@
+# analogio.py (substituto de host, ver hal.py): A0/A1 leem a bateria do cenário
+import hal
+
+
+class AnalogIn:
+    # divisor 2:1 e calibração do get_voltage() do code.py
+    _SCALE = 65535 / (3.3 * 2 * 1.0291)
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.reference_voltage = 3.3
+
+    @property
+    def value(self):
+        return min(65535, int(hal.scenario.battery_volts(hal.clock.now()) * self._SCALE))
+
+    def deinit(self):
+        pass
@@ -0,0 +1,19 @@
+# audiobusio.py (substituto de host, ver hal.py)
+
+
+class I2SOut:
+    def __init__(self, bit_clock, word_select, data, left_justified=False):
+        self.source = None
+
+    def play(self, sample, loop=False):
+        self.source = sample
+
+    def stop(self):
+        self.source = None
+
+    @property
+    def playing(self):
+        return self.source is not None
+
+    def deinit(self):
+        pass
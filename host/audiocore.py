@@ -0,0 +1,44 @@
+# audiocore.py (substituto de host, ver hal.py): só lê o cabeçalho do WAV
+# para saber a duração; não há som
+import struct
+
+
+class WaveFile:
+    def __init__(self, f, buffer=None):
+        if isinstance(f, str):
+            f = open(f, "rb")
+        self.file = f
+        self.name = getattr(f, "name", "?")
+        self.sample_rate = 22050
+        self.channel_count = 1
+        self.bits_per_sample = 16
+        self.duration = 0.0
+        f.seek(0)
+        riff = f.read(12)
+        if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise ValueError("não é um WAV: %s" % self.name)
+        byte_rate = 0
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                break
+            size = struct.unpack("<I", chunk[4:])[0]
+            if chunk[:4] == b"fmt ":
+                fmt = f.read(size)
+                self.channel_count, self.sample_rate, byte_rate = struct.unpack("<HII", fmt[2:12])
+                self.bits_per_sample = struct.unpack("<H", fmt[14:16])[0]
+            elif chunk[:4] == b"data":
+                self.duration = size / byte_rate if byte_rate else 0.0
+                break
+            else:
+                f.seek(size + (size & 1), 1)
+
+    def deinit(self):
+        pass
+
+
+class RawSample:
+    def __init__(self, buffer, channel_count=1, sample_rate=8000):
+        self.sample_rate = sample_rate
+        self.channel_count = channel_count
+        self.duration = len(buffer) / channel_count / sample_rate
@@ -0,0 +1,59 @@
+# audiomixer.py (substituto de host, ver hal.py): cada voz sabe o que toca
+# e até quando, pelo relógio virtual e pela duração do WAV
+import hal
+
+
+class MixerVoice:
+    def __init__(self, mixer, index):
+        self.mixer = mixer
+        self.index = index
+        self.level = 1.0
+        self.sample = None
+        self.loop = False
+        self.started = 0.0
+
+    def play(self, sample, loop=False):
+        now = hal.clock.now()
+        self.sample = sample
+        self.loop = loop
+        self.started = now
+        self.mixer.events.append((now, self.index, "play", getattr(sample, "name", "?"), loop))
+
+    def stop(self):
+        if self.sample is not None:
+            self.mixer.events.append((hal.clock.now(), self.index, "stop", getattr(self.sample, "name", "?"), self.loop))
+        self.sample = None
+        self.loop = False
+
+    @property
+    def playing(self):
+        sample = self.sample
+        if sample is None:
+            return False
+        if self.loop:
+            return True
+        return hal.clock.now() < self.started + getattr(sample, "duration", 0.0)
+
+
+class Mixer:
+    def __init__(self, voice_count=2, buffer_size=1024, channel_count=2, bits_per_sample=16,
+                 samples_signed=True, sample_rate=8000):
+        self.sample_rate = sample_rate
+        self.channel_count = channel_count
+        self.bits_per_sample = bits_per_sample
+        self.events = []  # (t, voz, "play"/"stop", ficheiro, loop)
+        self.voice = tuple(MixerVoice(self, i) for i in range(voice_count))
+        hal.mixers.append(self)
+
+    @property
+    def playing(self):
+        return any(v.playing for v in self.voice)
+
+    def play(self, sample, voice=0, loop=False):
+        self.voice[voice].play(sample, loop)
+
+    def stop_voice(self, voice=0):
+        self.voice[voice].stop()
+
+    def deinit(self):
+        pass
@@ -0,0 +1,41 @@
+# board.py (substituto de host, ver hal.py): pinos do Feather RP2040 Prop-Maker
+from microcontroller import pin as _pin
+
+board_id = "host_prop_maker_feather_rp2040"
+
+# Aliases para os mesmos objetos Pin do microcontroller.pin (como no sabre)
+_ALIASES = {
+    "A0": "GPIO26", "A1": "GPIO27", "A2": "GPIO28", "A3": "GPIO29",
+    "D4": "GPIO4", "D5": "GPIO5", "D6": "GPIO6", "D9": "GPIO9", "D10": "GPIO10",
+    "D11": "GPIO11", "D12": "GPIO12", "D13": "GPIO13", "D24": "GPIO24", "D25": "GPIO25",
+    "SCL": "GPIO3", "SDA": "GPIO2", "I2S_BIT_CLOCK": "GPIO19", "I2S_WORD_SELECT": "GPIO20",
+    "I2S_DATA": "GPIO16", "EXTERNAL_NEOPIXELS": "GPIO14", "EXTERNAL_BUTTON": "GPIO15",
+    "EXTERNAL_POWER": "GPIO23", "ACCELEROMETER_INTERRUPT": "GPIO22", "NEOPIXEL": "GPIO4",
+}
+for _alias, _gpio in _ALIASES.items():
+    _p = getattr(_pin, _gpio)
+    globals()[_alias] = _p
+    # o nome lógico é o que os leitores do hal.py conhecem
+    if _p.name.startswith("GPIO"):
+        _p.name = _alias
+
+
+class _I2C:
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def deinit(self):
+        pass
+
+
+_i2c = None
+
+
+def I2C():
+    global _i2c
+    if _i2c is None:
+        _i2c = _I2C()
+    return _i2c
@@ -0,0 +1,49 @@
+# digitalio.py (substituto de host, ver hal.py)
+import hal
+
+
+class Direction:
+    INPUT = "input"
+    OUTPUT = "output"
+
+
+class Pull:
+    UP = "up"
+    DOWN = "down"
+
+
+class DriveMode:
+    PUSH_PULL = "push_pull"
+    OPEN_DRAIN = "open_drain"
+
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+        self.drive_mode = DriveMode.PUSH_PULL
+
+    def switch_to_output(self, value=False, drive_mode=DriveMode.PUSH_PULL):
+        self.direction = Direction.OUTPUT
+        self.value = value
+
+    def switch_to_input(self, pull=None):
+        self.direction = Direction.INPUT
+        self.pull = pull
+
+    @property
+    def value(self):
+        if self.direction == Direction.OUTPUT:
+            return hal.pin_outputs.get(self.pin.name, False)
+        return hal.read_pin(self.pin.name)
+
+    @value.setter
+    def value(self, value):
+        value = bool(value)
+        if hal.pin_outputs.get(self.pin.name) != value:
+            hal.scenario.log.append((hal.clock.now(), "%s=%d" % (self.pin.name, value)))
+        hal.pin_outputs[self.pin.name] = value
+
+    def deinit(self):
+        pass
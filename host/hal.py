@@ -0,0 +1,208 @@
+# hal.py
+# Estado partilhado pelos substitutos de host (board, neopixel, audiomixer,
+# adafruit_lis3dh, ...) desta pasta: relógio virtual, cenário (botão,
+# clashes, bateria) e traço do acelerómetro. No sabre estes módulos não
+# existem e o code.py importa os verdadeiros; no PC tools/run_host.py põe
+# host/ à frente no sys.path e o code.py corre sem alterações.
+#
+# Relógio virtual: time.sleep() avança o relógio sem esperar; o tempo de
+# CPU do code.py conta, multiplicado por cpu_scale (o RP2040 é bem mais
+# lento que um PC); o trabalho dos próprios substitutos (gravar frames,
+# gerar amostras) não conta, e o custo de hardware (ex.: show() no fio dos
+# LEDs) é somado com charge().
+import math
+import time
+
+_perf = time.perf_counter
+
+
+class HostStop(BaseException):
+    """Fim da simulação; BaseException para não ser apanhada por except Exception."""
+
+
+class VirtualClock:
+    def __init__(self, start=0.5, cpu_scale=1.0, limit=None):
+        self.start = start
+        self.cpu_scale = cpu_scale
+        self.limit = limit  # segundos virtuais até HostStop
+        self.slept = 0.0
+        self.charged = 0.0
+        self._perf0 = _perf()
+        self._excluded = 0.0
+        self._pause_depth = 0
+        self._pause_t0 = 0.0
+
+    def now(self):
+        perf = self._pause_t0 if self._pause_depth else _perf()
+        cpu = (perf - self._perf0 - self._excluded) * self.cpu_scale
+        t = self.start + cpu + self.slept + self.charged
+        if self.limit is not None and t >= self.limit and not self._pause_depth:
+            raise HostStop()
+        return t
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.slept += seconds
+        self.now()
+
+    def charge(self, seconds):
+        """Tempo gasto pelo hardware (não pelo CPU)."""
+        self.charged += seconds
+
+    def pause(self):
+        if not self._pause_depth:
+            self._pause_t0 = _perf()
+        self._pause_depth += 1
+
+    def resume(self):
+        self._pause_depth -= 1
+        if not self._pause_depth:
+            self._excluded += _perf() - self._pause_t0
+
+    def paused(self):
+        return _Paused(self)
+
+
+class _Paused:
+    def __init__(self, clock):
+        self.clock = clock
+
+    def __enter__(self):
+        self.clock.pause()
+
+    def __exit__(self, *exc):
+        self.clock.resume()
+
+
+clock = VirtualClock()
+
+
+def monotonic():
+    return clock.now()
+
+
+def monotonic_ns():
+    return int(clock.now() * 1_000_000_000)
+
+
+def sleep(seconds):
+    clock.sleep(seconds)
+
+
+class Scenario:
+    """
+    Eventos no tempo virtual:
+      click (count cliques curtos), hold (botão premido duration s),
+      clash (clique do LIS3DH), swing (pico de peak m/s² durante duration s),
+      battery (tensão da bateria).
+    """
+    CLICK_DOWN = 0.08
+    CLICK_GAP = 0.12  # abaixo do short_duration_ms (200) do debouncer
+
+    def __init__(self, events=()):
+        self.presses = []  # (início, fim) com o botão em baixo
+        self.taps = []
+        self.swings = []  # (início, duração, pico)
+        self.battery = [(0.0, 3.9)]
+        self.log = []  # (t, texto): eventos relevantes para o relatório
+        for event in events:
+            self.add(event)
+
+    def add(self, event):
+        t = float(event["t"])
+        kind = event["event"]
+        if kind == "click":
+            for i in range(int(event.get("count", 1))):
+                start = t + i * (self.CLICK_DOWN + self.CLICK_GAP)
+                self.presses.append((start, start + self.CLICK_DOWN))
+        elif kind == "hold":
+            self.presses.append((t, t + float(event.get("duration", 1.2))))
+        elif kind == "clash":
+            self.taps.append(t)
+        elif kind == "swing":
+            self.swings.append((t, float(event.get("duration", 0.3)), float(event.get("peak", 20.0))))
+        elif kind == "battery":
+            self.battery.append((t, float(event["volts"])))
+            self.battery.sort()
+        else:
+            raise ValueError("evento desconhecido: %s" % kind)
+
+    def button_down(self, t):
+        for start, end in self.presses:
+            if start <= t < end:
+                return True
+        return False
+
+    def battery_volts(self, t):
+        volts = self.battery[0][1]
+        for start, value in self.battery:
+            if start <= t:
+                volts = value
+        return volts
+
+    def taps_between(self, t0, t1):
+        return [t for t in self.taps if t0 < t <= t1]
+
+    def swing_accel(self, t):
+        """Aceleração extra (x, y, z) em m/s² dos swings do cenário no instante t."""
+        x = y = z = 0.0
+        for start, duration, peak in self.swings:
+            if start <= t < start + duration:
+                phase = (t - start) / duration
+                a = peak * math.sin(math.pi * phase)
+                x += a * math.cos(2 * math.pi * phase)
+                z += a * math.sin(2 * math.pi * phase)
+                y += 0.4 * a
+        return x, y, z
+
+
+scenario = Scenario()
+# Traço do acelerómetro: lista de (t, x, y, z) em m/s², ordenada por t, ou
+# None para a lâmina parada na vertical (mais os swings do cenário)
+accel_trace = None
+GRAVITY = (0.0, 9.806, 0.0)
+
+
+def accel_at(t):
+    if accel_trace:
+        # amostra mais recente até t (o traço é gravado ao ritmo do ODR)
+        lo, hi = 0, len(accel_trace) - 1
+        if t <= accel_trace[0][0]:
+            base = accel_trace[0][1:]
+        elif t >= accel_trace[hi][0]:
+            base = accel_trace[hi][1:]
+        else:
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if accel_trace[mid][0] <= t:
+                    lo = mid
+                else:
+                    hi = mid
+            base = accel_trace[lo][1:]
+    else:
+        base = GRAVITY
+    sx, sy, sz = scenario.swing_accel(t)
+    return base[0] + sx, base[1] + sy, base[2] + sz
+
+
+# Pinos: nome -> função que devolve o nível lido (True = alto)
+pin_readers = {}
+# Saídas escritas pelo code.py (ex.: EXTERNAL_POWER), nome -> valor
+pin_outputs = {}
+
+
+def read_pin(name):
+    reader = pin_readers.get(name)
+    if reader is None:
+        return pin_outputs.get(name, True)  # entradas com pull-up
+    return reader()
+
+
+pin_readers["EXTERNAL_BUTTON"] = lambda: not scenario.button_down(clock.now())
+pin_readers["D13"] = lambda: True
+
+
+# Registos para o relatório do tools/run_host.py
+pixels = []  # instâncias de neopixel.NeoPixel
+mixers = []  # instâncias de audiomixer.Mixer
+accelerometers = []
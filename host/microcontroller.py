@@ -0,0 +1,37 @@
+# microcontroller.py (substituto de host, ver hal.py)
+
+
+class Pin:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "board." + self.name
+
+
+class _Pins:
+    pass
+
+
+pin = _Pins()
+for _name in ("GPIO0", "GPIO1", "GPIO2", "GPIO3", "GPIO4", "GPIO5", "GPIO6", "GPIO7", "GPIO8",
+              "GPIO9", "GPIO10", "GPIO11", "GPIO12", "GPIO13", "GPIO14", "GPIO15", "GPIO16",
+              "GPIO17", "GPIO18", "GPIO19", "GPIO20", "GPIO21", "GPIO22", "GPIO23", "GPIO24",
+              "GPIO25", "GPIO26", "GPIO27", "GPIO28", "GPIO29"):
+    setattr(pin, _name, Pin(_name))
+
+
+class _Cpu:
+    frequency = 125_000_000
+    temperature = 30.0
+    voltage = 3.3
+
+
+cpu = _Cpu()
+# NVM "apagada" (0xFF): o user_settings importa o settings.json na primeira vez
+nvm = bytearray(b"\xff" * 8192)
+
+
+def reset():
+    import hal
+    raise hal.HostStop()
@@ -0,0 +1,92 @@
+# neopixel.py (substituto de host, ver hal.py): guarda cada frame mostrado
+# (bytes RGB já com o brilho, como sai no fio) e o instante do show(). O
+# tempo de envio no fio (~30 µs por LED a 800 kHz) é somado ao relógio.
+import hal
+
+RGB = "RGB"
+GRB = "GRB"
+RGBW = "RGBW"
+GRBW = "GRBW"
+
+WIRE_TIME_PER_PIXEL = 24 / 800_000
+LATCH_TIME = 0.00008
+
+
+class NeoPixel:
+    def __init__(self, pin, n, *, bpp=3, brightness=1.0, auto_write=True, pixel_order=None):
+        self.pin = pin
+        self.n = n
+        self.auto_write = auto_write
+        self.brightness = brightness
+        self._buf = bytearray(n * 3)
+        self.shows = []  # instantes (tempo virtual) de cada show()
+        self.frames = []  # bytes de cada frame, se record
+        self.record = True
+        self.max_frames = None
+        hal.pixels.append(self)
+
+    def __len__(self):
+        return self.n
+
+    def _set(self, i, color):
+        if isinstance(color, int):
+            color = ((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF)
+        j = i * 3
+        self._buf[j] = int(color[0])
+        self._buf[j + 1] = int(color[1])
+        self._buf[j + 2] = int(color[2])
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            indices = range(*index.indices(self.n))
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                # frame RGB empacotado (pixels[:] = bytearray)
+                if len(value) != len(indices) * 3:
+                    raise ValueError("buffer com tamanho errado")
+                if index.step in (None, 1):
+                    start = indices.start * 3 if len(indices) else 0
+                    self._buf[start:start + len(value)] = value
+                else:
+                    for k, i in enumerate(indices):
+                        self._buf[i * 3:i * 3 + 3] = value[k * 3:k * 3 + 3]
+            else:
+                for i, color in zip(indices, value):
+                    self._set(i, color)
+        else:
+            if index < 0:
+                index += self.n
+            if not 0 <= index < self.n:
+                raise IndexError("pixel fora da fita")
+            self._set(index, value)
+        if self.auto_write:
+            self.show()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.n))]
+        j = index * 3
+        return (self._buf[j], self._buf[j + 1], self._buf[j + 2])
+
+    def fill(self, color):
+        for i in range(self.n):
+            self._set(i, color)
+        if self.auto_write:
+            self.show()
+
+    def show(self):
+        clock = hal.clock
+        clock.pause()
+        try:
+            self.shows.append(clock.now())
+            if self.record and (self.max_frames is None or len(self.frames) < self.max_frames):
+                b = self.brightness
+                if b >= 1.0:
+                    self.frames.append(bytes(self._buf))
+                else:
+                    self.frames.append(bytes(int(v * b) for v in self._buf))
+        finally:
+            clock.resume()
+        clock.charge(self.n * WIRE_TIME_PER_PIXEL + LATCH_TIME)
+
+    def deinit(self):
+        pass
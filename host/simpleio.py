@@ -0,0 +1,8 @@
+# simpleio.py (substituto de host, ver hal.py): só o que o code.py usa
+
+
+def map_range(x, in_min, in_max, out_min, out_max):
+    mapped = (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
+    if out_min <= out_max:
+        return max(min(mapped, out_max), out_min)
+    return min(max(mapped, out_max), out_min)
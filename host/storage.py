@@ -0,0 +1,7 @@
+# storage.py (substituto de host, ver hal.py): as escritas vão para a
+# pasta temporária do tools/run_host.py, o repositório não é alterado
+import hal
+
+
+def remount(mount_path, readonly=False, disable_concurrent_write_protection=False):
+    hal.scenario.log.append((hal.clock.now(), "remount %s ro=%s" % (mount_path, readonly)))
@@ -0,0 +1,20 @@
+# supervisor.py (substituto de host, ver hal.py)
+import hal
+
+
+class _Runtime:
+    usb_connected = False
+    serial_connected = True
+    serial_bytes_available = 0
+    autoreload = False
+
+
+runtime = _Runtime()
+
+
+def ticks_ms():
+    return int(hal.clock.now() * 1000) & ((1 << 29) - 1)
+
+
+def reload():
+    raise hal.HostStop()
@@ -0,0 +1,108 @@
+# idle_player.py
+# Animação idle do modo 1 (leds.bin do pack). Um único BinAnimation em
+# loop: abre o ficheiro em enter() (ao ligar ou trocar de pack) e fecha-o
+# em exit() (ao desligar). Entre os dois, cada volta é um seek para o
+# início; hit/blast/swing/lockup continuam a mesma animação por baixo do
+# overlay, sem reabrir nada nem recomeçar do frame 0.
+#
+# crossfade: nos primeiros N frames de cada volta o frame novo mistura-se
+# com o último da volta anterior (0 = corte seco, como o .bin foi feito).
+from bin_animation import BinAnimation
+from color import ONE
+
+
+class IdlePlayer:
+    def __init__(self, num_pixels, crossfade=0, adaptive=False):
+        self.num_pixels = num_pixels
+        self.crossfade = crossfade
+        self.adaptive = adaptive
+        self.anim = None
+        self.segment = None
+        self.wrapped = False  # True se o último frame começou uma volta nova
+        self.pass_dropped = 0  # frames saltados na volta que acabou
+        self._dropped_mark = 0
+        # com crossfade: _prev guarda a saída anterior e _hold o último
+        # frame da volta anterior (trocam de papel a cada volta, sem alocar)
+        self._prev = bytearray(num_pixels * 3) if crossfade else None
+        self._hold = bytearray(num_pixels * 3) if crossfade else None
+        self._fade = 0
+
+    @property
+    def active(self):
+        return self.anim is not None
+
+    @property
+    def new_frame(self):
+        return self.anim is not None and self.anim.new_frame
+
+    # Tint e brilho vão direto para o BinAnimation (tabelas de lookup)
+    @property
+    def tint(self):
+        return self.anim.tint
+
+    @tint.setter
+    def tint(self, value):
+        self.anim.tint = value
+
+    @property
+    def brightness(self):
+        return self.anim.brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        self.anim.brightness = value
+
+    def enter(self, segment, tint):
+        """
+        Começa o idle do segmento leds. Se o .bin já está aberto continua
+        onde estava e devolve False; True quando abriu o ficheiro (frame 0).
+        """
+        if self.anim is not None and self.segment.bin == segment.bin:
+            self.anim.tint = tint
+            self.segment = segment
+            return False
+        self.exit()
+        self.anim = BinAnimation(segment.bin, self.num_pixels, tint, segment.frame_time, 0,
+                                 adaptive=self.adaptive, loop=True)
+        self.segment = segment
+        self._fade = 0
+        self._dropped_mark = 0
+        return True
+
+    def exit(self):
+        """Fecha o ficheiro (lâmina desligada ou pack sem leds.bin)."""
+        if self.anim is not None:
+            self.anim.file.close()
+        self.anim = None
+        self.segment = None
+        self.wrapped = False
+
+    def next_frame_into(self, frame):
+        anim = self.anim
+        if anim is None:
+            return False
+        prev = self._prev
+        if prev is not None:
+            prev[:] = frame
+        loops = anim.loops
+        alive = anim.next_frame_into(frame)
+        self.wrapped = anim.loops != loops
+        if self.wrapped:
+            self.pass_dropped = anim.dropped - self._dropped_mark
+            self._dropped_mark = anim.dropped
+        if prev is not None:
+            if self.wrapped:
+                self._prev, self._hold = self._hold, prev
+                self._fade = self.crossfade
+            if self._fade and anim.new_frame:
+                self._blend(frame)
+        return alive
+
+    def _blend(self, frame):
+        # peso do frame antigo desce de crossfade/(crossfade+1) até 1/(crossfade+1)
+        a = ONE * self._fade // (self.crossfade + 1)
+        b = ONE - a
+        hold = self._hold
+        for j in range(len(frame)):
+            frame[j] = (a * hold[j] + b * frame[j]) >> 8
+        self._fade -= 1
@@ -1,59 +1,89 @@
 # ignition.py
+# Ignições procedurais. Cada efeito é um gerador de frames: render(frame, t)
+# desenha o frame completo para o instante t (segundos desde o início) num
+# bytearray RGB, e play_effect() mostra um frame por tick. A duração é fixa,
+# por isso a ignição demora o mesmo com 80 ou 144 LEDs.
 import time
 import math
 
+from color import blend as _blend, blend_into, scale as _scale, scale_into, weight
+
+# Sons das ignições procedurais (tocam na voz 1)
+BLIP_WAV = "/sounds/z_grave.wav"
+EXPL_WAV = "/sounds/0_on.wav"
+_default_sounds = None
+
+# Tempo de um frame (tick do ecrã) durante as ignições
+FRAME_TIME = 0.01
+
 def blend(color1, color2, t):
     """Mistura color1 e color2, t entre 0 (só color1) e 1 (só color2)."""
-    return tuple(int(c1 * (1 - t) + c2 * t) for c1, c2 in zip(color1, color2))
+    return _blend(color1, color2, weight(t))
 
 def almost_white(color, percent_white=0.8):
     """Devolve a cor original puxada para branco (ex: 0.8 = 80% branco)."""
     return blend(color, (255, 255, 255), percent_white)
 
 def scale_color(color, factor):
-    return tuple(min(255, int(c * factor)) for c in color)
+    return _scale(color, weight(factor))
 
-def ignition_explosion(pixels, saber_color, mixer=None, volume=1.0):
-    import audiocore
-    """
-    pixels: objeto NeoPixel já inicializado
-    saber_color: cor principal do sabre (tu podes usar COLORS[SABER_COLOR])
-    """
+def _put(frame, idx, color):
+    j = idx * 3
+    frame[j] = color[0]
+    frame[j + 1] = color[1]
+    frame[j + 2] = color[2]
+
+def _fill(frame, color, start, stop):
+    for idx in range(max(0, start), min(len(frame) // 3, stop)):
+        _put(frame, idx, color)
+
+def _sound_player(mixer, volume, sounds):
+    """Devolve play_cue(nome) a tocar "blip"/"expl" na voz 1 do mixer."""
+    if not mixer:
+        return None
+    if sounds is None:
+        from audio_bank import AudioBank
+        global _default_sounds
+        if _default_sounds is None or _default_sounds.mixer is not mixer:
+            _default_sounds = AudioBank(mixer)
+        sounds = _default_sounds
 
-    # Carrega o som curto grave
-    if mixer:
-        try:
-            blip_wave = audiocore.WaveFile(open("/sounds/z_grave.wav", "rb"))
-            blip_expl = audiocore.WaveFile(open("/sounds/0_on.wav", "rb"))
-        except Exception as e:
-            print("Erro ao carregar som z_grave.wav:", e)
-            blip_wave = None
-    else:
-        blip_wave = None
+    def play_cue(cue):
+        sounds.play_file(BLIP_WAV if cue == "blip" else EXPL_WAV, voice=1, loop=False, level=volume)
 
-    def play_blip():
-        if mixer and blip_wave:
-            try:
-                #mixer.voice[1].stop()
-                mixer.voice[1].play(blip_wave, loop=False)
-                mixer.voice[1].level = volume
-            except Exception as e:
-                print("Erro ao tocar blip:", e)
-    def play_expl():
-        if mixer and blip_expl:
-            try:
-                #mixer.voice[0].stop()
-                mixer.voice[1].play(blip_expl, loop=False)
-                mixer.voice[1].level = volume
-            except Exception as e:
-                print("Erro ao tocar blip:", e)
+    return play_cue
 
-    explosion_color = almost_white(saber_color, percent_white=0.8)
+def play_effect(pixels, effect, play_cue=None, frame_time=FRAME_TIME, tick=None):
+    """
+    Mostra o efeito a um frame por tick até effect.duration. Frames
+    atrasados não atrasam a animação: o próximo frame é calculado para o
+    instante atual. tick (ex.: Scheduler.tick) corre a cada frame, antes da
+    espera pelo próximo, para o botão e o acelerómetro não pararem.
+    """
+    frame = bytearray(len(pixels) * 3)
+    start = time.monotonic()
+    while True:
+        elapsed = time.monotonic() - start
+        cue = effect.render(frame, elapsed)
+        if cue and play_cue:
+            play_cue(cue)
+        pixels[:] = frame
+        pixels.show()
+        if elapsed >= effect.duration:
+            break
+        if tick:
+            tick()
+        next_tick = start + (int(elapsed / frame_time) + 1) * frame_time
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
 
-    NUM_PIXELS = len(pixels)
-    CENTER_IDX = NUM_PIXELS // 2
-    CENTER_BRIGHTNESS = 0.0
 
+class ExplosionIgnition:
+    """
+    Um bloco corre do punho ao centro enquanto o centro carrega (cada volta
+    mais rápida, com um blip), depois a explosão abre do centro às pontas.
+    """
     DELAY_START = 0.02
     DELAY_END = 0.0001
     CENTER_BRIGHTNESS_STEP = 0.02
@@ -61,210 +91,230 @@ def ignition_explosion(pixels, saber_color, mixer=None, volume=1.0):
     MAX_ADVANCING = 6
     CYCLES_PER_INCREMENT = 3
     CENTER_MAX_WIDTH = 7
+    SHOW_TIME = 0.0024  # peso de um show() na curva original (80 LEDs)
 
-    pixels.fill((0, 0, 0))
-    pixels.show()
+    def __init__(self, num_pixels, saber_color, charge_time=8.0, burst_time=0.3):
+        self.num_pixels = num_pixels
+        self.center = num_pixels // 2
+        self.saber_color = saber_color
+        self.explosion_color = almost_white(saber_color, percent_white=0.8)
+        # cores do centro e dos lados, recalculadas por frame sem alocar
+        self._center_color = bytearray(3)
+        self._side_color = bytearray(3)
+        self.charge_time = charge_time
+        self.burst_time = burst_time
+        self.duration = charge_time + burst_time
+        self._last_cycle = -1
+        self._burst_started = False
+        # Curva de tempo das voltas: cada volta pesa o que pesava no loop
+        # original (delay exponencial + show por passo), normalizada para
+        # charge_time. Calculada uma vez por ignição.
+        brightness = []
+        advancing = []
+        weights = []
+        center_brightness = 0.0
+        advancing_multiple = 1
+        gradual_increase = False
+        cycles_since_increment = 0
+        while center_brightness < self.THRESHOLD:
+            progress = center_brightness / self.THRESHOLD
+            delay = self.DELAY_START * math.exp(-9 * progress) + self.DELAY_END * (1 - math.exp(-9 * progress))
+            if delay <= self.DELAY_END + 0.0001:
+                gradual_increase = True
+            brightness.append(center_brightness)
+            advancing.append(advancing_multiple)
+            weights.append((delay + self.SHOW_TIME) / advancing_multiple)
+            center_brightness = min(self.THRESHOLD, center_brightness + self.CENTER_BRIGHTNESS_STEP)
+            if gradual_increase and advancing_multiple < self.MAX_ADVANCING:
+                cycles_since_increment += 1
+                if cycles_since_increment >= self.CYCLES_PER_INCREMENT:
+                    advancing_multiple += 1
+                    cycles_since_increment = 0
+        total = sum(weights)
+        ends = []
+        acc = 0.0
+        for w in weights:
+            acc += w
+            ends.append(acc / total * charge_time)
+        self._brightness = brightness
+        self._advancing = advancing
+        self._ends = ends
+        # primeira volta em que os lados do centro começam a acender
+        self._side_start = len(brightness)
+        for k, cb in enumerate(brightness):
+            if cb >= 0.4:
+                self._side_start = k
+                break
 
-    advancing_multiple = 1
-    gradual_increase = False
-    cycles_since_increment = 0
+    def _cycle_at(self, t):
+        k = self._last_cycle if self._last_cycle > 0 else 0
+        ends = self._ends
+        if t < (ends[k - 1] if k > 0 else 0):
+            k = 0
+        while k < len(ends) - 1 and t >= ends[k]:
+            k += 1
+        return k
 
-    side_brightness = 0.0
-    SIDE_BRIGHTNESS_STEP = CENTER_BRIGHTNESS_STEP
-    side_start = False
+    def render(self, frame, t):
+        saber_color = self.saber_color
+        num_pixels = self.num_pixels
+        center = self.center
+        cue = None
+        if t >= self.duration:
+            _fill(frame, saber_color, 0, num_pixels)
+            return cue
+        if t >= self.charge_time:
+            # Explosão: frente quase branca a abrir do centro para as pontas
+            if not self._burst_started:
+                self._burst_started = True
+                cue = "expl"
+            d = int((t - self.charge_time) / self.burst_time * (num_pixels - center))
+            _fill(frame, (0, 0, 0), 0, num_pixels)
+            _fill(frame, saber_color, center - d + 1, center + d)
+            _fill(frame, self.explosion_color, center - d, center - d + 1)
+            _fill(frame, self.explosion_color, center + d, center + d + 1)
+            return cue
 
-    while CENTER_BRIGHTNESS < THRESHOLD:
-        progress = CENTER_BRIGHTNESS / THRESHOLD
-        delay = DELAY_START * math.exp(-9 * progress) + DELAY_END * (1 - math.exp(-9 * progress))
-        if delay <= DELAY_END + 0.0001:
-            gradual_increase = True
-        if not side_start and CENTER_BRIGHTNESS >= 0.4:
-            side_start = True
-            side_brightness = 0.0
-        play_blip() 
-        i = 0
-        while i <= CENTER_IDX:
-           
-            if i - advancing_multiple >= 0:
-                for j in range(i - advancing_multiple, i):
-                    if 0 <= j < NUM_PIXELS:
-                        pixels[j] = (0, 0, 0)
-            for j in range(i, i + advancing_multiple):
-                if 0 <= j < NUM_PIXELS:
-                    pixels[j] = saber_color
+        k = self._cycle_at(t)
+        if k != self._last_cycle:
+            self._last_cycle = k
+            cue = "blip"
+        start = self._ends[k - 1] if k > 0 else 0.0
+        frac = (t - start) / (self._ends[k] - start)
+        cb = self._brightness[k]
+        adv = self._advancing[k]
 
-            center_width = 1 + int((CENTER_BRIGHTNESS / THRESHOLD) * (CENTER_MAX_WIDTH - 1))
-            half_width = center_width // 2
+        _fill(frame, (0, 0, 0), 0, num_pixels)
+        # bloco que corre do punho até ao centro
+        i = int(frac * (center + 1) / adv) * adv
+        _fill(frame, saber_color, i, i + adv)
 
-            for k in range(-half_width, half_width + 1):
-                idx = CENTER_IDX + k
-                if 0 <= idx < NUM_PIXELS:
-                    if k == 0 or (center_width % 2 == 0 and k == -1):
-                        if CENTER_BRIGHTNESS < 0.4:
-                            factor = CENTER_BRIGHTNESS / 0.4
-                            pixels[idx] = scale_color(saber_color, factor)
-                        else:
-                            blend_t = (CENTER_BRIGHTNESS - 0.4) / (THRESHOLD - 0.4)
-                            blend_t = min(1.0, max(0.0, blend_t))
-                            pixels[idx] = scale_color(blend(saber_color, explosion_color, blend_t), 0.4)
-                    else:
-                        if not side_start:
-                            pixels[idx] = (0, 0, 0)
-                        else:
-                            if side_brightness < 0.4:
-                                factor = side_brightness / 0.4
-                                pixels[idx] = scale_color(saber_color, factor)
-                            else:
-                                factor = min(1.0, (side_brightness - 0.4) / (THRESHOLD - 0.4) * (1.0 - 0.4) + 0.4)
-                                pixels[idx] = scale_color(saber_color, factor)
-            
-            pixels.show()
-            if delay > 0:
-                time.sleep(delay)
-            i += advancing_multiple
-        
-        CENTER_BRIGHTNESS = min(THRESHOLD, CENTER_BRIGHTNESS + CENTER_BRIGHTNESS_STEP)
-        if side_start:
-            if side_brightness < THRESHOLD:
-                side_brightness = min(THRESHOLD, side_brightness + SIDE_BRIGHTNESS_STEP)
-        if gradual_increase and advancing_multiple < MAX_ADVANCING:
-            cycles_since_increment += 1
-            if cycles_since_increment >= CYCLES_PER_INCREMENT:
-                advancing_multiple += 1
-                cycles_since_increment = 0
-    play_expl()
-    for j in range(CENTER_IDX, NUM_PIXELS):
-        if j < NUM_PIXELS:
-            pixels[j] = explosion_color
-            if j-1 >= 0:
-                pixels[j-1] = saber_color
-        mirror = CENTER_IDX - (j - CENTER_IDX)
-        if 0 <= mirror < NUM_PIXELS:
-            pixels[mirror] = explosion_color
-            if mirror+1 < NUM_PIXELS:
-                pixels[mirror+1] = saber_color
-        pixels.show()
-        time.sleep(0.005)
+        center_width = 1 + int((cb / self.THRESHOLD) * (self.CENTER_MAX_WIDTH - 1))
+        half_width = center_width // 2
+        side_color = self._side_color
+        if k >= self._side_start:
+            side_brightness = min(self.THRESHOLD, (k - self._side_start) * self.CENTER_BRIGHTNESS_STEP)
+            if side_brightness < 0.4:
+                factor = side_brightness / 0.4
+            else:
+                factor = min(1.0, (side_brightness - 0.4) / (self.THRESHOLD - 0.4) * (1.0 - 0.4) + 0.4)
+            _put(side_color, 0, saber_color)
+            scale_into(side_color, 0, weight(factor))
+        else:
+            _put(side_color, 0, (0, 0, 0))
+        center_color = self._center_color
+        if cb < 0.4:
+            _put(center_color, 0, saber_color)
+            scale_into(center_color, 0, weight(cb / 0.4))
+        else:
+            blend_t = min(1.0, max(0.0, (cb - 0.4) / (self.THRESHOLD - 0.4)))
+            blend_into(center_color, 0, saber_color, self.explosion_color, weight(blend_t))
+            scale_into(center_color, 0, weight(0.4))
+        for offset in range(-half_width, half_width + 1):
+            idx = center + offset
+            if 0 <= idx < num_pixels:
+                if offset == 0 or (center_width % 2 == 0 and offset == -1):
+                    _put(frame, idx, center_color)
+                else:
+                    _put(frame, idx, side_color)
+        return cue
 
-    pixels.fill(saber_color)
-    pixels.show()
 
-def ignition_scan(pixels, saber_color, mixer=None, volume=1.0, final=False):
-    import time
-    import audiocore
-    if mixer:
-        try:
-            blip_wave = audiocore.WaveFile(open("/sounds/z_grave.wav", "rb"))
-            blip_expl = audiocore.WaveFile(open("/sounds/0_on.wav", "rb"))
-        except Exception as e:
-            print("Erro ao carregar som z_grave.wav:", e)
-            blip_wave = None
-    else:
-        blip_wave = None
+class ScanIgnition:
+    """Fóton quase branco de 10 LEDs do punho à ponta, cor do sabre atrás."""
+    TRAIL = 10
 
-    def play_blip():
-        if mixer and blip_wave:
-            try:
-                #mixer.voice[1].stop()
-                mixer.voice[1].play(blip_wave, loop=False)
-                mixer.voice[1].level = volume
-            except Exception as e:
-                print("Erro ao tocar blip:", e)
-    def play_expl():
-        if mixer and blip_expl:
-            try:
-                #mixer.voice[0].stop()
-                mixer.voice[1].play(blip_expl, loop=False)
-                mixer.voice[1].level = volume
-            except Exception as e:
-                print("Erro ao tocar blip:", e)
-    
-    explosion_color = almost_white(saber_color, percent_white=0.5)
-    NUM_PIXELS = len(pixels)
-    if final is False:
-        # Limpa todos os LEDs antes de iniciar o scan
-        pixels.fill((0, 0, 0))
-        pixels.show()
-    play_expl()
-    # "Fóton" vai do punho (0) até a ponta (NUM_PIXELS-1)
-    for i in range(NUM_PIXELS):
-        # Preenche atrás do fóton com a cor do sabre
-        if i > 9:
-            pixels[i - 10] = saber_color
-        # Acende o fóton (branco) na posição atual
-        pixels[i] = (explosion_color)
-#        pixels.show()
-#        play_blip()
-        # Após o blip, pinta o fóton com a cor do sabre
-        pixels.show()
-        time.sleep(0.001)
+    def __init__(self, num_pixels, saber_color, duration=0.3):
+        self.num_pixels = num_pixels
+        self.saber_color = saber_color
+        self.explosion_color = almost_white(saber_color, percent_white=0.5)
+        self.duration = duration
+        self._started = False
+
+    def render(self, frame, t, clear=True):
+        cue = None
+        if not self._started:
+            self._started = True
+            cue = "expl"
+        num_pixels = self.num_pixels
+        if t >= self.duration:
+            _fill(frame, self.saber_color, 0, num_pixels)
+            return cue
+        i = int(t / self.duration * num_pixels)
+        if clear:
+            _fill(frame, (0, 0, 0), i + 1, num_pixels)
+        _fill(frame, self.saber_color, 0, i - self.TRAIL + 1)
+        _fill(frame, self.explosion_color, i - self.TRAIL + 1, i + 1)
+        return cue
 
-    # Garante que todos os LEDs estejam acesos ao final
-    pixels.fill(saber_color)
-    pixels.show()
 
-def ignition_reverse_scan_with_photons(pixels, saber_color, mixer=None, volume=1.0):
-    import time
-    import audiocore
-    if mixer:
-        try:
-            blip_wave = audiocore.WaveFile(open("/sounds/z_grave.wav", "rb"))
-            blip_expl = audiocore.WaveFile(open("/sounds/0_on.wav", "rb"))
-        except Exception as e:
-            print("Erro ao carregar som z_grave.wav:", e)
-            blip_wave = None
-    else:
-        blip_wave = None
+class ReverseScanIgnition:
+    """
+    Fótons saem do punho e empilham-se a partir da ponta (um blip por
+    fóton), a perder brilho ao subir; no fim um scan acende a lâmina.
+    """
+    def __init__(self, num_pixels, saber_color, stack_time=2.0, scan_time=0.3):
+        self.num_pixels = num_pixels
+        self.saber_color = saber_color
+        self.explosion_color = almost_white(saber_color, percent_white=0.5)
+        self._photon_color = bytearray(3)
+        self.stack_time = stack_time
+        self.duration = stack_time + scan_time
+        self.scan = ScanIgnition(num_pixels, saber_color, scan_time)
+        # Cada passagem k lança um fóton de 2 em 2 LEDs até scan_idx
+        self._passes = []  # (primeiro passo global, scan_idx, passos)
+        total = 0
+        scan_idx = num_pixels - 1
+        while scan_idx >= 0:
+            steps = (scan_idx + 1) // 2
+            self._passes.append((total, scan_idx, steps))
+            total += steps
+            scan_idx -= 2
+        self._total_steps = max(1, total)
+        self._last_pass = -1
 
-    def play_blip():
-        if mixer and blip_wave:
-            try:
-                #mixer.voice[1].stop()
-                mixer.voice[1].play(blip_wave, loop=False)
-                mixer.voice[1].level = volume
-            except Exception as e:
-                print("Erro ao tocar blip:", e)
-    def play_expl():
-        if mixer and blip_expl:
-            try:
-                #mixer.voice[0].stop()
-                mixer.voice[1].play(blip_expl, loop=False)
-                mixer.voice[1].level = volume
-            except Exception as e:
-                print("Erro ao tocar blip:", e)
-    explosion_color = almost_white(saber_color, percent_white=0.5)
-    NUM_PIXELS = len(pixels)
-    pixels.fill((0, 0, 0))
-    pixels.show()
+    def render(self, frame, t):
+        num_pixels = self.num_pixels
+        if t >= self.stack_time:
+            return self.scan.render(frame, t - self.stack_time, clear=False)
+        step = int(t / self.stack_time * self._total_steps)
+        k = 0
+        while k < len(self._passes) - 1 and step >= self._passes[k + 1][0]:
+            k += 1
+        cue = None
+        if k != self._last_pass:
+            self._last_pass = k
+            cue = "blip"
+        first, scan_idx, steps = self._passes[k]
+        photon = 2 * min(step - first, max(0, steps - 1))
+        # o brilho global caía 1% por LED do fóton (em 80 LEDs); aplica-se a
+        # todo o frame, proporcional ao comprimento da lâmina
+        color = self._photon_color
+        _put(color, 0, self.explosion_color)
+        scale_into(color, 0, weight(1.0 - 0.8 * photon / num_pixels))
+        _fill(frame, (0, 0, 0), 0, num_pixels)
+        for j in range(k):
+            # fóton da passagem j ficou parado no último par antes de scan_idx
+            _fill(frame, color, 2 * ((self._passes[j][1] - 1) // 2), 2 * ((self._passes[j][1] - 1) // 2) + 1)
+        if steps:
+            _fill(frame, color, photon, photon + 1)
+        return cue
 
-    scan_idx = NUM_PIXELS - 1  # scan começa na ponta
 
-    DELAY = 0.00  # velocidade constante
+def ignition_explosion(pixels, saber_color, mixer=None, volume=1.0, sounds=None, tick=None):
+    """
+    pixels: objeto NeoPixel já inicializado
+    saber_color: cor principal do sabre (tu podes usar COLORS[SABER_COLOR])
+    sounds: AudioBank partilhado (opcional); os WaveFile são reutilizados
+    tick: chamado a cada frame (ver play_effect)
+    """
+    effect = ExplosionIgnition(len(pixels), saber_color)
+    play_effect(pixels, effect, _sound_player(mixer, volume, sounds), tick=tick)
 
-    while scan_idx >= 0:
-        play_blip()
-        # Lança um fóton do punho
-        photon = 0
-        while photon < scan_idx:
-            # Calcula o fator de brilho (1% a menos por pixel)
-            
-            
-            # Desenha: limpa o anterior do fóton
-            if 0 <= photon - 2 < NUM_PIXELS:
-                pixels[photon - 2] = (0, 0, 0)
-            # Desenha o fóton com brilho reduzido
-            if 0 <= photon < NUM_PIXELS:
-                pixels.brightness = 1.0 - (photon * 0.01)  # reduz brilho a cada pixel
-                pixels[photon] = explosion_color
-            #
-            pixels.show()
-            time.sleep(DELAY)
-            photon += 2
+def ignition_scan(pixels, saber_color, mixer=None, volume=1.0, sounds=None, tick=None):
+    effect = ScanIgnition(len(pixels), saber_color)
+    play_effect(pixels, effect, _sound_player(mixer, volume, sounds), tick=tick)
 
-        # Quando o fóton alcança o scan, recua o scan
-        scan_idx -= 2
-    ignition_scan(pixels, saber_color, mixer, volume, True)
-  #  play_expl()
-    # No final, acende tudo com a cor do sabre
-    pixels.fill(saber_color)
-    pixels.show()
\ No newline at end of file
+def ignition_reverse_scan_with_photons(pixels, saber_color, mixer=None, volume=1.0, sounds=None, tick=None):
+    effect = ReverseScanIgnition(len(pixels), saber_color)
+    play_effect(pixels, effect, _sound_player(mixer, volume, sounds), tick=tick)
@@ -0,0 +1,139 @@
+# media_clock.py
+# Relógio de média para segmentos com .wav e .bin (preon, poweron, ...): o
+# frame a mostrar sai do tempo desde o início do áudio, não de deltas entre
+# frames. Um frame atrasado já não empurra os seguintes: se os LEDs ficam
+# mais de `tolerance` frames atrás, saltam-se frames (drop); se ficam à
+# frente (ex.: latência do áudio em offset), o frame atual fica mais tempo
+# (duplicado). As estatísticas mostram quanto os LEDs se desviam do áudio,
+# para ajustar o frame_time do pack.
+import struct
+import time
+
+
+def wav_duration(path):
+    """Duração em segundos de um WAV PCM (só lê os cabeçalhos), ou None."""
+    try:
+        with open(path, "rb") as f:
+            riff = f.read(12)
+            if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+                return None
+            byte_rate = None
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    return None
+                size = struct.unpack("<I", chunk[4:])[0]
+                if chunk[:4] == b"fmt ":
+                    fmt = f.read(size)
+                    byte_rate = struct.unpack("<I", fmt[8:12])[0]
+                elif chunk[:4] == b"data":
+                    return size / byte_rate if byte_rate else None
+                else:
+                    f.seek(size + (size & 1), 1)
+    except (OSError, struct.error):
+        return None
+
+
+class MediaClock:
+    """
+    frame_time: segundos por frame do .bin.
+    tolerance: frames de atraso aceites antes de saltar frames; dentro da
+    tolerância os frames são todos mostrados (recuperam assim que o loop
+    tiver folga).
+    offset: segundos entre play() e o som sair (buffer de áudio).
+    """
+    def __init__(self, frame_time, tolerance=2, offset=0.0):
+        self.frame_time = frame_time
+        self.tolerance = tolerance
+        self.offset = offset
+        self.start_time = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.shown = 0
+        self.dropped = 0
+        self.duplicated = 0
+        self.late = 0  # frames mostrados depois da sua vez
+        self.max_drift = 0.0
+        self._drift_sum = 0.0
+        self._last_target = None
+        self.end_time = None
+
+    def start(self, now=None):
+        """Chamar logo a seguir ao play() do áudio."""
+        now = time.monotonic() if now is None else now
+        self.start_time = now + self.offset
+        self._reset_stats()
+
+    def elapsed(self, now=None):
+        now = time.monotonic() if now is None else now
+        return now - self.start_time
+
+    def target(self, now=None):
+        """Índice do frame que devia estar nos LEDs agora (-1 antes do início)."""
+        elapsed = self.elapsed(now)
+        if elapsed < 0:
+            return -1
+        return int(elapsed / self.frame_time)
+
+    def advance(self, shown, now=None):
+        """
+        shown: índice do frame nos LEDs (-1 antes do primeiro). Devolve
+        quantos frames avançar: 0 mantém o frame, 1 é o seguinte, n > 1
+        salta n - 1 frames.
+        """
+        now = time.monotonic() if now is None else now
+        target = self.target(now)
+        if target <= shown:
+            # à frente do áudio: conta um duplicado por cada vez perdida
+            if target < shown and target != self._last_target:
+                self.duplicated += 1
+            self._last_target = target
+            return 0
+        self._last_target = target
+        behind = target - shown - 1
+        step = behind + 1 if behind > self.tolerance else 1
+        frame = shown + step
+        drift = now - (self.start_time + frame * self.frame_time)
+        if drift >= self.frame_time:
+            self.late += 1
+        if drift > self.max_drift:
+            self.max_drift = drift
+        self._drift_sum += drift
+        self.dropped += step - 1
+        self.shown += 1
+        return step
+
+    def finish(self, now=None):
+        self.end_time = time.monotonic() if now is None else now
+
+    def stats(self, frames=0, audio_duration=None):
+        """
+        Dicionário com o desvio dos LEDs (ms). Com o número de frames do
+        .bin e a duração do WAV inclui o frame_time que os faria acabar juntos.
+        """
+        stats = {
+            "shown": self.shown,
+            "dropped": self.dropped,
+            "duplicated": self.duplicated,
+            "late": self.late,
+            "mean_drift_ms": round(self._drift_sum / self.shown * 1000, 1) if self.shown else 0.0,
+            "max_drift_ms": round(self.max_drift * 1000, 1),
+        }
+        if self.end_time is not None:
+            stats["duration"] = round(self.end_time - self.start_time, 3)
+        if frames and audio_duration:
+            stats["audio_duration"] = round(audio_duration, 3)
+            stats["led_duration"] = round(frames * self.frame_time, 3)
+            stats["suggested_frame_time_ms"] = round(audio_duration / frames * 1000, 1)
+        return stats
+
+    def report(self, name="", frames=0, wav=None):
+        stats = self.stats(frames, wav_duration(wav) if wav else None)
+        text = "Sync {}: {} frames, {} saltados, {} duplicados, {} atrasados, desvio médio {} ms, máx {} ms".format(
+            name, stats["shown"], stats["dropped"], stats["duplicated"], stats["late"],
+            stats["mean_drift_ms"], stats["max_drift_ms"])
+        if "suggested_frame_time_ms" in stats:
+            text += ", áudio {} s / LEDs {} s -> frame_time {} ms".format(
+                stats["audio_duration"], stats["led_duration"], stats["suggested_frame_time_ms"])
+        return text
@@ -0,0 +1,193 @@
+# motion.py
+# Motor de movimento sobre o LIS3DH. O acelerómetro enche o FIFO a ritmo
+# fixo (ODR) e ativa o INT1 quando o FIFO chega ao watermark ou quando deteta
+# um clique (clash). poll() só fala por I2C com o pino ativo, e lê todas as
+# amostras pendentes numa única transação, por isso os frames não param à
+# espera do sensor e um swing rápido entre duas voltas do loop não se perde.
+#
+# Swing: sem giroscópio, usa-se a aceleração dinâmica (gravidade removida
+# por um filtro passa-baixo, com os três eixos) e o jerk na janela de
+# amostras lidas. Os eventos ficam guardados até serem consumidos, como no
+# LatchedButton. SwingDetector não depende do sensor e corre também no PC
+# (tools/sim_smooth_swing.py).
+import math
+import struct
+import time
+
+_REG_CTRL3 = 0x22
+_REG_CTRL5 = 0x24
+_REG_OUT_X_L = 0x28
+_REG_FIFO_CTRL = 0x2E
+_REG_FIFO_SRC = 0x2F
+
+_CTRL3_I1_CLICK = 0x80
+_CTRL3_I1_WTM = 0x04
+_CTRL5_FIFO_EN = 0x40
+_FIFO_MODE_BYPASS = 0x00
+_FIFO_MODE_STREAM = 0x80
+_FIFO_SIZE = 32
+
+STANDARD_GRAVITY = 9.806
+# LSB por g (valor de 16 bits) para cada gama (RANGE_2_G..RANGE_16_G do
+# adafruit_lis3dh valem 0..3)
+_DIVIDERS = (16380, 8190, 4096, 1365)
+
+ODR = 400  # Hz, o ritmo por omissão do adafruit_lis3dh (as janelas do tap contam nele)
+GRAVITY_ALPHA = 0.02  # filtro da gravidade: ~125 ms a 400 Hz
+SWING_HOLDOFF = 0.25  # s entre dois eventos de swing
+
+
+class SwingDetector:
+    """
+    Características do swing por lote de amostras (m/s²): intensity é o pico
+    da aceleração dinâmica² e jerk a variação na janela do lote.
+    """
+    def __init__(self, swing_threshold=130, odr=ODR):
+        self.odr = odr
+        self.gravity = None
+        self.acceleration = (0.0, 0.0, 0.0)
+        self.intensity = 0.0
+        self.jerk = 0.0
+        self.set_threshold(swing_threshold)
+
+    def set_threshold(self, swing_threshold):
+        self.swing_threshold = swing_threshold
+        # jerk equivalente: chegar à aceleração do limiar em ~50 ms
+        self.jerk_threshold = math.sqrt(swing_threshold) / 0.05
+
+    def feed(self, x, y, z):
+        """Uma amostra; devolve a aceleração dinâmica² (gravidade removida)."""
+        gravity = self.gravity
+        if gravity is None:
+            gravity = self.gravity = [x, y, z]
+        else:
+            gravity[0] += (x - gravity[0]) * GRAVITY_ALPHA
+            gravity[1] += (y - gravity[1]) * GRAVITY_ALPHA
+            gravity[2] += (z - gravity[2]) * GRAVITY_ALPHA
+        dx = x - gravity[0]
+        dy = y - gravity[1]
+        dz = z - gravity[2]
+        return dx * dx + dy * dy + dz * dz
+
+    def end_batch(self, first, last, count, peak):
+        """Fecha um lote; devolve True se o lote é um swing."""
+        self.acceleration = last
+        self.intensity = peak
+        if count > 1:
+            self.jerk = math.sqrt((last[0] - first[0]) ** 2 + (last[1] - first[1]) ** 2
+                                  + (last[2] - first[2]) ** 2) * self.odr / (count - 1)
+        else:
+            self.jerk = 0.0
+        return peak >= self.swing_threshold or self.jerk >= self.jerk_threshold
+
+
+class Motion:
+    """
+    lis3dh: adafruit_lis3dh.LIS3DH_I2C já configurado (gama).
+    int1: DigitalInOut do ACCELEROMETER_INTERRUPT.
+    swing_threshold: aceleração dinâmica ao quadrado ((m/s²)²) para swing.
+    clash_threshold: limiar do clique do LIS3DH (set_tap).
+    """
+    def __init__(self, lis3dh, int1, swing_threshold=130, clash_threshold=100, watermark=10):
+        self.lis3dh = lis3dh
+        self.int1 = int1
+        self.watermark = min(watermark, _FIFO_SIZE - 1)
+        self._scale = STANDARD_GRAVITY / _DIVIDERS[lis3dh.range]
+        self._buf = bytearray(_FIFO_SIZE * 6)
+        self._addr = bytes((_REG_OUT_X_L | 0x80,))  # bit 7: auto-incremento
+        self.detector = SwingDetector(swing_threshold)
+        self._last_read = 0
+        self._last_swing = -SWING_HOLDOFF
+        self.samples = 0
+        self.overruns = 0
+        self._clash = False
+        self._swing = False
+        import adafruit_lis3dh
+        lis3dh.data_rate = adafruit_lis3dh.DATARATE_400_HZ
+        self.configure(swing_threshold, clash_threshold)
+        self._start_fifo()
+
+    # último lote lido (ver SwingDetector)
+    @property
+    def acceleration(self):
+        return self.detector.acceleration
+
+    @property
+    def intensity(self):
+        return self.detector.intensity
+
+    @property
+    def jerk(self):
+        return self.detector.jerk
+
+    def configure(self, swing_threshold, clash_threshold):
+        self.detector.set_threshold(swing_threshold)
+        # set_tap reescreve o CTRL_REG3; volta a ligar o watermark no INT1
+        self.lis3dh.set_tap(1, clash_threshold)
+        self._write(_REG_CTRL3, _CTRL3_I1_CLICK | _CTRL3_I1_WTM)
+
+    def _read(self, reg):
+        return self.lis3dh._read_register_byte(reg)
+
+    def _write(self, reg, value):
+        self.lis3dh._write_register_byte(reg, value)
+
+    def _start_fifo(self):
+        # bypass limpa o FIFO; depois modo stream com o watermark no FTH
+        self._write(_REG_FIFO_CTRL, _FIFO_MODE_BYPASS)
+        self._write(_REG_CTRL5, self._read(_REG_CTRL5) | _CTRL5_FIFO_EN)
+        self._write(_REG_FIFO_CTRL, _FIFO_MODE_STREAM | self.watermark)
+
+    def poll(self):
+        """Barato sem interrupção: só lê o pino. Chamar uma vez por volta/tick."""
+        now = time.monotonic()
+        # Sem INT1 (pino não ligado) lê à mesma, ao ritmo do watermark
+        if not self.int1.value and now - self._last_read < 2 * self.watermark / ODR:
+            return
+        self._last_read = now
+        if self.lis3dh.tapped:
+            self._clash = True
+        src = self._read(_REG_FIFO_SRC)
+        count = src & 0x1F
+        if src & 0x40:
+            count = _FIFO_SIZE
+            self.overruns += 1
+        if count:
+            self._read_fifo(count, now)
+
+    def _read_fifo(self, count, now):
+        buf = self._buf
+        with self.lis3dh._i2c as i2c:
+            i2c.write_then_readinto(self._addr, buf, in_end=count * 6)
+        scale = self._scale
+        detector = self.detector
+        peak = 0.0
+        first = None
+        for i in range(count):
+            x, y, z = struct.unpack_from("<hhh", buf, i * 6)
+            x *= scale
+            y *= scale
+            z *= scale
+            dyn = detector.feed(x, y, z)
+            if dyn > peak:
+                peak = dyn
+            if first is None:
+                first = (x, y, z)
+        self.samples += count
+        if detector.end_batch(first, (x, y, z), count, peak) and now - self._last_swing >= SWING_HOLDOFF:
+            self._last_swing = now
+            self._swing = True
+
+    def take_clash(self):
+        clash = self._clash
+        self._clash = False
+        return clash
+
+    def take_swing(self):
+        swing = self._swing
+        self._swing = False
+        return swing
+
+    def clear(self):
+        self._clash = False
+        self._swing = False
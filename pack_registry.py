@@ -0,0 +1,329 @@
+# pack_registry.py
+# Cache dos pack.json em /gfx: cada pack é lido e validado uma única vez e
+# servido como tuplos imutáveis. O loop idle não toca no sistema de ficheiros.
+#
+# Variantes por comprimento de lâmina: os .bin de /gfx/<pack>/ têm a largura
+# indicada em "pixels" no pack.json (80 nos packs antigos). Se o pack tiver
+# "variants": [80, 120, 144], os .bin de cada comprimento estão em
+# /gfx/<pack>/<N>/ com os mesmos nomes (gerados por gfx_bmp2bin/bmp2bin.py).
+#
+# Índice: /gfx/index.json (tools/index_packs.py) guarda o pack.json de cada
+# pack, os tamanhos dos ficheiros e um resumo dos segmentos (frames,
+# duração). Com índice o arranque não lista /gfx nem abre os pack.json; cada
+# pack só custa um stat ao pack.json, para confirmar que o índice está em dia.
+import json
+import os
+from collections import namedtuple
+
+SEGMENTS = ("preon", "poweron", "leds", "poweroff", "pstoff")
+LEGACY_PIXELS = 80  # largura dos .bin sem "pixels" no pack.json
+INDEX_VERSION = 1
+
+# bin/wav já com o caminho completo ("" se não existir), frame_time em
+# segundos, frames: número de frames do .bin (0 se desconhecido, sem índice).
+# Ignições pré-renderizadas (tools/bake_ignitions.py): white é o .bin da
+# camada de branco ("" se não há), brightness o brilho da base (None = o do
+# BinAnimation) e cues os sons por frame, ((frame, nome), ...), para este
+# comprimento de lâmina
+Segment = namedtuple("Segment", ("bin", "wav", "frame_time", "tinting", "frames", "white", "brightness", "cues"))
+# pixels: largura dos frames; folder: pasta dos .bin para este comprimento
+# ("" se o pack não tem frames com a largura da lâmina)
+Pack = namedtuple("Pack", ("name", "found", "pixels", "folder") + SEGMENTS)
+
+
+def _fingerprint(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st[6], st[8])  # tamanho, mtime
+
+
+def _same_fingerprint(current, indexed):
+    # O índice pode ser gerado no PC com o CIRCUITPY montado: o FAT guarda
+    # hora local com resolução de 2 s, por isso aceita-se um desvio de fuso
+    # horário inteiro no mtime. O tamanho tem de ser igual.
+    if not current or not indexed or current[0] != indexed[0]:
+        return False
+    delta = abs(current[1] - indexed[1]) % 3600
+    return delta <= 2 or delta >= 3598
+
+
+def _is_dir(path):
+    try:
+        return bool(os.stat(path)[0] & 0x4000)
+    except OSError:
+        return False
+
+
+def _pack_widths(data):
+    """(subpasta, largura) de cada conjunto de .bin do pack."""
+    try:
+        widths = [("", int(data.get("pixels", LEGACY_PIXELS)))]
+        widths += [(f"{int(n)}/", int(n)) for n in data.get("variants", ())]
+    except (TypeError, ValueError, AttributeError):
+        widths = [("", LEGACY_PIXELS)]
+    return widths
+
+
+def build_index(base_path="/gfx"):
+    """
+    Lê todos os packs de base_path e devolve o dicionário do index.json.
+    Usado pelo tools/index_packs.py no PC e pelo diagnóstico (DIAG) no sabre.
+    """
+    from media_clock import wav_duration
+
+    packs = {}
+    for name in sorted(os.listdir(base_path)):
+        pack_path = f"{base_path}/{name}"
+        if not _is_dir(pack_path):
+            continue
+        fingerprint = _fingerprint(f"{pack_path}/pack.json")
+        try:
+            with open(f"{pack_path}/pack.json", "r") as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                data = {}
+        except (OSError, ValueError):
+            data = {}
+        files = {}
+        for entry in os.listdir(pack_path):
+            if _is_dir(f"{pack_path}/{entry}"):
+                for sub in os.listdir(f"{pack_path}/{entry}"):
+                    files[f"{entry}/{sub}"] = os.stat(f"{pack_path}/{entry}/{sub}")[6]
+            else:
+                files[entry] = os.stat(f"{pack_path}/{entry}")[6]
+        summary = {}
+        for sub, width in _pack_widths(data):
+            segments = {}
+            for key in SEGMENTS:
+                raw = data.get(key)
+                if not isinstance(raw, dict) or not (raw.get("bin") or raw.get("wav")):
+                    continue
+                bin_size = files.get(sub + raw["bin"]) if raw.get("bin") else None
+                frames = bin_size // (width * 3) if bin_size else 0
+                frame_time = raw.get("frame_time", 25)
+                wav_size = files.get(raw["wav"]) if raw.get("wav") else None
+                segments[key] = {
+                    "bin": sub + raw["bin"] if raw.get("bin") else "",
+                    "wav": raw.get("wav") or "",
+                    "frames": frames,
+                    "frame_size": width * 3,
+                    "duration": round(frames * frame_time / 1000, 3),
+                    "bin_size": bin_size,
+                    "wav_size": wav_size,
+                    "wav_duration": wav_duration(f"{pack_path}/{raw['wav']}") if wav_size else None,
+                }
+            summary[str(width)] = segments
+        packs[name] = {
+            "json": list(fingerprint) if fingerprint else None,
+            "pack": data,
+            "files": files,
+            "segments": summary,
+        }
+    return {"version": INDEX_VERSION, "packs": packs}
+
+
+def describe_index(index):
+    """Linhas legíveis do índice, com os ficheiros em falta assinalados."""
+    for name, entry in index["packs"].items():
+        yield f"{name}: pack.json {'OK' if entry['json'] else 'NÃO ENCONTRADO'}"
+        for width, segments in entry["segments"].items():
+            for key, seg in segments.items():
+                bin_state = "" if not seg["bin"] else ("OK" if seg["bin_size"] else "NÃO ENCONTRADO")
+                wav_state = "" if not seg["wav"] else ("OK" if seg["wav_size"] else "NÃO ENCONTRADO")
+                line = (f"  {width} {key}: bin {seg['bin'] or '-'} {bin_state} "
+                        f"({seg['frames']} frames, {seg['duration']} s), wav {seg['wav'] or '-'} {wav_state}")
+                wav_duration = seg.get("wav_duration")
+                if wav_duration:
+                    line += f" ({wav_duration:.3f} s)"
+                    if seg["frames"]:
+                        # frame_time com que os LEDs acabam com o áudio (ver media_clock.py)
+                        line += f", frame_time sugerido {wav_duration / seg['frames'] * 1000:.1f} ms"
+                yield line
+
+
+class PackRegistry:
+    def __init__(self, base_path="/gfx", default_frame_time=25, num_pixels=LEGACY_PIXELS):
+        self.base_path = base_path
+        self.default_frame_time = default_frame_time
+        self.num_pixels = num_pixels
+        self._cache = {}
+        self._fingerprints = {}
+        self._usb_connected = None
+        self._index = self._read_index()
+
+    def _read_index(self):
+        try:
+            with open(f"{self.base_path}/index.json", "r") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index["packs"]
+            print("index.json de outra versão, ignorado")
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            print("Sem index.json em", self.base_path, e)
+        return {}
+
+    def names(self):
+        """Packs em /gfx: do índice, ou listando a pasta se não houver índice."""
+        if self._index:
+            return sorted(self._index)
+        return sorted(entry for entry in os.listdir(self.base_path)
+                      if _is_dir(f"{self.base_path}/{entry}"))
+
+    def get(self, pack_name):
+        pack = self._cache.get(pack_name)
+        if pack is None:
+            pack = self._load(pack_name)
+            self._cache[pack_name] = pack
+        return pack
+
+    def exists(self, pack_name):
+        return self.get(pack_name).found
+
+    def bin_path(self, pack_name, filename):
+        """Caminho de um .bin do pack para o comprimento da lâmina ("" se não há)."""
+        folder = self.get(pack_name).folder
+        return f"{folder}/{filename}" if folder else ""
+
+    def invalidate(self, pack_name=None):
+        if pack_name is None:
+            self._cache = {}
+            self._fingerprints = {}
+        else:
+            self._cache.pop(pack_name, None)
+            self._fingerprints.pop(pack_name, None)
+
+    def check_for_changes(self):
+        """
+        Deteta escritas por USB: se o estado USB mudou, ou com USB ligado,
+        compara tamanho/mtime de cada pack.json em cache e invalida os que
+        mudaram. Chamar em transições (ignição, troca de pack), nunca por frame.
+        Devolve os nomes dos packs invalidados.
+        """
+        try:
+            import supervisor
+            usb = supervisor.runtime.usb_connected
+        except (ImportError, AttributeError):
+            usb = False
+        changed = usb != self._usb_connected
+        self._usb_connected = usb
+        if not (usb or changed):
+            return ()
+        stale = []
+        for name in list(self._cache):
+            if _fingerprint(self._json_path(name)) != self._fingerprints.get(name):
+                print("Pack alterado, a recarregar:", name)
+                self.invalidate(name)
+                stale.append(name)
+        return stale
+
+    def _json_path(self, pack_name):
+        return f"{self.base_path}/{pack_name}/pack.json"
+
+    def _load(self, pack_name):
+        path = self._json_path(pack_name)
+        fingerprint = _fingerprint(path)
+        self._fingerprints[pack_name] = fingerprint
+        entry = self._index.get(pack_name)
+        if entry and _same_fingerprint(fingerprint, entry.get("json")):
+            # Índice em dia: nem se abre o pack.json nem se faz stat aos .bin
+            data = entry.get("pack") or {}
+            files = entry.get("files") or {}
+            found = True
+        else:
+            if entry:
+                print("Índice desatualizado para", pack_name)
+                self._index.pop(pack_name, None)
+            files = None
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                found = True
+            except Exception as e:
+                print(f"Erro ao carregar pack {pack_name}: {e}")
+                # Fallback para packs clássicos: estrutura vazia
+                data = {}
+                found = False
+        if not isinstance(data, dict):
+            print(f"pack.json inválido em {pack_name}")
+            data = {}
+        folder = self._variant_folder(pack_name, data)
+        segments = [self._segment(pack_name, folder, key, data.get(key), files) for key in SEGMENTS]
+        return Pack(pack_name, found, self.num_pixels if folder else 0, folder, *segments)
+
+    def _variant_folder(self, pack_name, data):
+        # Escolhe a pasta cujos frames têm a largura da lâmina; nunca se
+        # reamostra no dispositivo (um .bin com outra largura sairia torto)
+        num_pixels = self.num_pixels
+        pack_path = f"{self.base_path}/{pack_name}"
+        try:
+            variants = [int(n) for n in data.get("variants", ())]
+            width = int(data.get("pixels", LEGACY_PIXELS))
+        except (TypeError, ValueError):
+            print(f"pixels/variants inválidos em {pack_name}")
+            variants = []
+            width = LEGACY_PIXELS
+        if num_pixels in variants:
+            return f"{pack_path}/{num_pixels}"
+        if width == num_pixels:
+            return pack_path
+        print(f"Pack {pack_name} sem variante para {num_pixels} LEDs (tem {width}, {variants})")
+        return ""
+
+    def _segment(self, pack_name, folder, key, raw, files=None):
+        if not isinstance(raw, dict):
+            return None
+        bin_file = raw.get("bin") or ""
+        wav_file = raw.get("wav") or ""
+        pack_path = f"{self.base_path}/{pack_name}"
+        # caminho relativo à pasta do pack, como no índice
+        rel_bin = (folder[len(pack_path) + 1:] + "/" if folder != pack_path else "") + bin_file
+        frames = 0
+        if not folder:
+            bin_file = ""  # sem frames com esta largura: só o som
+        elif files is not None:
+            if bin_file and rel_bin not in files:
+                print(f"{pack_name}.{key}: {bin_file} não existe em {folder}")
+                bin_file = ""
+            elif bin_file:
+                frames = files[rel_bin] // (self.num_pixels * 3)
+        elif bin_file and folder != pack_path and _fingerprint(f"{folder}/{bin_file}") is None:
+            print(f"{pack_name}.{key}: {bin_file} não existe em {folder}")
+            bin_file = ""
+        if not bin_file and not wav_file:
+            return None
+        try:
+            frame_time = float(raw.get("frame_time", self.default_frame_time)) / 1000
+        except (TypeError, ValueError):
+            print(f"frame_time inválido em {pack_name}.{key}")
+            frame_time = self.default_frame_time / 1000
+        white_file = (raw.get("white") or "") if bin_file else ""
+        if white_file:
+            rel_white = rel_bin[:len(rel_bin) - len(bin_file)] + white_file
+            if files is not None:
+                missing = rel_white not in files
+            else:
+                missing = _fingerprint(f"{folder}/{white_file}") is None
+            if missing:
+                print(f"{pack_name}.{key}: {white_file} não existe em {folder}")
+                white_file = ""
+        try:
+            brightness = raw.get("brightness")
+            brightness = float(brightness) if brightness is not None else None
+            cues = (raw.get("cues") or {}).get(str(self.num_pixels)) or ()
+            cues = tuple((int(frame), str(name)) for frame, name in cues)
+        except (TypeError, ValueError, AttributeError):
+            print(f"brightness/cues inválidos em {pack_name}.{key}")
+            brightness = None
+            cues = ()
+        return Segment(
+            f"{folder}/{bin_file}" if bin_file else "",
+            f"{self.base_path}/{pack_name}/{wav_file}" if wav_file else "",
+            frame_time,
+            bool(raw.get("tinting", True)),
+            frames,
+            f"{folder}/{white_file}" if white_file else "",
+            brightness,
+            cues,
+        )
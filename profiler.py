@@ -0,0 +1,121 @@
+# profiler.py
+# Perfil do loop principal: spans com nome medidos com time.monotonic_ns()
+# e contados em histogramas de buckets fixos, um por (modo, span). Uso em
+# cadeia, uma chamada por span:
+#
+#   t = profiler.mark()
+#   motion.poll()
+#   t = profiler.lap("sensor", t)   # regista desde t e devolve o novo início
+#
+# Desligado (PROFILE ausente no settings.toml), mark/lap são uma função
+# vazia que devolve 0: fica no firmware sem custo que se note. Ligado, o
+# trabalho do próprio profiler não entra nos spans (lap devolve um instante
+# tirado depois de registar).
+#
+# Dump: dump() imprime uma tabela por modo; poll_serial() aceita "p" (dump)
+# e "r" (limpa) pela consola série.
+import sys
+import time
+
+try:
+    import supervisor
+except ImportError:
+    supervisor = None
+
+# Limite superior (µs) de cada bucket; o último bucket é "acima de 50 ms"
+BUCKETS_US = (100, 250, 500, 1000, 2000, 5000, 10000, 20000, 50000)
+# Campos no início de cada histograma, antes das contagens por bucket
+_COUNT = 0
+_TOTAL = 1
+_MAX = 2
+_FIRST_BUCKET = 3
+
+
+def _off(*args):
+    return 0
+
+
+class Profiler:
+    def __init__(self, enabled=False, buckets=BUCKETS_US):
+        self.buckets = buckets
+        self.mode = None  # modo atual do loop; os spans ficam com este modo
+        self._modes = {}  # modo -> {span: histograma}
+        self._order = []  # modos pela ordem em que apareceram
+        self.enable(enabled)
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        # atributos da instância: desligado nem sequer testa um flag
+        self.mark = self._mark if enabled else _off
+        self.lap = self._lap if enabled else _off
+
+    def reset(self):
+        self._modes = {}
+        self._order = []
+
+    def _mark(self):
+        return time.monotonic_ns()
+
+    def _lap(self, name, t0):
+        us = (time.monotonic_ns() - t0) // 1000
+        spans = self._modes.get(self.mode)
+        if spans is None:
+            spans = self._modes[self.mode] = {}
+            self._order.append(self.mode)
+        hist = spans.get(name)
+        if hist is None:
+            hist = spans[name] = [0] * (_FIRST_BUCKET + len(self.buckets) + 1)
+        hist[_COUNT] += 1
+        hist[_TOTAL] += us
+        if us > hist[_MAX]:
+            hist[_MAX] = us
+        i = _FIRST_BUCKET
+        for limit in self.buckets:
+            if us <= limit:
+                break
+            i += 1
+        hist[i] += 1
+        return time.monotonic_ns()
+
+    def _quantile(self, hist, q):
+        # limite do bucket onde a contagem acumulada passa q (estimativa)
+        need = hist[_COUNT] * q
+        seen = 0
+        for k, limit in enumerate(self.buckets):
+            seen += hist[_FIRST_BUCKET + k]
+            if seen >= need:
+                return "<={}".format(limit)
+        return ">{}".format(self.buckets[-1])
+
+    def lines(self):
+        """Tabela legível: por modo, cada span com n, média, p50/p95 e máx (µs)."""
+        if not self.enabled:
+            yield "Profiler desligado (PROFILE = 1 no settings.toml)"
+            return
+        head = " ".join("{:>6}".format(limit) for limit in self.buckets) + "   +"
+        for mode in self._order:
+            yield "modo {}:".format(mode)
+            yield "  {:10s} {:>7s} {:>7s} {:>7s} {:>7s} {:>7s} | {}".format(
+                "span", "n", "média", "p50", "p95", "máx", head)
+            for name, hist in self._modes[mode].items():
+                count = hist[_COUNT]
+                yield "  {:10s} {:7d} {:7d} {:>7s} {:>7s} {:7d} | {}".format(
+                    name, count, hist[_TOTAL] // count if count else 0,
+                    self._quantile(hist, 0.5), self._quantile(hist, 0.95), hist[_MAX],
+                    " ".join("{:6d}".format(c) for c in hist[_FIRST_BUCKET:]))
+
+    def dump(self):
+        for line in self.lines():
+            print(line)
+
+    def poll_serial(self):
+        """Comandos pela consola série: p = dump, r = limpa os histogramas."""
+        if supervisor is None or not supervisor.runtime.serial_bytes_available:
+            return
+        while supervisor.runtime.serial_bytes_available:
+            command = sys.stdin.read(1)
+            if command == "p":
+                self.dump()
+            elif command == "r":
+                self.reset()
+                print("Profiler: histogramas limpos")
@@ -0,0 +1,107 @@
+# scheduler.py
+# Agendador cooperativo por ticks. Substitui os "while ...: pass": enquanto
+# se espera (fim de um som, ecrã da bateria...), as tarefas registadas
+# (botão, render, ...) continuam a correr e o CPU dorme entre elas.
+import time
+
+
+class Task:
+    def __init__(self, name, fn, interval):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.next_run = 0
+        self.enabled = True
+
+
+class Scheduler:
+    def __init__(self, max_sleep=0.005):
+        self.tasks = []
+        self.max_sleep = max_sleep  # dorme no máximo isto entre ticks
+
+    def add(self, name, fn, interval=0.0):
+        task = Task(name, fn, interval)
+        self.tasks.append(task)
+        return task
+
+    def get(self, name):
+        for task in self.tasks:
+            if task.name == name:
+                return task
+        return None
+
+    def enable(self, name, enabled=True):
+        task = self.get(name)
+        if task:
+            task.enabled = enabled
+            task.next_run = 0
+
+    def tick(self):
+        """Corre as tarefas em atraso; devolve segundos até à próxima."""
+        now = time.monotonic()
+        wait = self.max_sleep
+        for task in self.tasks:
+            if not task.enabled:
+                continue
+            if now >= task.next_run:
+                task.fn()
+                task.next_run = now + task.interval
+            wait = min(wait, task.next_run - now)
+        return wait
+
+    def wait_while(self, condition, timeout=None):
+        """
+        Espera cooperativa: corre as tarefas e dorme até condition() ser
+        falsa ou passar o timeout. Devolve False se acabou por timeout.
+        """
+        start = time.monotonic()
+        while condition():
+            if timeout is not None and time.monotonic() - start >= timeout:
+                return False
+            wait = self.tick()
+            if wait > 0:
+                time.sleep(wait)
+        return True
+
+    def sleep(self, seconds):
+        end = time.monotonic() + seconds
+        self.wait_while(lambda: time.monotonic() < end)
+
+
+class LatchedButton:
+    """
+    Envolve um adafruit_debouncer.Button. poll() pode ser chamado pelo
+    agendador a qualquer momento (durante esperas); os cliques curtos e
+    longos ficam guardados até ao próximo update() do loop principal, por
+    isso não se perdem pressões feitas durante a ignição/retração.
+    """
+    def __init__(self, button):
+        self.button = button
+        self.short_count = 0
+        self.long_press = False
+        self._short = 0
+        self._long = False
+
+    def poll(self):
+        button = self.button
+        button.update()
+        if button.short_count:
+            self._short = button.short_count
+        if button.long_press:
+            self._long = True
+
+    def update(self):
+        self.poll()
+        self.short_count = self._short
+        self.long_press = self._long
+        self._short = 0
+        self._long = False
+
+    @property
+    def pressed(self):
+        # True se houve cliques à espera de serem lidos pelo loop principal
+        return bool(self._short) or self._long
+
+    @property
+    def value(self):
+        return self.button.value
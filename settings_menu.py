@@ -1,8 +1,6 @@
 import json
-import audiocore
 import time
 import supervisor
-import storage
 # Verifica status USB e ajusta comportamento
 
 
@@ -64,28 +62,18 @@ def settings_menu(
             "sound": "Anim.wav",
         },
     ]
-    from user_settings import save_settings
+    # user_settings: SettingsStore; as alterações ficam em RAM até ao commit
+    # à saída do menu (um único remount, e só se algo mudou)
+    from audio_bank import AudioBank
     option_idx = 0
-    value_idxs = [
-        user_settings.get("COR", 0),
-        user_settings.get("Brilho", 2),
-        user_settings.get("Volume", 2),
-        user_settings.get("Swing", 1),
-        user_settings.get("Clash", 1),
-        user_settings.get("Anim", 0),
-    ]
+    value_idxs = [user_settings.get(setting["name"]) for setting in SETTINGS]
     in_option = False
 
+    # Os WAV do menu ficam abertos durante a sessão e são reutilizados
+    setting_sounds = AudioBank(mixer)
+
     def play_setting_wav(filename, loop=False, voice=1, level=0.8):
-        try:
-            wave_file = open(f"/s_settings/{filename}", "rb")
-            wave = audiocore.WaveFile(wave_file)
-            #mixer.voice[voice].stop()
-            mixer.voice[voice].play(wave, loop=loop)
-            if level is not None:
-                mixer.voice[voice].level = level
-        except Exception as e:
-            print("Erro ao tocar som:", filename, e)
+        setting_sounds.play_file(f"/s_settings/{filename}", voice=voice, loop=loop, level=level)
 
     def ensure_background():
         if not mixer.voice[0].playing:
@@ -105,8 +93,6 @@ def settings_menu(
         switch.update()
         ensure_background()
 
-        storage.remount("/", readonly=False)
-
         # Muda para o próximo setting com long press
         if switch.long_press:
             option_idx = (option_idx + 1) % len(SETTINGS)
@@ -153,15 +139,19 @@ def settings_menu(
                 pixels.brightness = brilho
                 pixels.show()
             
-            user_settings[key] = value_idxs[option_idx]
+            user_settings.set(key, value_idxs[option_idx])
             play_setting_wav(value_label + ".wav")  # Toca o som primeiro
             time.sleep(0.2)  # debounce
 
  
         if switch.short_count == 2:  # 2 short presses go to settings
-            save_settings(user_settings)
+            user_settings.commit()
             break
 
+    mixer.voice[0].stop()
+    mixer.voice[1].stop()
+    setting_sounds.close()
+
 
 
     # Salvar configurações ao sair do menu
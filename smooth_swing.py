@@ -0,0 +1,130 @@
+# smooth_swing.py
+# Smooth swing: em vez de um swing one-shot, um par de loops de swing toca
+# sempre (vozes 2 e 3 do mixer) com o level a seguir a intensidade do
+# movimento, e o hum (voz 0) baixa na mesma proporção. O equilíbrio entre
+# os dois loops roda com o swing acumulado, por isso swings seguidos não
+# soam iguais; depois de um tempo parado escolhe-se outro par.
+#
+# update() pode ser chamado a cada volta do loop: só mexe nos levels a cada
+# `interval` segundos e cada mudança é limitada (slew), sem bloquear.
+import math
+import random
+import time
+
+BALANCE_SPEED = 1.5  # voltas do equilíbrio A/B por segundo de swing a fundo
+PAIR_SWAP_QUIET = 0.5  # s parado até trocar de par
+
+
+class SmoothSwing:
+    """
+    mixer: audiomixer.Mixer com pelo menos max(hum_voice, *swing_voices) + 1 vozes.
+    bank: AudioBank que abre/toca os WAV.
+    pairs: lista de (wav_a, wav_b) a tocar em loop em swing_voices.
+    floor/ceiling: aceleração dinâmica (m/s²) que dá level 0 e level 1.
+    """
+    def __init__(self, mixer, bank, pairs, hum_voice=0, swing_voices=(2, 3),
+                 interval=0.02, slew=6.0, duck=0.7, floor=1.0, ceiling=15.0):
+        self.mixer = mixer
+        self.bank = bank
+        self.pairs = list(pairs)
+        self.hum_voice = hum_voice
+        self.swing_voices = swing_voices
+        self.interval = interval
+        self.slew = slew  # variação máxima de level por segundo
+        self.duck = duck
+        self.floor = floor
+        self.ceiling = ceiling
+        self.enabled = bool(self.pairs)
+        self.active = False
+        self.volume = 1.0
+        self.level = 0.0
+        self.balance = 0.0
+        self.pair = None
+        self.updates = 0
+        self._last = None
+        self._quiet_since = None
+        self._swung = False  # houve swing desde a última troca de par
+
+    def strength(self, intensity):
+        """intensity (aceleração dinâmica², Motion.intensity) -> 0..1"""
+        accel = math.sqrt(intensity)
+        return min(1.0, max(0.0, (accel - self.floor) / (self.ceiling - self.floor)))
+
+    def start(self, volume, now=None):
+        if not self.enabled:
+            return
+        self.volume = volume
+        self.level = 0.0
+        self.balance = random.random()
+        self._last = time.monotonic() if now is None else now
+        self._quiet_since = None
+        self._swung = False
+        self._play_pair(random.randint(0, len(self.pairs) - 1))
+        self.active = True
+
+    def stop(self):
+        if not self.active:
+            return
+        for voice in self.swing_voices:
+            self.mixer.voice[voice].stop()
+        self.mixer.voice[self.hum_voice].level = self.volume
+        self.active = False
+        self.level = 0.0
+
+    def mute(self):
+        """
+        Cala os loops de swing durante clash/blast (o loop desses efeitos não
+        chama update). O hum volta ao volume normal e o level recomeça de 0.
+        """
+        if not self.active:
+            return
+        voices = self.mixer.voice
+        for voice in self.swing_voices:
+            voices[voice].level = 0.0
+        voices[self.hum_voice].level = self.volume
+        self.level = 0.0
+
+    def _play_pair(self, index):
+        self.pair = index
+        for voice, path in zip(self.swing_voices, self.pairs[index]):
+            self.bank.play_file(path, voice=voice, loop=True, level=0.0)
+
+    def update(self, intensity, now=None):
+        """Devolve True se os levels foram atualizados nesta chamada."""
+        if not self.active:
+            return False
+        now = time.monotonic() if now is None else now
+        dt = now - self._last
+        if dt < self.interval:
+            return False
+        self._last = now
+        dt = min(dt, 0.1)  # depois de uma pausa longa não salta de uma vez
+
+        target = self.strength(intensity)
+        max_step = self.slew * dt
+        step = min(max_step, max(-max_step, target - self.level))
+        level = self.level + step
+        self.level = level
+
+        # equilíbrio A/B: triângulo 0..1..0 que avança com o swing
+        self.balance = (self.balance + level * dt * BALANCE_SPEED) % 2.0
+        b = self.balance if self.balance <= 1.0 else 2.0 - self.balance
+        angle = b * math.pi / 2  # crossfade de potência constante
+        voices = self.mixer.voice
+        volume = self.volume
+        voices[self.swing_voices[0]].level = volume * level * math.cos(angle)
+        voices[self.swing_voices[1]].level = volume * level * math.sin(angle)
+        voices[self.hum_voice].level = volume * (1.0 - self.duck * level)
+        self.updates += 1
+
+        if level >= 0.01:
+            self._swung = True
+            self._quiet_since = None
+        elif self._swung:
+            if self._quiet_since is None:
+                self._quiet_since = now
+            elif now - self._quiet_since >= PAIR_SWAP_QUIET and len(self.pairs) > 1:
+                self._play_pair((self.pair + random.randint(1, len(self.pairs) - 1)) % len(self.pairs))
+                self._swung = False
+                self._quiet_since = None
+        return True
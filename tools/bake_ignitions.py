@@ -0,0 +1,178 @@
+# bake_ignitions.py
+# Pré-renderiza as ignições procedurais de ignition.py para o mesmo formato
+# .bin (RGB cru, um frame de num_pixels*3 bytes) que o BinAnimation toca.
+# Escreve /gfx/<efeito>/poweron.bin e atualiza o pack.json do efeito. Com
+# outro --pixels, escreve a variante /gfx/<efeito>/<N>/poweron.bin e junta N
+# a "variants" (ver pack_registry.py).
+#
+# Cada frame sai em duas camadas, para o tint do sabre continuar a ser
+# aplicado no dispositivo sem escurecer o branco:
+#   - poweron.bin: a cor do sabre, em vermelho (banda de tinting);
+#   - poweron_white.bin: o branco por cima, em cinza (como os overlays de
+#     /mfx: cinza v = blend para branco com peso v/255).
+# As cores das ignições são todas da forma k*sabre + w*branco; renderizadas
+# com o sabre vermelho, w sai no G (= B) e k no R - G. A base fica com
+# k / (1 - w) e o branco com w, e o blend do overlay repõe k*sabre + w*branco
+# (a menos do arredondamento). A base toca com brilho 1.0, como a ignição
+# procedural.
+#
+# Sons: os "blip"/"expl" que render() devolve ficam em "cues" no pack.json,
+# por comprimento de lâmina ([frame, nome], ver play_segment no code.py).
+#
+# Cache: o pack.json guarda, por comprimento, um hash de ignition.py +
+# parâmetros; se nada mudou e o .bin existe, o efeito não é renderizado outra vez.
+#
+# Uso: python tools/bake_ignitions.py [--pixels 80] [--frame-time 25] [--force] [efeito ...]
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ignition  # noqa: E402
+
+NEUTRAL_COLOR = (255, 0, 0)
+LEGACY_PIXELS = 80  # largura dos .bin na raiz do pack sem "pixels" no pack.json
+
+EFFECTS = {
+    "explosion": ignition.ExplosionIgnition,
+    "scan": ignition.ScanIgnition,
+    "reverse_scan_with_photons": ignition.ReverseScanIgnition,
+}
+
+
+def split_layers(frame, base, white):
+    """
+    Separa um frame renderizado com NEUTRAL_COLOR em base (banda de tinting,
+    (R, 0, 0)) e branco (cinza (W, W, W), 0 = transparente).
+    """
+    for j in range(0, len(frame), 3):
+        r, g = frame[j], frame[j + 1]
+        w = min(g, r)
+        base[j] = (255 * (r - w) + (255 - w) // 2) // (255 - w) if w < 255 else 0
+        base[j + 1] = base[j + 2] = 0
+        white[j] = white[j + 1] = white[j + 2] = w
+
+
+def render(effect_cls, num_pixels, frame_time):
+    """Devolve (base, branco, frames, cues) com cues = [[frame, nome], ...]."""
+    effect = effect_cls(num_pixels, NEUTRAL_COLOR)
+    frame = bytearray(num_pixels * 3)
+    base = bytearray(num_pixels * 3)
+    white = bytearray(num_pixels * 3)
+    out_base = bytearray()
+    out_white = bytearray()
+    cues = []
+    i = 0
+    while True:
+        t = i * frame_time
+        cue = effect.render(frame, t)
+        if cue:
+            cues.append([i, cue])
+        split_layers(frame, base, white)
+        out_base += base
+        out_white += white
+        if t >= effect.duration:
+            break
+        i += 1
+    return bytes(out_base), bytes(out_white), i + 1, cues
+
+
+def source_hash(name, num_pixels, frame_time_ms):
+    h = hashlib.sha1()
+    for module in ("ignition.py", "color.py"):
+        with open(os.path.join(ROOT, module), "rb") as f:
+            h.update(f.read())
+    with open(os.path.abspath(__file__), "rb") as f:
+        h.update(f.read())
+    h.update("{}:{}:{}".format(name, num_pixels, frame_time_ms).encode())
+    return h.hexdigest()[:16]
+
+
+def write_pack_json(path, pack):
+    # Mesmo formato dos pack.json do repositório: um segmento por linha, CRLF
+    order = ["leds", "preon", "poweron", "poweroff", "pstoff"]
+    keys = [k for k in order if k in pack] + [k for k in pack if k not in order]
+    lines = ['    "{}": {}'.format(k, json.dumps(pack[k])) for k in keys]
+    with open(path, "w", newline="\r\n") as f:
+        f.write("{\n" + ",\n".join(lines) + "\n}\n")
+
+
+def bake(name, num_pixels=80, frame_time_ms=25, force=False, gfx_dir=None):
+    gfx_dir = gfx_dir or os.path.join(ROOT, "gfx")
+    pack_dir = os.path.join(gfx_dir, name)
+    os.makedirs(pack_dir, exist_ok=True)
+    json_path = os.path.join(pack_dir, "pack.json")
+
+    try:
+        with open(json_path, "r") as f:
+            pack = json.load(f)
+    except (OSError, ValueError):
+        pack = {}
+
+    if num_pixels == pack.get("pixels", LEGACY_PIXELS):
+        out_dir = pack_dir
+    else:
+        out_dir = os.path.join(pack_dir, str(num_pixels))
+        os.makedirs(out_dir, exist_ok=True)
+    bin_path = os.path.join(out_dir, "poweron.bin")
+    white_path = os.path.join(out_dir, "poweron_white.bin")
+
+    digest = source_hash(name, num_pixels, frame_time_ms)
+    current = pack.get("poweron") or {}
+    baked = current.get("baked")
+    if not isinstance(baked, dict):
+        baked = {}  # formato antigo: um só hash, volta a renderizar
+    cues = current.get("cues")
+    if not isinstance(cues, dict):
+        cues = {}
+    if (not force and baked.get(str(num_pixels)) == digest and str(num_pixels) in cues
+            and os.path.exists(bin_path) and os.path.exists(white_path)):
+        print("{}: em cache ({})".format(name, digest))
+        return False
+
+    data, white, frames, cues[str(num_pixels)] = render(EFFECTS[name], num_pixels, frame_time_ms / 1000)
+    with open(bin_path, "wb") as f:
+        f.write(data)
+    with open(white_path, "wb") as f:
+        f.write(white)
+
+    baked[str(num_pixels)] = digest
+    pack["poweron"] = {
+        "wav": current.get("wav", ""),
+        "bin": "poweron.bin",
+        "white": "poweron_white.bin",
+        "frame_time": frame_time_ms,
+        "tinting": True,
+        "brightness": 1.0,
+        "cues": cues,
+        "baked": baked,
+    }
+    for key in ("leds", "preon", "poweroff", "pstoff"):
+        pack.setdefault(key, {})
+    if num_pixels != pack.get("pixels", LEGACY_PIXELS):
+        pack["variants"] = sorted(set(pack.get("variants", [])) | {num_pixels})
+    write_pack_json(json_path, pack)
+    print("{}: {} frames, {} cues, 2 x {} bytes -> {}".format(
+        name, frames, len(cues[str(num_pixels)]), len(data), os.path.relpath(bin_path, ROOT)))
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pré-renderiza as ignições procedurais para .bin")
+    parser.add_argument("effects", nargs="*", default=sorted(EFFECTS), help="efeitos a gerar")
+    parser.add_argument("--pixels", type=int, default=80, help="número de LEDs da lâmina")
+    parser.add_argument("--frame-time", type=int, default=25, help="ms por frame no pack.json")
+    parser.add_argument("--force", action="store_true", help="ignora a cache")
+    args = parser.parse_args(argv)
+    for name in args.effects:
+        if name not in EFFECTS:
+            parser.error("efeito desconhecido: {}".format(name))
+        bake(name, args.pixels, args.frame_time, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# bench_color_alloc.py
+# Alocações e tempo por frame/chamada dos caminhos de cor reais: BinOverlay
+# e SparseOverlay (next_frame_into, como no Compositor), BinAnimation
+# (decode com tint), a ignição procedural e as contas de color.py, com o
+# caminho antigo em float como referência. Corre no sabre e no PC:
+#   - CircuitPython: copiar para o CIRCUITPY e, no REPL, import bench_color_alloc.
+#     As alocações vêm de gc.mem_alloc() com o gc desligado (bytes por chamada).
+#     Nos builds em que o float é um valor imediato (30 bits) o caminho
+#     antigo do overlay também pode dar 0 B; o gerador e o tuple() do
+#     blend/scale antigos alocam sempre. Os caminhos novos marcados com
+#     "0 B" têm de dar 0 bytes por chamada: se não, o bench acaba em erro.
+#   - CPython: python tools/bench_color_alloc.py. As alocações vêm do
+#     tracemalloc (pico acima do que já estava vivo, por chamada). No
+#     CPython cada inteiro acima de 256 é um objeto (~32 B; no sabre cabe no
+#     ponteiro até 2**30) e os floats e tuplos pequenos vêm de listas livres
+#     que o tracemalloc não vê: os números do PC servem para comparar
+#     caminhos entre si, os que contam são os do sabre.
+import gc
+import sys
+import time
+
+try:
+    import os.path
+    ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, ROOT)
+except ImportError:
+    ROOT = ""  # no sabre corre a partir da raiz do CIRCUITPY
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from bin_animation import BinAnimation, BinOverlay, SparseOverlay  # noqa: E402
+from color import blend, blend_into, scale, scale_into  # noqa: E402
+from ignition import ExplosionIgnition  # noqa: E402
+
+OVERLAY = ROOT + "/mfx/hit"
+OVERLAY_LEN = 80
+IDLE = ROOT + "/gfx/unicorn/leds.bin"
+NUM_PIXELS = 80
+FRAMES = 50
+
+
+def legacy_apply(buf, frame, pos, overlay_len):
+    # Cópia do loop de BinOverlay.next_frame_into antes do color.py
+    num_pixels = len(frame) // 3
+    for i in range(max(0, -pos), min(overlay_len, num_pixels - pos)):
+        k = i * 3
+        r = buf[k]
+        g = buf[k + 1]
+        b = buf[k + 2]
+        if r == 0 and g == 0 and b == 0:
+            continue
+        j = (pos + i) * 3
+        if r == g == b and r != 255:
+            alpha = r / 255.0
+            frame[j] = int(frame[j] * (1 - alpha) + 255 * alpha)
+            frame[j + 1] = int(frame[j + 1] * (1 - alpha) + 255 * alpha)
+            frame[j + 2] = int(frame[j + 2] * (1 - alpha) + 255 * alpha)
+        else:
+            frame[j] = r
+            frame[j + 1] = g
+            frame[j + 2] = b
+
+
+def legacy_blend(color1, color2, t):
+    return tuple(int(c1 * (1 - t) + c2 * t) for c1, c2 in zip(color1, color2))
+
+
+def legacy_scale(color, factor):
+    return tuple(min(255, int(c * factor)) for c in color)
+
+
+def measure_alloc(fn, count):
+    """Bytes alocados por chamada, ou None se não há como medir."""
+    mem_alloc = getattr(gc, "mem_alloc", None)  # só no CircuitPython/MicroPython
+    if mem_alloc:
+        gc.collect()
+        gc.disable()
+        try:
+            before = mem_alloc()
+            for _ in range(count):
+                fn()
+            after = mem_alloc()
+        finally:
+            gc.enable()
+        return (after - before) / count
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(count):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            fn()
+            total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return total / count
+
+
+def measure_time(fn, count):
+    """µs por chamada (passagem à parte, sem o tracemalloc a pesar)."""
+    t0 = time.monotonic_ns()
+    for _ in range(count):
+        fn()
+    return (time.monotonic_ns() - t0) / count / 1000
+
+
+def overlay_step(overlay, base, out):
+    # Um frame do overlay sobre a base, como o Compositor. As medições não
+    # passam do último frame (o reset() no fim reabre o ficheiro e aloca):
+    # o setup (overlay.reset) volta ao início antes de cada uma.
+    def step():
+        out[:] = base
+        overlay.next_frame_into(out)
+    return step
+
+
+def to_buffer_step(overlay, base, pixels):
+    # O mesmo com o caminho de lista de pixels (bytearray(3) por pixel)
+    def step():
+        for i in range(len(pixels)):
+            pixel = pixels[i]
+            k = i * 3
+            pixel[0] = base[k]
+            pixel[1] = base[k + 1]
+            pixel[2] = base[k + 2]
+        overlay.next_frame_to_buffer(pixels)
+    return step
+
+
+def main():
+    with open(OVERLAY + ".bin", "rb") as f:
+        data = f.read()
+    frame_size = OVERLAY_LEN * 3
+    frames = [bytearray(data[i:i + frame_size]) for i in range(0, len(data), frame_size)]
+    base = bytearray((i * 37) & 0xFF for i in range(NUM_PIXELS * 3))
+    out = bytearray(NUM_PIXELS * 3)
+
+    # o BinOverlay real contra o caminho antigo: iguais a menos de 1 nível
+    # (arredondamento do float)
+    overlay = BinOverlay(OVERLAY + ".bin", OVERLAY_LEN, 0, frame_delay=0)
+    worst = 0
+    for buf in frames:
+        a = bytearray(base)
+        b = bytearray(base)
+        legacy_apply(buf, a, 0, OVERLAY_LEN)
+        overlay.next_frame_into(b)
+        worst = max(worst, max(abs(x - y) for x, y in zip(a, b)))
+    overlay.reset()
+
+    state = [0]
+
+    def legacy_step():
+        out[:] = base
+        legacy_apply(frames[state[0] % len(frames)], out, 0, OVERLAY_LEN)
+        state[0] += 1
+
+    sparse = SparseOverlay(OVERLAY + ".ovl", OVERLAY_LEN, 0, frame_delay=0)
+    listed = BinOverlay(OVERLAY + ".bin", OVERLAY_LEN, 0, frame_delay=0)
+    pixels = [bytearray(3) for _ in range(NUM_PIXELS)]
+    idle = BinAnimation(IDLE, NUM_PIXELS, (0.0, 1.0, 1.0), 0, 0, loop=True)
+    idle_frame = bytearray(NUM_PIXELS * 3)
+    saber = (0, 255, 255)
+    white = (255, 255, 255)
+    explosion = ExplosionIgnition(NUM_PIXELS, saber)
+    ignition_frame = bytearray(NUM_PIXELS * 3)
+    ignition_t = [0.0]
+
+    def ignition_step():
+        explosion.render(ignition_frame, ignition_t[0])
+        ignition_t[0] = (ignition_t[0] + 0.01) % explosion.charge_time
+
+    pixel = bytearray(3)
+    # (nome, chamada, nº de chamadas, setup antes de cada medição, tem de dar 0 B)
+    cases = [
+        ("overlay float (antigo)", legacy_step, FRAMES, None, False),
+        ("BinOverlay", overlay_step(overlay, base, out), len(frames), overlay.reset, True),
+        ("BinOverlay (lista)", to_buffer_step(listed, base, pixels), len(frames), listed.reset, True),
+        ("SparseOverlay", overlay_step(sparse, base, out), len(frames), sparse.reset, True),
+        ("BinAnimation (tint)", lambda: idle.next_frame_into(idle_frame), FRAMES, None, True),
+        ("ExplosionIgnition", ignition_step, FRAMES, None, False),
+        ("blend float (antigo)", lambda: legacy_blend(saber, white, 0.5), FRAMES * 20, None, False),
+        ("blend", lambda: blend(saber, white, 128), FRAMES * 20, None, False),
+        ("blend_into", lambda: blend_into(pixel, 0, saber, white, 128), FRAMES * 20, None, True),
+        ("scale float (antigo)", lambda: legacy_scale(saber, 0.4), FRAMES * 20, None, False),
+        ("scale", lambda: scale(saber, 102), FRAMES * 20, None, False),
+        ("scale_into", lambda: scale_into(pixel, 0, 102), FRAMES * 20, None, True),
+    ]
+    # só o gc.mem_alloc do sabre conta para o assert (ver o cabeçalho)
+    strict = hasattr(gc, "mem_alloc")
+    failed = []
+    print("frames de {}.bin: {}, diferença máx. para o BinOverlay {}".format(OVERLAY, len(frames), worst))
+    for name, fn, count, setup, zero in cases:
+        fn()  # aquece (cache de atributos, etc.)
+        if setup:
+            setup()
+        per_call = measure_alloc(fn, count)
+        if setup:
+            setup()
+        us = measure_time(fn, count)
+        alloc = "n/d" if per_call is None else "{:.1f} B".format(per_call)
+        verdict = ""
+        if zero and strict:
+            verdict = "ok" if per_call == 0 else "ALOCA"
+            if per_call:
+                failed.append(name)
+        print("{:24s} {:>10s} {:9.1f} µs {}".format(name, alloc, us, verdict))
+    if failed:
+        print("ERRO: alocam por chamada: " + ", ".join(failed))
+        sys.exit(1)
+
+
+# sem "if __name__": no sabre corre com import bench_color_alloc
+main()
@@ -0,0 +1,255 @@
+# bench_render.py
+# Benchmark do caminho de render no PC (CPython): cada segmento com .bin dos
+# packs de /gfx (preon/poweron/leds/poweroff/pstoff) passa por
+# BinAnimation.next_frame_into e cada overlay de /mfx (.bin e .ovl) por
+# Compositor.compose sobre uma base fixa, frame a frame, sem esperas.
+#
+# Por segmento/overlay mostra:
+#   - fps e latência por frame (p50/p95/p99, µs);
+#   - "RP2040": p95 x --cpu-scale contra o frame_time do pack.json, para ver
+#     que packs não cabem no seu frame_time no sabre (o fator sai de comparar
+#     com uma medição no sabre; 150 é um ponto de partida). Packs com
+#     frame_time abaixo de MIN_ADAPTIVE_DELAY querem "o mais rápido
+#     possível" e aparecem com "máx";
+#   - readinto() por segmento (read-ahead do BinAnimation);
+#   - bytes alocados por frame (pico do tracemalloc acima da base, numa
+#     passagem à parte para não pesar no tempo);
+#   - hash dos frames de saída contra tools/golden_frames.json, para uma
+#     otimização não mudar a imagem sem se dar por isso.
+#
+# Uso: python tools/bench_render.py [--pixels 80] [--cpu-scale 150]
+#        [--only nuke,hit] [--update] [--json resultados.json]
+#        [--baseline resultados.json]
+#   --update     regrava os hashes de referência (depois de uma mudança
+#                intencional na imagem)
+#   --baseline   compara os fps com um --json de uma corrida anterior
+# Sai com erro se algum hash não bater com a referência.
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+from bin_animation import MIN_ADAPTIVE_DELAY, BinAnimation, BinOverlay, SparseOverlay  # noqa: E402
+from compositor import Compositor  # noqa: E402
+from mfx2ovl import DEFAULT_OVERLAYS  # noqa: E402
+from pack_registry import SEGMENTS, PackRegistry  # noqa: E402
+
+GOLDEN = os.path.join(ROOT, "tools", "golden_frames.json")
+# Tint fixo para os segmentos com tinting (AQUA de rgb_to_tint) e o brilho
+# por omissão do BinAnimation: os hashes dependem dos dois
+TINT = (0.0, 1.0, 1.0)
+BRIGHTNESS = 0.6
+OVERLAY_FRAME_DELAY = 0.025  # como o open_overlay() do code.py
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def base_frame(num_pixels):
+    # base fixa e colorida, para os blends de cinza dos overlays contarem
+    return bytearray((i * 37 + 11) & 0xFF for i in range(num_pixels * 3))
+
+
+class Job:
+    """Um segmento ou overlay: make() devolve um render novo, step(frame) avança um frame."""
+
+    def __init__(self, name, frame_time, make, step, reads=None):
+        self.name = name
+        self.frame_time = frame_time
+        self.make = make
+        self.step = step
+        self.reads = reads  # reads(estado) -> chamadas a readinto(), se se sabe
+
+
+def pack_jobs(num_pixels):
+    packs = PackRegistry(os.path.join(ROOT, "gfx"), num_pixels=num_pixels)
+    jobs = []
+    for pack_name in packs.names():
+        pack = packs.get(pack_name)
+        for key in SEGMENTS:
+            segment = getattr(pack, key)
+            if not segment or not segment.bin:
+                continue
+
+            def make(segment=segment):
+                tint = TINT if segment.tinting else (1, 1, 1)
+                brightness = BRIGHTNESS if segment.brightness is None else segment.brightness
+                anim = BinAnimation(segment.bin, num_pixels, tint, 0, 0, brightness)
+                # camada de branco das ignições pré-renderizadas, como no play_segment
+                white = BinOverlay(segment.white, num_pixels, 0, frame_delay=0) if segment.white else None
+                return anim, white
+
+            def step(state, frame):
+                anim, white = state
+                anim.next_frame_into(frame)
+                if anim.new_frame and white:
+                    white.seek(anim.frame)
+                    white.next_frame_into(frame)
+                return anim.new_frame
+
+            jobs.append(Job(f"{pack_name}/{key}", segment.frame_time, make, step,
+                            lambda state: state[0].reads))
+    return jobs
+
+
+def overlay_jobs(num_pixels):
+    jobs = []
+    for filename, overlay_len in DEFAULT_OVERLAYS:
+        stem = os.path.splitext(filename)[0]
+        pos = (num_pixels - overlay_len) // 2
+        for ext, cls in ((".bin", BinOverlay), (".ovl", SparseOverlay)):
+            path = os.path.join(ROOT, "mfx", stem + ext)
+            if not os.path.exists(path):
+                continue
+
+            def make(path=path, cls=cls, overlay_len=overlay_len, pos=pos):
+                compositor = Compositor(num_pixels, base_frame(num_pixels))
+                return compositor, cls(path, overlay_len, pos, frame_delay=0)
+
+            def step(state, frame):
+                compositor, overlay = state
+                if not compositor.compose(overlay):
+                    return False
+                frame[:] = compositor.out
+                return True
+
+            jobs.append(Job(f"mfx/{stem}{ext}", OVERLAY_FRAME_DELAY, make, step))
+    return jobs
+
+
+def render(job, num_pixels):
+    """Tempos por frame (ns), hash dos frames de saída e leituras do ficheiro."""
+    frame = bytearray(num_pixels * 3)
+    digest = hashlib.sha1()
+    times = []
+    state = job.make()
+    clock = time.perf_counter_ns
+    while True:
+        t0 = clock()
+        alive = job.step(state, frame)
+        elapsed = clock() - t0
+        if not alive:
+            break
+        times.append(elapsed)
+        digest.update(frame)
+    reads = job.reads(state) if job.reads else None
+    return times, digest.hexdigest()[:16], reads
+
+
+def allocations(job, num_pixels):
+    """Bytes alocados por frame (média do pico acima do que já estava vivo)."""
+    frame = bytearray(num_pixels * 3)
+    state = job.make()
+    tracemalloc.start()
+    try:
+        total = 0
+        frames = 0
+        while True:
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            alive = job.step(state, frame)
+            if not alive:
+                break
+            total += tracemalloc.get_traced_memory()[1] - current
+            frames += 1
+    finally:
+        tracemalloc.stop()
+    return total / frames if frames else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do render dos packs e overlays")
+    parser.add_argument("--pixels", type=int, default=80, help="comprimento da lâmina")
+    parser.add_argument("--cpu-scale", type=float, default=150.0,
+                        help="quantas vezes o sabre é mais lento que este PC")
+    parser.add_argument("--only", help="só os nomes que contêm uma destas palavras (vírgulas)")
+    parser.add_argument("--update", action="store_true", help="regrava os hashes de referência")
+    parser.add_argument("--json", help="grava os resultados neste ficheiro")
+    parser.add_argument("--baseline", help="compara os fps com um --json anterior")
+    args = parser.parse_args(argv)
+
+    jobs = pack_jobs(args.pixels) + overlay_jobs(args.pixels)
+    if args.only:
+        words = args.only.split(",")
+        jobs = [job for job in jobs if any(w in job.name for w in words)]
+    try:
+        with open(GOLDEN) as f:
+            golden = json.load(f)
+    except (OSError, ValueError):
+        golden = {}
+    golden_key = str(args.pixels)
+    hashes = golden.setdefault(golden_key, {})
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    print("{:36s} {:>6s} {:>6s} {:>7s} {:>8s} {:>7s} {:>7s} {:>7s} {:>15s} {:>8s} {}".format(
+        "segmento", "frames", "reads", "ft ms", "fps", "p50 µs", "p95 µs", "p99 µs", "RP2040 p95 ms", "B/frame", "hash"))
+    results = []
+    mismatches = []
+    changed = False
+    for job in jobs:
+        times, digest, reads = render(job, args.pixels)
+        if not times:
+            print("{:36s} sem frames".format(job.name))
+            continue
+        alloc = allocations(job, args.pixels)
+        total = sum(times)
+        fps = len(times) / (total / 1e9) if total else 0.0
+        p50, p95, p99 = (percentile(times, p) / 1000 for p in (50, 95, 99))
+        device_ms = p95 * args.cpu_scale / 1000
+        fits = device_ms <= job.frame_time * 1000
+        if job.frame_time < MIN_ADAPTIVE_DELAY:
+            verdict = "máx"
+        else:
+            verdict = "ok" if fits else "LENTO"
+        expected = hashes.get(job.name)
+        if args.update or expected is None:
+            hashes[job.name] = {"frames": len(times), "sha1": digest}
+            state = "novo" if expected is None else "gravado"
+            changed = True
+        elif expected == {"frames": len(times), "sha1": digest}:
+            state = "ok"
+        else:
+            state = "DIFERENTE"
+            mismatches.append(job.name)
+        line = "{:36s} {:6d} {:>6s} {:7.1f} {:8.0f} {:7.1f} {:7.1f} {:7.1f} {:8.2f} {:>6s} {:8.0f} {}".format(
+            job.name, len(times), "-" if reads is None else str(reads), job.frame_time * 1000, fps, p50, p95, p99, device_ms,
+            verdict, alloc, state)
+        old = baseline.get(job.name)
+        if old and old["fps"]:
+            line += "  fps {:+.0%}".format(fps / old["fps"] - 1)
+        print(line)
+        results.append({
+            "name": job.name, "frames": len(times), "reads": reads, "frame_time_ms": round(job.frame_time * 1000, 1),
+            "fps": round(fps, 1), "p50_us": round(p50, 1), "p95_us": round(p95, 1), "p99_us": round(p99, 1),
+            "device_p95_ms": round(device_ms, 2), "fits": fits, "alloc_bytes_per_frame": round(alloc, 1),
+            "sha1": digest,
+        })
+
+    if changed:
+        with open(GOLDEN, "w") as f:
+            json.dump(golden, f, indent=1, sort_keys=True)
+            f.write("\n")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"pixels": args.pixels, "cpu_scale": args.cpu_scale, "results": results}, f, indent=1)
+            f.write("\n")
+    if mismatches:
+        sys.exit("frames diferentes da referência: {} (--update se a mudança é intencional)".format(
+            ", ".join(mismatches)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# bench_tint_lut.py
+# Benchmark no PC (CPython) do decode de frames do BinAnimation:
+# compara o caminho antigo (contas de tint/brilho por pixel) com as
+# tabelas de lookup, e confirma que os pixels gerados são idênticos.
+#
+# Uso: python tools/bench_tint_lut.py [ficheiro.bin ...]
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin_animation import BinAnimation  # noqa: E402
+
+NUM_PIXELS = 80
+TINTS = [
+    (1, 1, 1),
+    (0.0, 1.0, 1.0),         # AQUA
+    (1.0, 0.588, 0.0),       # ORANGE
+    (0.470, 0.0, 1.0),       # PURPLE
+]
+BRIGHTNESS = 0.6
+
+
+def legacy_decode(buf, num_pixels, tint, brightness, buffer):
+    # Cópia fiel do loop original de next_frame_to_buffer
+    for i in range(num_pixels):
+        r = buf[i*3]
+        g = buf[i*3+1]
+        b = buf[i*3+2]
+        if (r > 0 and g == 0 and b == 0) or (r == 255 and g == b):
+            tr = min(255, int(r * tint[0]))
+            tg = min(255, int(r * tint[1])) if (g == 0 and b == 0) else min(255, int(g * tint[1]))
+            tb = min(255, int(r * tint[2])) if (g == 0 and b == 0) else min(255, int(b * tint[2]))
+            buffer[i] = (
+                int(tr * brightness),
+                int(tg * brightness),
+                int(tb * brightness)
+            )
+        elif r == g == b:
+            buffer[i] = (int(r * brightness), int(g * brightness), int(b * brightness))
+        else:
+            buffer[i] = (int(r * brightness), int(g * brightness), int(b * brightness))
+
+
+def read_frames(path, frame_size):
+    with open(path, "rb") as f:
+        data = f.read()
+    count = len(data) // frame_size
+    return [bytearray(data[i*frame_size:(i+1)*frame_size]) for i in range(count)]
+
+
+def bench(path, tint):
+    anim = BinAnimation(path, NUM_PIXELS, tint, 0, 0, BRIGHTNESS)
+    anim.file.close()
+    frames = read_frames(path, anim.frame_size)
+    if not frames:
+        return None
+    old_buf = [(0, 0, 0)] * NUM_PIXELS
+    new_buf = [(0, 0, 0)] * NUM_PIXELS
+
+    mismatches = 0
+    for frame in frames:
+        legacy_decode(frame, NUM_PIXELS, tint, BRIGHTNESS, old_buf)
+        anim.buf[:] = frame
+        anim._decode_to_tuples(new_buf)
+        if old_buf != new_buf:
+            mismatches += 1
+
+    reps = max(1, 2000 // len(frames))
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        for frame in frames:
+            legacy_decode(frame, NUM_PIXELS, tint, BRIGHTNESS, old_buf)
+    t_old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        for frame in frames:
+            anim.buf[:] = frame
+            anim._decode_to_tuples(new_buf)
+    t_new = time.perf_counter() - t0
+
+    n = reps * len(frames)
+    return n / t_old, n / t_new, mismatches, len(frames)
+
+
+def main(paths):
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(ROOT, "gfx", "*", "*.bin")))
+    total_mismatches = 0
+    print("{:<48} {:>6} {:>10} {:>10} {:>7}".format("ficheiro / tint", "frames", "antes fps", "depois fps", "ganho"))
+    for path in paths:
+        for tint in TINTS:
+            res = bench(path, tint)
+            if res is None:
+                continue
+            fps_old, fps_new, mismatches, nframes = res
+            total_mismatches += mismatches
+            name = "{} {}".format(os.path.relpath(path, ROOT), tint)
+            print("{:<48} {:>6} {:>10.0f} {:>10.0f} {:>6.2f}x{}".format(
+                name[:48], nframes, fps_old, fps_new, fps_new / fps_old,
+                "" if not mismatches else "  DIFERENTE em {} frames".format(mismatches)))
+    if total_mismatches:
+        print("ERRO: saída diferente da implementação antiga")
+        return 1
+    print("OK: saída idêntica à implementação antiga")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,39 @@
+# index_packs.py
+# Gera /gfx/index.json: pack.json de cada pack, tamanhos dos ficheiros,
+# resumo dos segmentos (frames, tamanho do frame, duração) e o
+# tamanho/mtime de cada pack.json, para o sabre usar o índice sem validar
+# os packs no arranque (ver pack_registry.py).
+#
+# Correr depois de mudar packs, de preferência diretamente no CIRCUITPY:
+#   python tools/index_packs.py /media/CIRCUITPY/gfx
+# Sem argumentos usa a pasta gfx/ do repositório.
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pack_registry import build_index, describe_index  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera o index.json dos packs em /gfx")
+    parser.add_argument("gfx", nargs="?", default=os.path.join(ROOT, "gfx"), help="pasta gfx")
+    parser.add_argument("-v", "--verbose", action="store_true", help="mostra o resumo de cada pack")
+    args = parser.parse_args(argv)
+
+    index = build_index(args.gfx.rstrip("/\\"))
+    if args.verbose:
+        for line in describe_index(index):
+            print(line)
+    path = os.path.join(args.gfx, "index.json")
+    with open(path, "w") as f:
+        # compacto: é lido no arranque do sabre
+        json.dump(index, f, separators=(",", ":"))
+    print("{} packs -> {}".format(len(index["packs"]), path))
+
+
+if __name__ == "__main__":
+    main()
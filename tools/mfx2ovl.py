@@ -0,0 +1,138 @@
+# mfx2ovl.py
+# Converte os overlays .bin de /mfx (frames RGB completos, preto =
+# transparente) para o formato esparso .ovl lido por SparseOverlay (ver
+# bin_animation.py): só os pixels opacos, um byte por pixel cinza.
+# Confirma ainda que o .ovl aplicado sobre bases aleatórias dá o mesmo
+# resultado que o BinOverlay com o .bin.
+#
+# Uso: python tools/mfx2ovl.py [mfx/hit.bin:80 mfx/blast.bin:42 ...]
+# Sem argumentos converte os overlays usados no code.py.
+import argparse
+import os
+import random
+import struct
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bin_animation import (  # noqa: E402
+    OVL_HEADER, OVL_MAGIC, OVL_MAX_RUN, OVL_RGB, OVL_VERSION, BinOverlay, SparseOverlay,
+)
+
+# (ficheiro, overlay_len) como no code.py
+DEFAULT_OVERLAYS = [("hit.bin", 80), ("blast.bin", 42), ("lockup20x60.bin", 20)]
+# buracos transparentes até este tamanho ficam dentro de um span cinza
+# (alpha 0 = base intacta), mais barato que um cabeçalho de span novo
+MAX_GAP = 2
+
+
+def pixel_kind(r, g, b):
+    if r == 0 and g == 0 and b == 0:
+        return None
+    if r == g == b:
+        return "grey"
+    return "rgb"
+
+
+def encode_frame(frame, overlay_len):
+    """Spans de um frame RGB completo, sem o campo do tamanho seguinte."""
+    kinds = [pixel_kind(*frame[i * 3:i * 3 + 3]) for i in range(overlay_len)]
+    # tapa buracos curtos entre pixels cinza
+    i = 0
+    while i < overlay_len:
+        if kinds[i] is None and i > 0 and kinds[i - 1] == "grey":
+            j = i
+            while j < overlay_len and kinds[j] is None:
+                j += 1
+            if j < overlay_len and kinds[j] == "grey" and j - i <= MAX_GAP:
+                for k in range(i, j):
+                    kinds[k] = "grey"
+            i = j
+        else:
+            i += 1
+
+    out = bytearray()
+    i = 0
+    while i < overlay_len:
+        kind = kinds[i]
+        if kind is None:
+            i += 1
+            continue
+        start = i
+        while i < overlay_len and kinds[i] == kind and i - start < OVL_MAX_RUN:
+            i += 1
+        n = i - start
+        if kind == "grey":
+            out += struct.pack("<HB", start, n)
+            out += bytes(frame[k * 3] for k in range(start, i))
+        else:
+            out += struct.pack("<HB", start, n | OVL_RGB)
+            out += frame[start * 3:i * 3]
+    return out
+
+
+def convert(src, dst, overlay_len):
+    data = open(src, "rb").read()
+    frame_size = overlay_len * 3
+    if len(data) % frame_size:
+        raise ValueError("%s: %d bytes não é múltiplo de %d" % (src, len(data), frame_size))
+    spans = [encode_frame(data[i:i + frame_size], overlay_len)
+             for i in range(0, len(data), frame_size)]
+    sizes = [len(s) + 2 for s in spans]
+    with open(dst, "wb") as f:
+        f.write(struct.pack(OVL_HEADER, OVL_MAGIC, OVL_VERSION, overlay_len, len(spans),
+                            max(sizes), sizes[0]))
+        for i, s in enumerate(spans):
+            f.write(s)
+            f.write(struct.pack("<H", sizes[i + 1] if i + 1 < len(sizes) else 0))
+    return len(data), os.path.getsize(dst), len(spans)
+
+
+def verify(src, dst, overlay_len, num_pixels=80, trials=3):
+    """Aplica os dois formatos sobre bases aleatórias; devolve a maior diferença."""
+    rnd = random.Random(0)
+    worst = 0
+    for _ in range(trials):
+        pos = rnd.randint(-overlay_len // 2, num_pixels - overlay_len // 2)
+        dense = BinOverlay(src, overlay_len, pos, frame_delay=0)
+        sparse = SparseOverlay(dst, overlay_len, pos, frame_delay=0)
+        while True:
+            base = bytearray(rnd.getrandbits(8) for _ in range(num_pixels * 3))
+            a = bytearray(base)
+            b = bytearray(base)
+            alive_a = dense.next_frame_into(a)
+            alive_b = sparse.next_frame_into(b)
+            if alive_a != alive_b:
+                raise AssertionError("%s: número de frames diferente" % dst)
+            if not alive_a:
+                break
+            worst = max(worst, max(abs(x - y) for x, y in zip(a, b)))
+    return worst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte overlays .bin de /mfx para .ovl esparso")
+    parser.add_argument("overlays", nargs="*", help="ficheiro.bin:overlay_len")
+    args = parser.parse_args(argv)
+
+    if args.overlays:
+        jobs = []
+        for item in args.overlays:
+            path, _, length = item.rpartition(":")
+            jobs.append((path, int(length)))
+    else:
+        jobs = [(os.path.join(ROOT, "mfx", name), n) for name, n in DEFAULT_OVERLAYS]
+
+    for src, overlay_len in jobs:
+        dst = os.path.splitext(src)[0] + ".ovl"
+        before, after, frames = convert(src, dst, overlay_len)
+        worst = verify(src, dst, overlay_len)
+        print("{}: {} frames, {} -> {} bytes ({:.0%}), diferença máx. {}".format(
+            os.path.basename(dst), frames, before, after, after / before, worst))
+        if worst:
+            sys.exit("{}: o .ovl não corresponde ao .bin".format(dst))
+
+
+if __name__ == "__main__":
+    main()
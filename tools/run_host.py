@@ -0,0 +1,246 @@
+# run_host.py
+# Corre o code.py sem alterações no PC (CPython), com os substitutos de
+# host/ no lugar de board, neopixel, audiomixer, adafruit_lis3dh, storage,
+# supervisor, ... (ver host/hal.py). O tempo é virtual: time.sleep() não
+# espera e o CPU conta multiplicado por --cpu-scale, para aproximar o RP2040.
+# Os caminhos "/gfx", "/sounds", "/settings.json", ... do code.py são os da
+# raiz do repositório; as escritas (settings.json) vão para uma pasta
+# temporária e o repositório fica intacto.
+#
+# Uso: python tools/run_host.py [--seconds 25] [--scenario eventos.json]
+#        [--trace accel.csv] [--cpu-scale 8] [--pixels 80] [--diag]
+#        [--frames saida.bin] [--log] [--profile]
+#
+# Cenário: lista JSON de eventos {"t": s, "event": "click"|"hold"|"clash"|
+# "swing"|"battery", ...} (ver hal.Scenario). Sem --scenario: liga, clash,
+# swing, blast e desliga com duplo clique.
+import argparse
+import builtins
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = os.path.join(ROOT, "host")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HOST)
+
+import hal  # noqa: E402
+
+_real_stat = os.stat
+
+
+def _exists(path):
+    # os.path.exists passa pelo os.stat substituído; aqui é preciso o verdadeiro
+    try:
+        _real_stat(path)
+        return True
+    except OSError:
+        return False
+
+
+def _isfile(path):
+    try:
+        return not _real_stat(path).st_mode & 0x4000
+    except OSError:
+        return False
+
+
+def _isdir(path):
+    try:
+        return bool(_real_stat(path).st_mode & 0x4000)
+    except OSError:
+        return False
+
+
+# depois do som "force" do arranque (~2 s)
+DEFAULT_SCENARIO = [
+    {"t": 3.0, "event": "click"},  # liga
+    {"t": 10.0, "event": "clash"},
+    {"t": 12.0, "event": "swing", "duration": 0.4, "peak": 25.0},
+    {"t": 14.0, "event": "click"},  # blast
+    {"t": 17.0, "event": "click", "count": 2},  # desliga
+]
+
+
+class FileSystem:
+    """Caminhos absolutos do CIRCUITPY -> repositório, escritas numa pasta à parte."""
+
+    def __init__(self, root):
+        self.root = root
+        self.top = set(os.listdir(root))
+        self.scratch = tempfile.mkdtemp(prefix="run_host_")
+
+    def map(self, path, write=False):
+        if not isinstance(path, str) or not path.startswith("/"):
+            return path
+        parts = path.strip("/").split("/")
+        if parts[0] not in self.top and not _exists(os.path.join(self.scratch, parts[0])):
+            return path  # caminho real do PC (ex.: /tmp, /usr/lib)
+        rel = os.path.join(*parts)
+        scratch = os.path.join(self.scratch, rel)
+        if write:
+            if not _isdir(os.path.dirname(scratch)):
+                os.makedirs(os.path.dirname(scratch), exist_ok=True)
+            if not _exists(scratch) and _isfile(os.path.join(self.root, rel)):
+                shutil.copyfile(os.path.join(self.root, rel), scratch)
+            return scratch
+        if _exists(scratch):
+            return scratch
+        return os.path.join(self.root, rel)
+
+    def install(self):
+        real_open = builtins.open
+        real_stat = _real_stat
+        real_listdir = os.listdir
+        real_rename = os.rename
+        real_remove = os.remove
+        fs = self
+
+        def open_(file, mode="r", *args, **kwargs):
+            write = any(c in mode for c in "wax+")
+            return real_open(fs.map(file, write), mode, *args, **kwargs)
+
+        def stat(path, *args, **kwargs):
+            return real_stat(fs.map(path), *args, **kwargs)
+
+        def listdir(path="."):
+            names = set(real_listdir(fs.map(path)))
+            mapped = fs.map(path, write=False)
+            if isinstance(path, str) and path.startswith("/") and mapped != path:
+                extra = os.path.join(fs.scratch, path.strip("/"))
+                if _isdir(extra):
+                    names.update(real_listdir(extra))
+            return sorted(names)
+
+        def rename(src, dst):
+            return real_rename(fs.map(src, True), fs.map(dst, True))
+
+        def remove(path):
+            return real_remove(fs.map(path, True))
+
+        builtins.open = open_
+        os.stat = stat
+        os.listdir = listdir
+        os.rename = rename
+        os.remove = remove
+
+    def cleanup(self):
+        shutil.rmtree(self.scratch, ignore_errors=True)
+
+
+def load_trace(path):
+    trace = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            try:
+                trace.append(tuple(float(v) for v in row[:4]))
+            except ValueError:
+                continue  # cabeçalho
+    trace.sort()
+    return trace
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def report(namespace, started):
+    clock = hal.clock
+    with clock.paused():
+        now = clock.now()
+    print()
+    print("=== run_host: {:.2f} s virtuais em {:.2f} s reais ===".format(
+        now - clock.start, time.perf_counter() - started))
+    for strip in hal.pixels:
+        shows = strip.shows
+        print("NeoPixel {} LEDs: {} show()".format(strip.n, len(shows)), end="")
+        if len(shows) > 1:
+            gaps = [(b - a) * 1000 for a, b in zip(shows, shows[1:])]
+            span = shows[-1] - shows[0]
+            print(", {:.1f} fps, intervalo p50 {:.1f} ms, p95 {:.1f} ms, máx {:.1f} ms".format(
+                (len(shows) - 1) / span if span else 0.0,
+                percentile(gaps, 50), percentile(gaps, 95), max(gaps)))
+        else:
+            print()
+    for mixer in hal.mixers:
+        print("Mixer: {} eventos".format(len(mixer.events)))
+        for t, voice, what, name, loop in mixer.events:
+            print("  {:7.3f} voz {} {:4s} {}{}".format(t, voice, what, name, " (loop)" if loop else ""))
+    if "mode" in namespace:
+        print("Modo final:", namespace["mode"])
+    profiler = namespace.get("profiler")
+    if profiler is not None and profiler.enabled:
+        profiler.dump()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Corre o code.py no PC com os substitutos de host/")
+    parser.add_argument("--seconds", type=float, default=25.0, help="segundos virtuais a simular")
+    parser.add_argument("--scenario", help="JSON com a lista de eventos")
+    parser.add_argument("--trace", help="CSV t,x,y,z (m/s²) a reproduzir no acelerómetro")
+    parser.add_argument("--cpu-scale", type=float, default=1.0,
+                        help="multiplica o tempo de CPU do PC (ex.: 8 para o RP2040)")
+    parser.add_argument("--pixels", type=int, help="NUM_PIXELS (por omissão o do code.py)")
+    parser.add_argument("--diag", action="store_true", help="liga DIAG no code.py")
+    parser.add_argument("--frames", help="grava os frames mostrados (RGB crus) neste ficheiro")
+    parser.add_argument("--log", action="store_true", help="lista os eventos do mixer")
+    parser.add_argument("--profile", action="store_true",
+                        help="liga PROFILE no code.py e mostra os histogramas no fim")
+    args = parser.parse_args(argv)
+
+    if args.scenario:
+        with open(args.scenario) as f:
+            events = json.load(f)
+    else:
+        events = DEFAULT_SCENARIO
+    hal.scenario = hal.Scenario(events)
+    if args.trace:
+        hal.accel_trace = load_trace(args.trace)
+    hal.clock = hal.VirtualClock(cpu_scale=args.cpu_scale, limit=hal.VirtualClock().start + args.seconds)
+    if args.pixels:
+        os.environ["NUM_PIXELS"] = str(args.pixels)
+    if args.diag:
+        os.environ["DIAG"] = "1"
+    if args.profile:
+        os.environ["PROFILE"] = "1"
+
+    time.monotonic = hal.monotonic
+    time.monotonic_ns = hal.monotonic_ns
+    time.sleep = hal.sleep
+
+    fs = FileSystem(ROOT)
+    fs.install()
+    path = os.path.join(ROOT, "code.py")
+    with open(path, "rb") as f:
+        code = compile(f.read(), path, "exec")
+    namespace = {"__name__": "__main__", "__file__": path}
+    started = time.perf_counter()
+    try:
+        exec(code, namespace)
+    except hal.HostStop:
+        pass
+    finally:
+        fs.cleanup()
+
+    if args.frames:
+        with builtins.open(args.frames, "wb") as f:
+            for strip in hal.pixels:
+                for frame in strip.frames:
+                    f.write(frame)
+    if not args.log:
+        for mixer in hal.mixers:
+            mixer.events[:] = mixer.events[-10:]
+    report(namespace, started)
+
+
+if __name__ == "__main__":
+    main()
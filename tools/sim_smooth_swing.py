@@ -0,0 +1,163 @@
+# sim_smooth_swing.py
+# Simula no PC o caminho acelerómetro -> SwingDetector -> SmoothSwing com um
+# mixer falso, para afinar floor/ceiling/slew/duck sem o sabre.
+#
+# Entrada: CSV com t,x,y,z (segundos, m/s²) gravado do sabre (ex.: print de
+# motion.acceleration por amostra), ou, sem ficheiro, um traço sintético:
+# repouso, três swings de força crescente e repouso.
+#
+# Uso: python tools/sim_smooth_swing.py [trace.csv] [--out levels.csv] [--loop-ms 5]
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from motion import ODR, SWING_HOLDOFF, SwingDetector  # noqa: E402
+from smooth_swing import SmoothSwing  # noqa: E402
+
+WATERMARK = 10  # amostras por lote, como Motion
+
+
+class FakeVoice:
+    def __init__(self):
+        self.level = 1.0
+        self.playing = False
+        self.sample = None
+
+    def play(self, sample, loop=False):
+        self.sample = sample
+        self.playing = True
+
+    def stop(self):
+        self.playing = False
+
+
+class FakeMixer:
+    def __init__(self, voice_count=4):
+        self.voice = [FakeVoice() for _ in range(voice_count)]
+
+
+class FakeBank:
+    def __init__(self, mixer):
+        self.mixer = mixer
+        self.plays = []
+
+    def play_file(self, path, voice=0, loop=False, level=None):
+        self.mixer.voice[voice].play(path, loop)
+        if level is not None:
+            self.mixer.voice[voice].level = level
+        self.plays.append(path)
+
+
+def synthetic_trace(seconds=6.0, seed=1):
+    """Lâmina na vertical (gravidade em y), swings em x/z com centrípeta em y."""
+    rnd = random.Random(seed)
+    swings = [(1.0, 0.35, 8.0), (2.4, 0.3, 16.0), (3.8, 0.5, 28.0)]  # início, duração, pico m/s²
+    samples = []
+    for i in range(int(seconds * ODR)):
+        t = i / ODR
+        x, y, z = 0.0, 9.806, 0.0
+        for start, duration, peak in swings:
+            if start <= t < start + duration:
+                phase = (t - start) / duration
+                a = peak * math.sin(math.pi * phase)
+                x += a * math.cos(2 * math.pi * phase)
+                z += a * math.sin(2 * math.pi * phase)
+                y += 0.4 * a
+        samples.append((t, x + rnd.gauss(0, 0.08), y + rnd.gauss(0, 0.08), z + rnd.gauss(0, 0.08)))
+    return samples
+
+
+def read_trace(path):
+    samples = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            try:
+                samples.append(tuple(float(v) for v in row[:4]))
+            except ValueError:
+                continue  # cabeçalho
+    return samples
+
+
+def simulate(samples, loop_period=0.005, swing_threshold=130, **smooth_args):
+    mixer = FakeMixer()
+    bank = FakeBank(mixer)
+    pairs = [("/sounds/swing%d.wav" % i, "/sounds/swing%d.wav" % (i + 1)) for i in (1, 3, 5, 7)]
+    smooth = SmoothSwing(mixer, bank, pairs, **smooth_args)
+    detector = SwingDetector(swing_threshold)
+    start = samples[0][0]
+    smooth.start(1.0, now=start)
+
+    rows = []
+    events = []
+    last_swing = -SWING_HOLDOFF
+    pending = []
+    i = 0
+    now = start
+    end = samples[-1][0]
+    max_excess = 0.0
+    while now <= end:
+        # amostras que o FIFO já tem neste instante; lê-se um lote por watermark
+        while i < len(samples) and samples[i][0] <= now:
+            pending.append(samples[i])
+            i += 1
+        while len(pending) >= WATERMARK:
+            batch, pending = pending[:WATERMARK], pending[WATERMARK:]
+            peak = max(detector.feed(x, y, z) for _, x, y, z in batch)
+            first, last = batch[0][1:], batch[-1][1:]
+            if detector.end_batch(first, last, len(batch), peak) and now - last_swing >= SWING_HOLDOFF:
+                last_swing = now
+                events.append(now)
+        before = smooth.level
+        last_update = smooth._last
+        if smooth.update(detector.intensity, now=now):
+            dt = min(now - last_update, 0.1)
+            max_excess = max(max_excess, abs(smooth.level - before) - smooth.slew * dt)
+            v = mixer.voice
+            rows.append((round(now - start, 3), round(smooth.strength(detector.intensity), 3),
+                         round(smooth.level, 3), round(v[0].level, 3), round(v[2].level, 3),
+                         round(v[3].level, 3), smooth.pair))
+        now += loop_period
+    return rows, events, bank, max_excess
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulação do smooth swing com traços de acelerómetro")
+    parser.add_argument("trace", nargs="?", help="CSV t,x,y,z (m/s²); sem ele usa um traço sintético")
+    parser.add_argument("--out", help="grava os levels por update em CSV")
+    parser.add_argument("--loop-ms", type=float, default=5.0, help="período do loop principal simulado")
+    parser.add_argument("--swing-threshold", type=float, default=130)
+    parser.add_argument("--floor", type=float, default=1.0)
+    parser.add_argument("--ceiling", type=float, default=15.0)
+    parser.add_argument("--slew", type=float, default=6.0)
+    parser.add_argument("--duck", type=float, default=0.7)
+    args = parser.parse_args(argv)
+
+    samples = read_trace(args.trace) if args.trace else synthetic_trace()
+    rows, events, bank, max_excess = simulate(
+        samples, args.loop_ms / 1000, args.swing_threshold,
+        floor=args.floor, ceiling=args.ceiling, slew=args.slew, duck=args.duck)
+
+    duration = samples[-1][0] - samples[0][0]
+    print("amostras: {} ({:.2f} s a {} Hz)".format(len(samples), duration, ODR))
+    print("updates: {} ({:.1f}/s), eventos de swing: {}".format(len(rows), len(rows) / duration, len(events)))
+    print("level máximo: {:.2f}, hum mínimo: {:.2f}".format(max(r[2] for r in rows), min(r[3] for r in rows)))
+    print("trocas de par: {}".format(len(bank.plays) // 2 - 1))
+    print("slew respeitado: {}".format("sim" if max_excess <= 1e-9 else "não (+%.3f)" % max_excess))
+    print("   t  força  level    hum  swingA swingB par")
+    for row in rows[::max(1, len(rows) // 30)]:
+        print("{:5.2f} {:6.2f} {:6.2f} {:6.2f} {:6.2f} {:6.2f} {:3d}".format(*row))
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("t", "strength", "level", "hum", "swing_a", "swing_b", "pair"))
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
 # user_settings.py
 
 import json
+import os
+import struct
+import binascii
 
 default_settings = {
     "COR": 3,  # AQUA
@@ -11,15 +14,145 @@ default_settings = {
     "Anim": 0,  # On
 }
 
+# Registo binário em microcontroller.nvm (fonte principal dos settings):
+# "LS", versão, um byte por setting pela ordem de SETTING_KEYS, CRC32 dos
+# bytes anteriores. O settings.json é só importação/exportação.
+SETTING_KEYS = ("COR", "Brilho", "Volume", "Swing", "Clash", "Anim")
+NVM_OFFSET = 0
+NVM_MAGIC = b"LS"
+NVM_VERSION = 1
+_RECORD = "<2sB%dBI" % len(SETTING_KEYS)
+RECORD_SIZE = struct.calcsize(_RECORD)
+
 def load_settings(path="/settings.json"):
-    try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        print("Settings padrão carregado:", e)
-        return default_settings.copy()
+    return SettingsStore(path).values
 
 def save_settings(settings, path="/settings.json"):
-    import storage
-    with open(path, "w") as f:
-        json.dump(settings, f)
\ No newline at end of file
+    store = SettingsStore(path)
+    for key, value in settings.items():
+        store.set(key, value)
+    store.commit()
+
+def _nvm():
+    try:
+        import microcontroller
+        return microcontroller.nvm
+    except (ImportError, AttributeError):
+        return None
+
+def pack_record(values):
+    body = struct.pack(
+        _RECORD[:-1], NVM_MAGIC, NVM_VERSION,
+        *[int(values.get(key, default_settings[key])) & 0xFF for key in SETTING_KEYS]
+    )
+    return body + struct.pack("<I", binascii.crc32(body) & 0xFFFFFFFF)
+
+def unpack_record(raw):
+    """Devolve o dict de settings, ou None se o registo não é válido."""
+    if len(raw) != RECORD_SIZE:
+        return None
+    fields = struct.unpack(_RECORD, raw)
+    if fields[0] != NVM_MAGIC or fields[1] != NVM_VERSION:
+        return None
+    if fields[-1] != binascii.crc32(raw[:-4]) & 0xFFFFFFFF:
+        return None
+    return dict(zip(SETTING_KEYS, fields[2:-1]))
+
+def _read_nvm():
+    nvm = _nvm()
+    if not nvm:
+        return None
+    return unpack_record(bytes(nvm[NVM_OFFSET:NVM_OFFSET + RECORD_SIZE]))
+
+def _write_nvm(values):
+    nvm = _nvm()
+    if not nvm:
+        return False
+    raw = pack_record(values)
+    if bytes(nvm[NVM_OFFSET:NVM_OFFSET + RECORD_SIZE]) != raw:
+        nvm[NVM_OFFSET:NVM_OFFSET + RECORD_SIZE] = raw
+    return True
+
+
+class SettingsStore:
+    """
+    Settings em RAM, lidos no arranque do registo da NVM (alguns bytes, sem
+    abrir ficheiros). Sem registo válido, importa o settings.json uma vez.
+    set() só marca alterações; commit() grava a NVM, e só se algo mudou, e
+    exporta o JSON quando o disco pode ser escrito.
+    """
+    def __init__(self, path="/settings.json"):
+        self.path = path
+        self.values = default_settings.copy()
+        stored = _read_nvm()
+        if stored is None:
+            self.import_json()
+            _write_nvm(self.values)
+        else:
+            self.values.update(stored)
+        self._saved = self.values.copy()
+
+    def import_json(self, path=None):
+        # Se uma exportação foi interrompida entre o remove e o rename, sobra o .tmp
+        path = path or self.path
+        for candidate in (path, path + ".tmp"):
+            try:
+                with open(candidate, "r") as f:
+                    data = json.load(f)
+                for key in SETTING_KEYS:
+                    if key in data:
+                        self.values[key] = int(data[key])
+                return True
+            except (OSError, ValueError, TypeError) as e:
+                print("Erro ao ler", candidate, e)
+        print("Settings padrão carregado")
+        return False
+
+    def get(self, key):
+        return self.values.get(key, default_settings.get(key))
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    @property
+    def dirty(self):
+        return self.values != self._saved
+
+    def commit(self, export=True):
+        """Grava se houve alterações. Devolve True se gravou."""
+        if not self.dirty:
+            return False
+        if not _write_nvm(self.values):
+            # sem NVM (ex.: fora do dispositivo) o JSON é o único destino
+            if not self.export_json():
+                return False
+        elif export:
+            self.export_json()
+        self._saved = self.values.copy()
+        return True
+
+    def export_json(self, path=None):
+        """Remount, ficheiro temporário + rename, remount de volta."""
+        import storage
+        path = path or self.path
+        try:
+            storage.remount("/", readonly=False)
+        except RuntimeError as e:
+            print("Disco em uso por USB, settings só na NVM:", e)
+            return False
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.values, f)
+            # o FAT não faz rename por cima de um ficheiro existente
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            os.rename(tmp, path)
+            return True
+        except OSError as e:
+            print("Erro ao exportar settings:", e)
+            return False
+        finally:
+            storage.remount("/", readonly=True)